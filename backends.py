@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+後端註冊
+Excel COM（pywin32）、openpyxl與NumPy只在第一次使用時匯入；缺少的後端不影響其他功能
+"""
+
+import importlib
+import importlib.util
+
+from engine import MappingError
+
+
+# 後端名稱 -> (模組, 安裝的套件名稱)
+BACKEND_MODULES = {
+	'com': ('win32com.client', 'pywin32'),
+	'pythoncom': ('pythoncom', 'pywin32'),  # Excel工作執行緒的COM初始化
+	'openpyxl': ('openpyxl', 'openpyxl'),
+	'numpy': ('numpy', 'numpy'),  # 選用：大型工作表的空格遮罩
+}
+
+_loaded = {}
+_available = {}
+
+
+class BackendUnavailable(MappingError):
+	"""後端缺少需要的套件"""
+
+
+def backend_available(name):
+	"""後端的套件是否已安裝（只檢查，不匯入）"""
+	if name not in _available:
+		module_name = BACKEND_MODULES[name][0]
+		try:
+			found = importlib.util.find_spec(module_name.split('.')[0]) is not None
+		except (ImportError, ValueError):
+			found = False
+		_available[name] = found
+	return _available[name]
+
+
+def load_backend(name):
+	"""匯入後端模組（只匯入一次），缺少套件時拋出BackendUnavailable"""
+	module = _loaded.get(name)
+	if module is not None:
+		return module
+
+	module_name, package = BACKEND_MODULES[name]
+	if not backend_available(name):
+		raise BackendUnavailable(f"無法使用 {name}：請安裝 {package}")
+	try:
+		module = importlib.import_module(module_name)
+	except ImportError as e:
+		_available[name] = False
+		raise BackendUnavailable(f"無法使用 {name}：{e}")
+	_loaded[name] = module
+	return module
+
+
+def loaded_backends():
+	"""已匯入的後端名稱"""
+	return list(_loaded)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SHT Excel 批次寫入
+不開啟界面，以保存的配置將CSV寫入Excel檔案
+
+用法:
+	python main.py batch --config NAME --csv a.csv --xlsx b.xlsx [--csv c.csv --xlsx d.xlsx ...]
+	python main.py batch --config A B C --csv a.csv --xlsx b.xlsx
+	python main.py batch --manifest jobs.csv [--workers 8] [--report report.json]
+
+工作清單為CSV檔，欄位: csv, xlsx, config（可選: sheet, output），相對路徑以清單所在資料夾為準；
+config 可用 ; 分隔多個配置，同一工作表只載入一次，全部寫入後只儲存一次
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from engine import MappingError, run_mapping, run_mapping_set
+from config_store import CONFIG_DB_PATH, open_config_source
+
+
+MANIFEST_COLUMNS = ('csv', 'xlsx', 'config')
+
+# 一個工作套用多個配置時的分隔字元
+CONFIG_SEPARATOR = ';'
+
+
+def split_config_names(config):
+	"""'A;B' -> ['A', 'B']"""
+	return [name.strip() for name in config.split(CONFIG_SEPARATOR) if name.strip()]
+
+
+def read_manifest(path):
+	"""讀取工作清單，回傳工作列表"""
+	base_dir = os.path.dirname(os.path.abspath(path))
+
+	def resolve(p):
+		return p if not p or os.path.isabs(p) else os.path.join(base_dir, p)
+
+	jobs = []
+	with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+		reader = csv.DictReader(f)
+		missing = [c for c in MANIFEST_COLUMNS if c not in (reader.fieldnames or [])]
+		if missing:
+			raise MappingError(f"工作清單缺少欄位: {', '.join(missing)}")
+
+		for row in reader:
+			if not any((v or '').strip() for v in row.values()):
+				continue
+			jobs.append({
+				'csv': resolve(row['csv'].strip()),
+				'xlsx': resolve(row['xlsx'].strip()),
+				'config': row['config'].strip(),
+				'sheet': (row.get('sheet') or '').strip() or None,
+				'output': resolve((row.get('output') or '').strip()) or None,
+			})
+	return jobs
+
+
+def new_result(job, error=''):
+	"""建立工作結果（預設為未成功）"""
+	return {
+		'csv': job['csv'],
+		'xlsx': job['xlsx'],
+		'config': job['config'],
+		'ok': False,
+		'filled': 0,
+		'error': error,
+		'seconds': 0.0,
+	}
+
+
+def run_job(job):
+	"""執行單一工作（錯誤不外拋），回傳結果"""
+	result = new_result(job)
+	start = time.perf_counter()
+	try:
+		configs = job.get('config_data') or []
+		missing = [name for name, config_data in configs if config_data is None]
+		if not configs or missing:
+			raise MappingError(f"找不到配置: {', '.join(missing) or job['config']}")
+		if len(configs) == 1:
+			result['filled'] = run_mapping(configs[0][1], job['csv'], job['xlsx'],
+										   sheet_name=job.get('sheet'), output_path=job.get('output'))
+		else:
+			# 多個配置一起定位、寫入，只儲存一次
+			counts = run_mapping_set(configs, job['csv'], job['xlsx'],
+									 sheet_name=job.get('sheet'), output_path=job.get('output'))
+			result['filled'] = sum(counts.values())
+		result['ok'] = True
+	except MappingError as e:
+		result['error'] = str(e)
+	except Exception as e:
+		result['error'] = f"寫入失敗：{e}"
+	result['seconds'] = time.perf_counter() - start
+	return result
+
+
+def run_job_group(jobs):
+	"""依序執行寫入同一個Excel檔案的工作"""
+	return [run_job(job) for job in jobs]
+
+
+def group_jobs(jobs):
+	"""依輸出檔案分組，避免不同程序同時寫入同一檔案"""
+	groups = {}
+	for index, job in enumerate(jobs):
+		target = os.path.normcase(os.path.abspath(job.get('output') or job['xlsx']))
+		groups.setdefault(target, []).append((index, job))
+	return list(groups.values())
+
+
+def run_batch(jobs, field_mappings, workers=None, on_result=None):
+	"""以程序池執行工作，回傳與輸入順序相同的結果列表"""
+	for job in jobs:
+		job['config_data'] = [(name, field_mappings.get(name)) for name in split_config_names(job['config'])]
+
+	results = [None] * len(jobs)
+	groups = group_jobs(jobs)
+
+	def record(index, result):
+		results[index] = result
+		if on_result:
+			on_result(result)
+
+	if workers == 1 or len(groups) <= 1:
+		# 單一程序時不建立程序池
+		for group in groups:
+			for index, job in group:
+				record(index, run_job(job))
+		return results
+
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		futures = {executor.submit(run_job_group, [job for _, job in group]): group
+				   for group in groups}
+		for future in as_completed(futures):
+			group = futures[future]
+			try:
+				group_results = future.result()
+			except BrokenProcessPool as e:
+				group_results = [new_result(job, f"工作程序異常終止：{e}") for _, job in group]
+			except Exception as e:
+				group_results = [new_result(job, f"寫入失敗：{e}") for _, job in group]
+			for (index, _), result in zip(group, group_results):
+				record(index, result)
+
+	return results
+
+
+def format_result(result):
+	"""格式化單一結果"""
+	name = f"{os.path.basename(result['csv'])} -> {os.path.basename(result['xlsx'])} [{result['config']}]"
+	if result['ok']:
+		return f"[OK] {name}: 已填入 {result['filled']} 個數據 ({result['seconds']:.2f}s)"
+	return f"[FAIL] {name}: {result['error']} ({result['seconds']:.2f}s)"
+
+
+def summarize(results, elapsed, workers):
+	"""建立摘要報告"""
+	succeeded = [r for r in results if r['ok']]
+	failed = [r for r in results if not r['ok']]
+	job_seconds = [r['seconds'] for r in results]
+	return {
+		'total': len(results),
+		'succeeded': len(succeeded),
+		'failed': len(failed),
+		'filled': sum(r['filled'] for r in succeeded),
+		'workers': workers,
+		'elapsed_seconds': elapsed,
+		'job_seconds_total': sum(job_seconds),
+		'job_seconds_max': max(job_seconds) if job_seconds else 0.0,
+		'results': results,
+	}
+
+
+def build_parser():
+	"""建立命令列參數"""
+	parser = argparse.ArgumentParser(prog="main.py batch", description="以保存的配置批次寫入Excel")
+	parser.add_argument("--manifest", help="工作清單CSV（欄位: csv, xlsx, config, 可選 sheet, output）")
+	parser.add_argument("--config", nargs='+', help="配置名稱（多個時一起寫入，只儲存一次）")
+	parser.add_argument("--csv", action="append", default=[], help="CSV檔案（可重複，與--xlsx依序配對）")
+	parser.add_argument("--xlsx", action="append", default=[], help="Excel檔案（可重複）")
+	parser.add_argument("--sheet", help="工作表名稱（預設使用活動工作表）")
+	parser.add_argument("--mappings", default=CONFIG_DB_PATH, help="配置庫路徑（.json 為舊格式配置檔）")
+	parser.add_argument("--workers", type=int, default=None, help="工作程序數量（預設為CPU核心數，1為不使用程序池）")
+	parser.add_argument("--report", help="將摘要報告寫入JSON檔")
+	return parser
+
+
+def main(argv=None):
+	"""批次入口，回傳結束代碼"""
+	parser = build_parser()
+	args = parser.parse_args(argv)
+
+	if args.workers is not None and args.workers < 1:
+		parser.error("--workers 必須大於 0")
+
+	if args.manifest:
+		if args.csv or args.xlsx:
+			parser.error("--manifest 不可與 --csv/--xlsx 同時使用")
+		try:
+			jobs = read_manifest(args.manifest)
+		except Exception as e:
+			print(f"讀取工作清單失敗：{e}", file=sys.stderr)
+			return 2
+	else:
+		if not args.config or not args.csv:
+			parser.error("請指定 --manifest，或 --config 與 --csv/--xlsx")
+		if len(args.csv) != len(args.xlsx):
+			parser.error("--csv 與 --xlsx 的數量必須一致")
+		config = CONFIG_SEPARATOR.join(args.config)
+		jobs = [{'csv': c, 'xlsx': x, 'config': config, 'sheet': args.sheet, 'output': None}
+				for c, x in zip(args.csv, args.xlsx)]
+
+	# 配置只讀取一次，所有工作共用
+	try:
+		field_mappings = open_config_source(args.mappings)
+	except Exception as e:
+		print(f"讀取配置失敗：{e}", file=sys.stderr)
+		return 2
+
+	start = time.perf_counter()
+	results = run_batch(jobs, field_mappings, workers=args.workers,
+						on_result=lambda r: print(format_result(r), file=sys.stdout if r['ok'] else sys.stderr))
+	summary = summarize(results, time.perf_counter() - start, args.workers or os.cpu_count())
+
+	print(f"完成 {summary['total']} 個工作：成功 {summary['succeeded']}，失敗 {summary['failed']}，"
+		  f"共填入 {summary['filled']} 個數據，耗時 {summary['elapsed_seconds']:.2f}s")
+
+	if args.report:
+		with open(args.report, 'w', encoding='utf-8') as f:
+			json.dump(summary, f, ensure_ascii=False, indent=2)
+
+	return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""效能測試：合成的檢查表/CSV與各階段計時（模擬的COM工作表在 tests/fake_com）"""
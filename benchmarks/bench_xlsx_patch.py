@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+就地修補與openpyxl儲存的比較
+產生指定大小的工作簿，分別以 openpyxl（載入、寫入、儲存）與 xlsx_patch 寫入相同的儲存格
+
+用法: python benchmarks/bench_xlsx_patch.py --rows 50000 --cols 20 --cells 12
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook, load_workbook
+
+from xlsx_patch import patch_xlsx
+
+
+def make_workbook(path, rows, cols):
+	"""以write_only模式產生測試用工作簿（數字與文字混合）"""
+	workbook = Workbook(write_only=True)
+	sheet = workbook.create_sheet('Data')
+	for r in range(rows):
+		sheet.append([r * cols + c if c % 3 else f"text {r}-{c}" for c in range(cols)])
+	workbook.save(path)
+
+
+def make_plan(rows, cols, cells, seed=0):
+	"""隨機選取要寫入的儲存格"""
+	rng = random.Random(seed)
+	return [(rng.randrange(rows), rng.randrange(cols), float(i)) for i in range(cells)]
+
+
+def time_openpyxl(path, plan):
+	start = time.perf_counter()
+	workbook = load_workbook(path, data_only=True)
+	sheet = workbook.active
+	for row, col, value in plan:
+		sheet.cell(row=row + 1, column=col + 1, value=value)
+	workbook.save(path)
+	return time.perf_counter() - start
+
+
+def time_patch(path, plan):
+	start = time.perf_counter()
+	patch_xlsx(path, plan)
+	return time.perf_counter() - start
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="xlsx就地修補效能比較")
+	parser.add_argument('--rows', type=int, default=20000)
+	parser.add_argument('--cols', type=int, default=20)
+	parser.add_argument('--cells', type=int, default=12, help="寫入的儲存格數量")
+	parser.add_argument('--repeat', type=int, default=3)
+	args = parser.parse_args(argv)
+
+	directory = tempfile.mkdtemp()
+	try:
+		source = os.path.join(directory, 'source.xlsx')
+		make_workbook(source, args.rows, args.cols)
+		plan = make_plan(args.rows, args.cols, args.cells)
+		print(f"工作簿: {args.rows} 行 x {args.cols} 欄，{os.path.getsize(source) / 1e6:.1f} MB，"
+			  f"寫入 {args.cells} 個儲存格")
+
+		for name, func in (('openpyxl', time_openpyxl), ('patch', time_patch)):
+			times = []
+			for _ in range(args.repeat):
+				target = os.path.join(directory, f'{name}.xlsx')
+				shutil.copyfile(source, target)
+				times.append(func(target, plan))
+			print(f"{name:>8}: 最佳 {min(times):.3f} 秒，平均 {sum(times) / len(times):.3f} 秒")
+	finally:
+		shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+	main()
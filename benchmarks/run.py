@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+各階段效能測試
+以合成的檢查表與CSV量測定位、掃描空格、檔案定位、COM定位/寫入（模擬工作表）、CSV載入、
+自動選取與儲存，結果寫入JSON並可與基準比較；不需要Excel或顯示器
+
+用法:
+	python benchmarks/run.py --sheet-rows 1000 20000 --csv-rows 1000 100000 1000000 --output result.json
+	python benchmarks/run.py --stages empty_mask scan_empty_cells scan_per_cell --cols 200 --block 5000
+	python benchmarks/run.py --baseline baseline.json
+	python benchmarks/run.py --save-baseline baseline.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import backend_available
+from com_locator import locate_in_worksheet
+from engine import (MAX_HORIZONTAL_SCAN_RANGE, CsvModel, SheetModel, FieldLocator, is_cell_empty,
+					iter_csv_chunks, make_cell_info)
+from empty_mask import EmptyMask
+from sheet_backend import ComSheetBackend, OpenpyxlSheetBackend, XlsxSheetBackend
+from stream_locator import locate_in_file
+
+from tests.fake_com import FakeWorksheet
+from benchmarks.synthetic import (FIRST_KEYWORD, TARGET_KEYWORD, SHAPE_VERTICAL, SHAPE_HORIZONTAL,
+								  make_checklist, write_xlsx, write_csv)
+
+
+SHEET_STAGES = ('find_field_position', 'empty_mask', 'scan_empty_cells', 'scan_per_cell', 'locate_in_file',
+				'com_locate', 'com_write', 'save_patch', 'save_openpyxl')
+CSV_STAGES = ('load_csv', 'csv_first_page', 'auto_select_elements')
+
+# 表格一頁的行數
+PAGE_ROWS = 50
+
+
+def measure(func, repeat, setup=None):
+	"""執行 repeat 次，回傳 (每次秒數, 最後一次的結果)；setup 不計入時間"""
+	times = []
+	result = None
+	for _ in range(repeat):
+		if setup:
+			setup()
+		start = time.perf_counter()
+		result = func()
+		times.append(time.perf_counter() - start)
+	return times, result
+
+
+def scan_per_cell(data, field_row, field_col):
+	"""逐格轉換文字的垂直掃描（空格遮罩之前的做法，作為比較基準）"""
+	empty_cells = []
+	row = field_row + 1
+	while row < len(data):
+		count = 0
+		has_content = False
+		for col in range(field_col, field_col + MAX_HORIZONTAL_SCAN_RANGE):
+			if col >= len(data[row]):
+				break
+			if not is_cell_empty(data[row][col]):
+				has_content = True
+				break
+			empty_cells.append(make_cell_info(row, col, data[row][col]))
+			count += 1
+		if has_content or count == 0:
+			break
+		row += 1
+	return empty_cells
+
+
+def make_result(stage, size, times, **extra):
+	result = {
+		'key': f"{stage}@{size}",
+		'stage': stage,
+		'size': size,
+		'best': min(times),
+		'mean': sum(times) / len(times),
+		'runs': len(times),
+	}
+	result.update(extra)
+	return result
+
+
+def bench_sheet(rows, args, directory, stages):
+	"""工作表相關的階段"""
+	data, field = make_checklist(rows, args.cols, args.position, args.shape, args.block)
+	size = f"{rows}x{args.cols}"
+	path = os.path.join(directory, f"sheet_{rows}.xlsx")
+	write_xlsx(path, data)
+	results = []
+
+	if 'find_field_position' in stages:
+		# 每次使用新的快照，包含關鍵字索引的建立
+		times, position = measure(
+			lambda: FieldLocator(SheetModel(data)).locate_field(FIRST_KEYWORD, TARGET_KEYWORD), args.repeat)
+		assert position == field, position
+		results.append(make_result('find_field_position', size, times))
+
+	if 'empty_mask' in stages:
+		times, mask = measure(lambda: EmptyMask(data), args.repeat)
+		results.append(make_result('empty_mask', size, times, numpy=mask.array is not None))
+
+	# 遮罩在第一次掃描時建立，之後的掃描沿用
+	locator = FieldLocator(SheetModel(data))
+	cells = locator.scan_empty_cells(*field)
+	plan = [(cell['row'], cell['col'], float(i)) for i, cell in enumerate(cells)]
+
+	if 'scan_empty_cells' in stages:
+		times, _ = measure(lambda: locator.scan_empty_cells(*field), args.repeat)
+		results.append(make_result('scan_empty_cells', size, times, cells=len(cells)))
+
+	if 'scan_per_cell' in stages and args.shape == SHAPE_VERTICAL:
+		times, found = measure(lambda: scan_per_cell(data, *field), args.repeat)
+		assert found == cells
+		results.append(make_result('scan_per_cell', size, times, cells=len(cells)))
+
+	if 'locate_in_file' in stages:
+		times, (found, rows_read) = measure(
+			lambda: locate_in_file(path, FIRST_KEYWORD, TARGET_KEYWORD), args.repeat)
+		assert len(found) == len(cells)
+		results.append(make_result('locate_in_file', size, times, rows_read=rows_read,
+								   file_mb=round(os.path.getsize(path) / 1e6, 2)))
+
+	if 'com_locate' in stages:
+		worksheet = FakeWorksheet(data)
+
+		def com_locate():
+			worksheet.calls = 0
+			return locate_in_worksheet(worksheet, FIRST_KEYWORD, TARGET_KEYWORD,
+									   lambda: SheetModel.from_com_worksheet(worksheet))
+		times, (found, method) = measure(com_locate, args.repeat)
+		assert len(found) == len(cells)
+		results.append(make_result('com_locate', size, times, method=method, com_calls=worksheet.calls))
+
+	if 'com_write' in stages:
+		worksheet = FakeWorksheet(data)
+		backend = ComSheetBackend(worksheet.Parent, worksheet)
+
+		def com_write():
+			worksheet.calls = 0
+			return backend.write_cells(plan)
+		times, _ = measure(com_write, args.repeat)
+		results.append(make_result('com_write', size, times, cells=len(plan), com_calls=worksheet.calls))
+
+	target = os.path.join(directory, f"target_{rows}.xlsx")
+
+	def copy_source():
+		shutil.copyfile(path, target)
+
+	if 'save_patch' in stages:
+		def save_patch():
+			backend = XlsxSheetBackend(target)
+			backend.write_cells(plan)
+			return backend.save()
+		times, method = measure(save_patch, args.repeat, copy_source)
+		results.append(make_result('save_patch', size, times, method=method))
+
+	if 'save_openpyxl' in stages and backend_available('openpyxl'):
+		def save_openpyxl():
+			with OpenpyxlSheetBackend(target) as backend:
+				backend.write_cells(plan)
+				return backend.save()
+		times, _ = measure(save_openpyxl, args.repeat, copy_source)
+		results.append(make_result('save_openpyxl', size, times))
+
+	return results
+
+
+def bench_csv(rows, args, directory, stages):
+	"""CSV相關的階段"""
+	path = os.path.join(directory, f"export_{rows}.csv")
+	names = write_csv(path, rows)
+	size = str(rows)
+	results = []
+
+	if 'load_csv' in stages:
+		times, model = measure(lambda: CsvModel.from_path(path), args.repeat)
+		results.append(make_result('load_csv', size, times,
+								   file_mb=round(os.path.getsize(path) / 1e6, 2)))
+	else:
+		model = CsvModel.from_path(path)
+
+	if 'csv_first_page' in stages:
+		# 串流載入：第一批資料到達後即可顯示一頁
+		def first_page():
+			page_model = CsvModel()
+			page_model.extend(next(iter_csv_chunks(path)))
+			return [page_model.display_row(i) for i in range(min(PAGE_ROWS, len(page_model)))]
+		times, _ = measure(first_page, args.repeat)
+		results.append(make_result('csv_first_page', size, times))
+
+	if 'auto_select_elements' in stages:
+		rng = random.Random(0)
+		elements = [rng.choice(names) for _ in range(min(args.select, rows))]
+		times, selected = measure(lambda: model.find_rows(elements), args.repeat)
+		results.append(make_result('auto_select_elements', size, times, elements=len(elements),
+								   selected=len(selected)))
+
+	return results
+
+
+def compare(results, baseline, tolerance):
+	"""加上與基準的比例，回傳變慢超過容許範圍的結果"""
+	base = {result['key']: result for result in baseline.get('results', [])}
+	regressions = []
+	for result in results:
+		previous = base.get(result['key'])
+		if not previous or not previous['best']:
+			continue
+		result['baseline_best'] = previous['best']
+		result['ratio'] = result['best'] / previous['best']
+		if result['ratio'] > 1 + tolerance:
+			regressions.append(result)
+	return regressions
+
+
+def format_result(result):
+	line = f"{result['stage']:<22} {result['size']:>12} {result['best'] * 1000:10.2f} ms"
+	if 'ratio' in result:
+		line += f"  x{result['ratio']:.2f}"
+	return line
+
+
+def build_parser():
+	"""建立命令列參數"""
+	parser = argparse.ArgumentParser(description="各階段效能測試")
+	parser.add_argument('--sheet-rows', type=int, nargs='+', default=[1000, 20000], help="檢查表行數")
+	parser.add_argument('--cols', type=int, default=20, help="檢查表欄數")
+	parser.add_argument('--position', type=float, default=0.5, help="目標欄位的高度比例（0 = 頂端，1 = 底部）")
+	parser.add_argument('--shape', choices=(SHAPE_VERTICAL, SHAPE_HORIZONTAL), default=SHAPE_VERTICAL,
+						help="空格區塊形狀")
+	parser.add_argument('--block', type=int, default=12, help="空格區塊大小")
+	parser.add_argument('--csv-rows', type=int, nargs='+', default=[1000, 100000], help="CSV行數")
+	parser.add_argument('--select', type=int, default=200, help="自動選取的元素數量")
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--stages', nargs='+', choices=SHEET_STAGES + CSV_STAGES, help="只執行指定的階段")
+	parser.add_argument('--output', help="將結果寫入JSON檔")
+	parser.add_argument('--baseline', help="與基準JSON比較")
+	parser.add_argument('--tolerance', type=float, default=0.2, help="容許變慢的比例（預設 0.2 = 20%%）")
+	parser.add_argument('--save-baseline', help="將結果另存為基準JSON")
+	return parser
+
+
+def main(argv=None):
+	"""回傳結束代碼（1 = 有階段比基準慢超過容許範圍）"""
+	args = build_parser().parse_args(argv)
+	stages = set(args.stages or SHEET_STAGES + CSV_STAGES)
+
+	results = []
+	directory = tempfile.mkdtemp()
+	try:
+		if stages & set(SHEET_STAGES):
+			for rows in args.sheet_rows:
+				results.extend(bench_sheet(rows, args, directory, stages))
+		if stages & set(CSV_STAGES):
+			for rows in args.csv_rows:
+				results.extend(bench_csv(rows, args, directory, stages))
+	finally:
+		shutil.rmtree(directory)
+
+	regressions = []
+	if args.baseline:
+		with open(args.baseline, 'r', encoding='utf-8') as f:
+			regressions = compare(results, json.load(f), args.tolerance)
+
+	for result in results:
+		print(format_result(result))
+	if 'save_openpyxl' in stages and not backend_available('openpyxl'):
+		print("略過 save_openpyxl：未安裝openpyxl")
+	for result in regressions:
+		print(f"變慢: {result['key']} {result['baseline_best'] * 1000:.2f} ms -> "
+			  f"{result['best'] * 1000:.2f} ms", file=sys.stderr)
+
+	report = {
+		'meta': {
+			'date': datetime.datetime.now().isoformat(timespec='seconds'),
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'args': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'save_baseline')},
+		},
+		'results': results,
+	}
+	for path in (args.output, args.save_baseline):
+		if path:
+			with open(path, 'w', encoding='utf-8') as f:
+				json.dump(report, f, ensure_ascii=False, indent=2)
+
+	return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成測試資料
+產生檢查表工作簿（大小、關鍵字位置、空格區塊形狀可調）與CSV匯出檔；
+xlsx直接以zipfile寫出，不需要openpyxl
+"""
+
+import csv
+import random
+import zipfile
+
+from engine import MAX_HORIZONTAL_SCAN_RANGE, get_excel_column_name
+
+
+FIRST_KEYWORD = "檢查項目"
+TARGET_KEYWORD = "量測值"
+
+# 空格區塊形狀
+SHAPE_VERTICAL = 'vertical'  # 目標欄位下方 N 行 x 4 欄
+SHAPE_HORIZONTAL = 'horizontal'  # 目標欄位下一行右側 N 欄
+
+CONTENT_TYPES = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+	'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+	'<Default Extension="xml" ContentType="application/xml"/>'
+	'<Override PartName="/xl/workbook.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+	'<Override PartName="/xl/worksheets/sheet1.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+	'<Override PartName="/xl/sharedStrings.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+	'</Types>')
+ROOT_RELS = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+	'<Relationship Id="rId1" '
+	'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+	'Target="xl/workbook.xml"/></Relationships>')
+WORKBOOK = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+	'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+	'<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>')
+WORKBOOK_RELS = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+	'<Relationship Id="rId1" '
+	'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+	'Target="worksheets/sheet1.xml"/>'
+	'<Relationship Id="rId2" '
+	'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+	'Target="sharedStrings.xml"/></Relationships>')
+
+
+def make_checklist(rows, cols, position=0.5, shape=SHAPE_VERTICAL, block_size=12,
+				   with_first_keyword=True, seed=0):
+	"""產生檢查表數據（0-based 的列表），回傳 (數據, 目標欄位位置)
+
+	position: 目標欄位所在的高度比例（0 = 頂端，1 = 底部）
+	shape/block_size: 空格區塊形狀與大小（垂直為行數，水平為欄數）
+	"""
+	rng = random.Random(seed)
+	cols = max(cols, MAX_HORIZONTAL_SCAN_RANGE + 2)
+	data = []
+	for r in range(rows):
+		data.append([f"項目 {r}-{c}" if rng.random() < 0.5 else rng.randint(0, 9999)
+					 for c in range(cols)])
+
+	field_col = rng.randrange(0, cols - MAX_HORIZONTAL_SCAN_RANGE)
+	height = block_size if shape == SHAPE_VERTICAL else 1
+	field_row = min(int((rows - height - 2) * position) + 1, rows - height - 2)
+	field_row = max(field_row, 1)
+
+	data[field_row][field_col] = TARGET_KEYWORD
+	if with_first_keyword:
+		data[field_row - 1][field_col] = FIRST_KEYWORD
+
+	if shape == SHAPE_VERTICAL:
+		for r in range(field_row + 1, field_row + 1 + block_size):
+			for c in range(field_col, field_col + MAX_HORIZONTAL_SCAN_RANGE):
+				data[r][c] = None
+	else:
+		# 下一行的目標欄有內容，向右的空格成為水平區塊
+		for c in range(field_col + 1, min(field_col + 1 + block_size, cols)):
+			data[field_row + 1][c] = None
+	return data, (field_row, field_col)
+
+
+def escape(text):
+	return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def sheet_xml(data, shared):
+	"""工作表XML（文字使用共用字串表）"""
+	width = max((len(row) for row in data), default=1)
+	parts = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+			 '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+			 f'<dimension ref="A1:{get_excel_column_name(width - 1)}{max(len(data), 1)}"/><sheetData>']
+	columns = [get_excel_column_name(c) for c in range(width)]
+	for r, row in enumerate(data):
+		cells = []
+		for c, value in enumerate(row):
+			if value is None:
+				continue
+			ref = f"{columns[c]}{r + 1}"
+			if isinstance(value, str):
+				index = shared.setdefault(value, len(shared))
+				cells.append(f'<c r="{ref}" t="s"><v>{index}</v></c>')
+			else:
+				cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+		if cells:
+			parts.append(f'<row r="{r + 1}">{"".join(cells)}</row>')
+	parts.append('</sheetData></worksheet>')
+	return ''.join(parts)
+
+
+def shared_strings_xml(shared):
+	items = ''.join(f'<si><t>{escape(text)}</t></si>' for text in shared)
+	return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+			'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+			f'count="{len(shared)}" uniqueCount="{len(shared)}">{items}</sst>')
+
+
+def write_xlsx(path, data, sheet_name='Sheet1'):
+	"""將數據寫成只有一個工作表的xlsx"""
+	shared = {}
+	sheet = sheet_xml(data, shared)
+	with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+		archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+		archive.writestr('_rels/.rels', ROOT_RELS)
+		archive.writestr('xl/workbook.xml', WORKBOOK.format(name=escape(sheet_name)))
+		archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+		archive.writestr('xl/worksheets/sheet1.xml', sheet)
+		archive.writestr('xl/sharedStrings.xml', shared_strings_xml(shared))
+
+
+def element_names(count, seed=0):
+	"""CSV元素名稱（約一成重複，模擬同名元素）"""
+	rng = random.Random(seed)
+	names = []
+	for i in range(count):
+		if names and rng.random() < 0.1:
+			names.append(rng.choice(names))
+		else:
+			names.append(f"ELEM_{i:07d}")
+	return names
+
+
+def write_csv(path, rows, seed=0):
+	"""產生CSV匯出檔（Element, Dev, Actual），回傳元素名稱列表"""
+	rng = random.Random(seed)
+	names = element_names(rows, seed)
+	with open(path, 'w', encoding='utf-8', newline='') as f:
+		writer = csv.writer(f)
+		writer.writerow(['Element', 'Dev', 'Actual'])
+		for name in names:
+			dev = f"{rng.uniform(-1, 1):.4f}" if rng.random() < 0.7 else ''
+			actual = f"{rng.uniform(0, 100):.3f}" if rng.random() < 0.8 else ''
+			writer.writerow([name, dev, actual])
+	return names
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+COM模式欄位定位
+使用Excel的Find/FindNext找出關鍵字，只讀取目標欄位附近的區塊
+"""
+
+from engine import (MAX_HORIZONTAL_SCAN_RANGE, MAX_VERTICAL_SCAN_RANGE, MappingError, SheetModel,
+					FieldLocator, get_excel_column_name, make_cell_info, values_to_rows)
+from tracing import traced_locate
+
+
+# Excel常數
+XL_VALUES = -4163
+XL_PART = 2
+XL_BY_ROWS = 1
+XL_NEXT = 1
+
+# 讀取區塊大小：寬度需涵蓋垂直與水平掃描，高度不足時加倍
+WINDOW_WIDTH = max(MAX_HORIZONTAL_SCAN_RANGE, MAX_VERTICAL_SCAN_RANGE)
+WINDOW_HEIGHT = MAX_VERTICAL_SCAN_RANGE + 1
+
+
+def range_address(top, left, bottom, right):
+	"""0-based 行列轉為A1格式位址"""
+	return f"{get_excel_column_name(left)}{top + 1}:{get_excel_column_name(right)}{bottom + 1}"
+
+
+# Find的萬用字元（~ 為跳脫字元）
+FIND_WILDCARDS = ('~', '*', '?')
+
+
+def is_text_keyword(keyword):
+	"""Find比對的是顯示文字，數字關鍵字無法保證與 str(cell) 一致"""
+	try:
+		float(keyword)
+	except ValueError:
+		return True
+	return False
+
+
+def is_find_keyword(keyword):
+	"""可以交給Find的關鍵字：文字且不含萬用字元"""
+	return is_text_keyword(keyword) and not any(char in keyword for char in FIND_WILDCARDS)
+
+
+def escape_find_keyword(keyword):
+	"""以 ~ 跳脫Find的萬用字元"""
+	for char in FIND_WILDCARDS:
+		keyword = keyword.replace(char, '~' + char)
+	return keyword
+
+
+def has_hidden_cells(worksheet, used_range):
+	"""有篩選或隱藏的行列時，Find（LookIn=xlValues）會略過這些儲存格"""
+	if worksheet.AutoFilterMode or worksheet.FilterMode:
+		return True
+	# 部分隱藏時 Hidden 為 None
+	return used_range.EntireRow.Hidden is not False or used_range.EntireColumn.Hidden is not False
+
+
+class ComFieldLocator:
+	"""以Excel的Find定位目標欄位，只讀取附近區塊（行列為工作表的 0-based 絕對位置）"""
+
+	def __init__(self, worksheet):
+		self.worksheet = worksheet
+		used_range = self.used_range = worksheet.UsedRange
+		self.top = used_range.Row - 1
+		self.left = used_range.Column - 1
+		self.bottom = self.top + used_range.Rows.Count - 1
+		self.right = self.left + used_range.Columns.Count - 1
+		self.cells_read = 0
+
+	def find_in_range(self, top, left, bottom, right, keyword):
+		"""在範圍中依行優先順序找出第一個符合 `keyword in str(value)` 的儲存格 (row, col)"""
+		if (top, left) == (bottom, right):
+			# 單一儲存格的Find會搜尋整個工作表，直接讀取
+			value = self.worksheet.Range(range_address(top, left, top, left)).Value
+			return (top, left) if value and keyword in str(value) else None
+
+		search_range = self.worksheet.Range(range_address(top, left, bottom, right))
+		# 從最後一格之後開始找，第一個結果即為左上方的第一個
+		last_cell = search_range.Cells(search_range.Cells.Count)
+		found = search_range.Find(What=escape_find_keyword(keyword), After=last_cell, LookIn=XL_VALUES,
+								  LookAt=XL_PART, SearchOrder=XL_BY_ROWS, SearchDirection=XL_NEXT,
+								  MatchCase=True)
+		if found is None:
+			return None
+
+		first_address = found.Address
+		while True:
+			row, col = found.Row - 1, found.Column - 1
+			# 只接受範圍內的結果
+			if top <= row <= bottom and left <= col <= right:
+				value = found.Value
+				if value and keyword in str(value):
+					return (row, col)
+			found = search_range.FindNext(found)
+			if found is None or found.Address == first_address:
+				return None
+
+	def find_field_position(self, field_name):
+		"""尋找欄位位置"""
+		return self.find_in_range(self.top, self.left, self.bottom, self.right, field_name)
+
+	def find_second_keyword_in_column(self, first_row, col_idx, second_keyword):
+		"""在同一欄中往下尋找目標欄位"""
+		if first_row + 1 > self.bottom:
+			return None
+		position = self.find_in_range(first_row + 1, col_idx, self.bottom, col_idx, second_keyword)
+		return position[0] if position else None
+
+	def locate_field(self, first_keyword, second_keyword):
+		"""定位目標欄位（支援兩段定位），找不到時拋出MappingError"""
+		if first_keyword:
+			first_position = self.find_field_position(first_keyword)
+			if not first_position:
+				raise MappingError(f"找不到定位列: {first_keyword}")
+
+			first_row, first_col = first_position
+			second_row = self.find_second_keyword_in_column(first_row, first_col, second_keyword)
+			if second_row is None:
+				raise MappingError(
+					f"在定位列 '{first_keyword}' 的同一欄中\n往下找不到目標欄位: {second_keyword}")
+			return (second_row, first_col)
+
+		field_position = self.find_field_position(second_keyword)
+		if not field_position:
+			raise MappingError(f"找不到目標欄位: {second_keyword}")
+		return field_position
+
+	def read_window(self, field_row, field_col, height):
+		"""讀取以目標欄位為左上角的區塊（不超出UsedRange）"""
+		bottom = min(field_row + height - 1, self.bottom)
+		right = min(field_col + WINDOW_WIDTH - 1, self.right)
+		values = self.worksheet.Range(range_address(field_row, field_col, bottom, right)).Value
+		self.cells_read += (bottom - field_row + 1) * (right - field_col + 1)
+		return values_to_rows(values), bottom
+
+	def scan_empty_cells(self, field_row, field_col):
+		"""在目標欄位下方獲取空格位置，區塊不夠高時加倍重讀"""
+		height = WINDOW_HEIGHT
+		while True:
+			window, window_bottom = self.read_window(field_row, field_col, height)
+			local_cells = FieldLocator(SheetModel(window)).scan_empty_cells(0, 0)
+
+			# 垂直空格延伸到區塊底部且下方還有資料時，擴大區塊
+			reached_bottom = local_cells and local_cells[-1]['row'] == len(window) - 1
+			if reached_bottom and window_bottom < self.bottom:
+				height *= 2
+				continue
+
+			return [make_cell_info(cell['row'] + field_row, cell['col'] + field_col, cell['value'])
+					for cell in local_cells]
+
+	def locate(self, first_keyword, second_keyword):
+		"""定位目標欄位並回傳空格位置"""
+		field_row, field_col = self.locate_field(first_keyword, second_keyword)
+		return self.scan_empty_cells(field_row, field_col)
+
+
+def locate_in_worksheet(worksheet, first_keyword, second_keyword, load_sheet):
+	"""COM模式定位：優先使用Find，必要時改用完整UsedRange，回傳 (空格列表, 使用方式)
+
+	關鍵字含萬用字元、或工作表有篩選/隱藏的行列時，Find的結果與逐格比對不同，改用完整讀取
+	load_sheet: 回傳完整 SheetModel 的函式（僅在需要時呼叫）
+	"""
+	keywords = [k for k in (first_keyword, second_keyword) if k]
+	if all(is_find_keyword(k) for k in keywords):
+		try:
+			locator = ComFieldLocator(worksheet)
+			if not has_hidden_cells(worksheet, locator.used_range):
+				return traced_locate(locator, first_keyword, second_keyword, backend='com'), 'find'
+		except MappingError:
+			raise
+		except Exception:
+			# Find失敗（例如保護的工作表），改用完整讀取
+			pass
+
+	sheet_model = load_sheet()
+	return traced_locate(FieldLocator(sheet_model), first_keyword, second_keyword,
+						 backend='com_full'), 'full'
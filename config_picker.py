@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置選擇器
+配置名稱、定位列/目標欄位及元素名稱的搜尋索引，以及只顯示可見行的配置列表
+"""
+
+import tkinter as tk
+
+
+# 比對時索引的最長片段（較長的關鍵字以三字片段取交集後再確認）
+GRAM_SIZE = 3
+
+# 輸入停止後多久更新搜尋結果（毫秒）
+SEARCH_DELAY_MS = 120
+
+# 比對到的欄位，數字越小排序越前
+RANK_NAME_PREFIX = 0
+RANK_NAME = 1
+RANK_KEYWORD = 2
+RANK_ELEMENT = 3
+
+
+def config_texts(name, config_data):
+	"""配置中可搜尋的文字 {文字: 排序等級}（不分大小寫）"""
+	texts = {}
+
+	def add(text, rank):
+		text = str(text or '').strip().lower()
+		if text and rank < texts.get(text, RANK_ELEMENT + 1):
+			texts[text] = rank
+
+	add(name, RANK_NAME)
+	add(config_data.get('first_keyword'), RANK_KEYWORD)
+	add(config_data.get('field_name'), RANK_KEYWORD)
+	for element in config_data.get('selected_elements', []):
+		add(element, RANK_ELEMENT)
+	return texts
+
+
+class ConfigIndex:
+	"""配置搜尋索引：不重複的文字各建立一次片段索引，新增/刪除配置時只更新該配置"""
+
+	def __init__(self, items=()):
+		self.texts = []  # 不重複的文字
+		self.text_ids = {}
+		self.text_configs = []  # 文字編號 -> 含有此文字的配置名稱
+		self.grams = {}  # 長度 1..GRAM_SIZE 的片段 -> 文字編號
+		self.configs = {}  # 配置名稱 -> {文字編號: 排序等級}
+		self.order = {}  # 配置名稱 -> 原始順序
+		self._last_query = None
+		self._last_matches = None
+		for name, config_data in items:
+			self.add(name, config_data)
+
+	def __len__(self):
+		return len(self.configs)
+
+	def text_id(self, text):
+		text_id = self.text_ids.get(text)
+		if text_id is None:
+			text_id = len(self.texts)
+			self.text_ids[text] = text_id
+			self.texts.append(text)
+			self.text_configs.append(set())
+			grams = {text[i:i + size] for size in range(1, GRAM_SIZE + 1)
+					 for i in range(len(text) - size + 1)}
+			for gram in grams:
+				self.grams.setdefault(gram, set()).add(text_id)
+		return text_id
+
+	def add(self, name, config_data):
+		"""新增或更新配置（更新時保留原本的順序）"""
+		self.remove(name, keep_order=True)
+		self.order.setdefault(name, len(self.order))
+		entry = {}
+		for text, rank in config_texts(name, config_data).items():
+			text_id = self.text_id(text)
+			entry[text_id] = rank
+			self.text_configs[text_id].add(name)
+		self.configs[name] = entry
+		self._last_query = None
+
+	def remove(self, name, keep_order=False):
+		"""移除配置（文字本身保留，之後的配置可能再使用）"""
+		entry = self.configs.pop(name, None)
+		if entry is not None:
+			for text_id in entry:
+				self.text_configs[text_id].discard(name)
+		if not keep_order:
+			self.order.pop(name, None)
+		self._last_query = None
+
+	def matching_texts(self, query):
+		"""包含查詢字串的文字編號"""
+		if self._last_query is not None and self._last_query in query:
+			# 延伸上一次的查詢：只需確認上一次的結果
+			candidates = self._last_matches
+		elif len(query) <= GRAM_SIZE:
+			candidates = self.grams.get(query, ())
+		else:
+			postings = []
+			for i in range(len(query) - GRAM_SIZE + 1):
+				posting = self.grams.get(query[i:i + GRAM_SIZE])
+				if not posting:
+					return []
+				postings.append(posting)
+			candidates = set.intersection(*sorted(postings, key=len))
+
+		matches = [text_id for text_id in candidates if query in self.texts[text_id]]
+		self._last_query = query
+		self._last_matches = matches
+		return matches
+
+	def search(self, query):
+		"""回傳符合的配置名稱：名稱開頭相同者優先，其次名稱、關鍵字、元素，同等級依原始順序"""
+		query = query.strip().lower()
+		if not query:
+			return sorted(self.configs, key=self.order.get)
+
+		ranks = {}
+		for text_id in self.matching_texts(query):
+			text = self.texts[text_id]
+			for name in self.text_configs[text_id]:
+				rank = self.configs[name][text_id]
+				if rank == RANK_NAME and text.startswith(query):
+					rank = RANK_NAME_PREFIX
+				if rank < ranks.get(name, RANK_ELEMENT + 1):
+					ranks[name] = rank
+		return sorted(ranks, key=lambda name: (ranks[name], self.order[name]))
+
+
+class VirtualListbox:
+	"""虛擬化的列表：Listbox只保留可見的行，捲動時更新內容"""
+
+	def __init__(self, listbox, scrollbar):
+		self.listbox = listbox
+		self.scrollbar = scrollbar
+		self.items = []
+		self.offset = 0
+		self.page_size = int(str(listbox.cget('height')))
+		self.current = None  # 選取的項目索引
+
+		self.scrollbar.configure(command=self.yview)
+		self.listbox.configure(yscrollcommand='')
+		self.listbox.bind('<MouseWheel>', self.on_mousewheel)
+		self.listbox.bind('<Button-4>', lambda e: self.scroll(-3))
+		self.listbox.bind('<Button-5>', lambda e: self.scroll(3))
+		self.listbox.bind('<<ListboxSelect>>', self.on_select)
+
+	def set_items(self, items, current=None):
+		"""更換列表內容，current為要選取的項目值"""
+		self.items = items
+		self.offset = 0
+		self.current = None
+		if current is not None:
+			try:
+				self.current = items.index(current)
+			except ValueError:
+				pass
+		if self.current is None and items:
+			self.current = 0
+		self.show(self.current or 0)
+
+	def selected_item(self):
+		if self.current is None or self.current >= len(self.items):
+			return None
+		return self.items[self.current]
+
+	def item_at(self, y):
+		"""滑鼠位置對應的項目值"""
+		k = self.listbox.nearest(y)
+		if 0 <= k < self.listbox.size():
+			return self.items[self.offset + k]
+		return None
+
+	def on_select(self, event):
+		selection = self.listbox.curselection()
+		if selection:
+			self.current = self.offset + selection[0]
+
+	def on_mousewheel(self, event):
+		self.scroll(-3 if event.delta > 0 else 3)
+		return "break"
+
+	def move(self, amount):
+		"""鍵盤上下移動選取"""
+		if not self.items:
+			return
+		self.current = max(0, min((self.current or 0) + amount, len(self.items) - 1))
+		self.show(self.current)
+
+	def show(self, index):
+		"""捲動到讓項目可見"""
+		if index < self.offset:
+			self.set_offset(index, force=True)
+		elif index >= self.offset + self.page_size:
+			self.set_offset(index - self.page_size + 1, force=True)
+		else:
+			self.render()
+
+	def yview(self, *args):
+		"""捲軸命令（moveto / scroll）"""
+		if not args:
+			return
+		if args[0] == 'moveto':
+			self.set_offset(int(float(args[1]) * len(self.items)))
+		elif args[0] == 'scroll':
+			amount = int(args[1])
+			if args[2] == 'pages':
+				amount *= self.page_size
+			self.scroll(amount)
+
+	def scroll(self, amount):
+		self.set_offset(self.offset + amount)
+
+	def set_offset(self, offset, force=False):
+		offset = max(0, min(offset, len(self.items) - self.page_size))
+		if offset != self.offset or force:
+			self.offset = offset
+			self.render()
+
+	def render(self):
+		"""只插入可見範圍的項目"""
+		self.listbox.delete(0, tk.END)
+		visible = self.items[self.offset:self.offset + self.page_size]
+		if visible:
+			self.listbox.insert(tk.END, *visible)
+		if self.current is not None and self.offset <= self.current < self.offset + len(visible):
+			k = self.current - self.offset
+			self.listbox.selection_set(k)
+			self.listbox.activate(k)
+
+		total = len(self.items)
+		if total == 0:
+			self.scrollbar.set(0.0, 1.0)
+		else:
+			self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.page_size) / total))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置儲存
+以SQLite保存寫入配置：每個配置獨立更新（交易內完成，中途失敗不影響其他配置），
+名稱有索引，啟動時只讀取名稱列表；舊的 field_mappings.json 第一次開啟時自動匯入
+
+用法:
+	python main.py config import field_mappings.json [--replace]
+	python main.py config export field_mappings.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+from engine import FIELD_MAPPING_DIR, FIELD_MAPPING_PATH, load_field_mappings
+
+
+CONFIG_DB_PATH = os.path.join(FIELD_MAPPING_DIR, "field_mappings.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	name TEXT NOT NULL UNIQUE,
+	data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+	key TEXT PRIMARY KEY,
+	value TEXT NOT NULL
+);
+"""
+
+# meta：舊JSON配置是否已匯入（與匯入的配置在同一個交易中寫入）
+META_IMPORTED_LEGACY = 'imported_legacy'
+
+UPSERT_CONFIG = ("INSERT INTO configs (name, data) VALUES (?, ?) "
+				 "ON CONFLICT(name) DO UPDATE SET data = excluded.data")
+
+
+class ConfigStore:
+	"""SQLite配置庫（名稱依建立順序排列，更新配置不改變順序）"""
+
+	def __init__(self, path=CONFIG_DB_PATH, legacy_json_path=FIELD_MAPPING_PATH):
+		self.path = path
+		self.conn = sqlite3.connect(path)
+		# WAL：寫入中斷時資料庫保持在上一次提交的狀態
+		self.conn.execute("PRAGMA journal_mode=WAL")
+		self.conn.execute("PRAGMA synchronous=NORMAL")
+		with self.conn:
+			self.conn.executescript(SCHEMA)
+
+		# 以meta記錄是否已匯入，匯入失敗或中斷時下次啟動重新匯入
+		if legacy_json_path and self.get_meta(META_IMPORTED_LEGACY) is None:
+			self.import_legacy_json(legacy_json_path)
+
+	def close(self):
+		self.conn.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def names(self):
+		"""所有配置名稱（不讀取配置內容）"""
+		return [row[0] for row in self.conn.execute("SELECT name FROM configs ORDER BY id")]
+
+	def get(self, name, default=None):
+		"""讀取單一配置，不存在時回傳default"""
+		row = self.conn.execute("SELECT data FROM configs WHERE name = ?", (name,)).fetchone()
+		return json.loads(row[0]) if row else default
+
+	def __contains__(self, name):
+		return self.conn.execute("SELECT 1 FROM configs WHERE name = ?", (name,)).fetchone() is not None
+
+	def __len__(self):
+		return self.conn.execute("SELECT COUNT(*) FROM configs").fetchone()[0]
+
+	def put(self, name, config_data):
+		"""新增或更新單一配置"""
+		data = json.dumps(config_data, ensure_ascii=False)
+		with self.conn:
+			self.conn.execute(UPSERT_CONFIG, (name, data))
+
+	def get_meta(self, key, default=None):
+		row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+		return row[0] if row else default
+
+	def import_legacy_json(self, path):
+		"""第一次開啟時匯入舊的JSON配置，與匯入完成的標記在同一個交易中寫入，回傳匯入數量
+
+		沒有標記的既有配置庫（舊版本建立）已有配置時視為已匯入，不再覆蓋
+		"""
+		rows = []
+		if not len(self) and os.path.exists(path):
+			rows = [(name, json.dumps(data, ensure_ascii=False))
+					for name, data in load_field_mappings(path).items()]
+		with self.conn:
+			self.conn.executemany(UPSERT_CONFIG, rows)
+			self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')",
+							  (META_IMPORTED_LEGACY,))
+		return len(rows)
+
+	def delete(self, name):
+		"""刪除單一配置，回傳是否有刪除"""
+		with self.conn:
+			return self.conn.execute("DELETE FROM configs WHERE name = ?", (name,)).rowcount > 0
+
+	def import_json(self, path, replace=False):
+		"""從JSON配置檔匯入（同一個交易），replace=True 時先清除現有配置，回傳匯入數量"""
+		field_mappings = load_field_mappings(path)
+		rows = [(name, json.dumps(data, ensure_ascii=False)) for name, data in field_mappings.items()]
+		with self.conn:
+			if replace:
+				self.conn.execute("DELETE FROM configs")
+			self.conn.executemany(UPSERT_CONFIG, rows)
+		return len(rows)
+
+	def items(self):
+		"""依順序逐一回傳 (名稱, 配置)"""
+		for name, data in self.conn.execute("SELECT name, data FROM configs ORDER BY id"):
+			yield name, json.loads(data)
+
+	def to_dict(self):
+		"""所有配置 {名稱: 配置}"""
+		return dict(self.items())
+
+	def export_json(self, path):
+		"""匯出為JSON配置檔（先寫入暫存檔再取代，中途失敗不會損壞原檔），回傳匯出數量"""
+		field_mappings = self.to_dict()
+		directory = os.path.dirname(os.path.abspath(path))
+		fd, temp_path = tempfile.mkstemp(suffix='.json', dir=directory)
+		try:
+			with os.fdopen(fd, 'w', encoding='utf-8') as f:
+				json.dump(field_mappings, f, ensure_ascii=False, indent=2)
+			os.replace(temp_path, path)
+		except BaseException:
+			os.remove(temp_path)
+			raise
+		return len(field_mappings)
+
+
+def open_config_source(path):
+	"""依副檔名開啟配置：.json 整個讀入為dict，其他視為SQLite配置庫（兩者都提供 get）"""
+	if path.lower().endswith('.json'):
+		return load_field_mappings(path)
+	return ConfigStore(path)
+
+
+def build_parser():
+	"""建立命令列參數"""
+	parser = argparse.ArgumentParser(prog="main.py config", description="配置庫匯入/匯出")
+	parser.add_argument("--db", default=CONFIG_DB_PATH, help="配置庫路徑")
+	commands = parser.add_subparsers(dest="command", required=True)
+	import_parser = commands.add_parser("import", help="從JSON配置檔匯入")
+	import_parser.add_argument("json_path")
+	import_parser.add_argument("--replace", action="store_true", help="先清除現有配置")
+	export_parser = commands.add_parser("export", help="匯出為JSON配置檔")
+	export_parser.add_argument("json_path")
+	return parser
+
+
+def main(argv=None):
+	"""配置庫命令入口，回傳結束代碼"""
+	args = build_parser().parse_args(argv)
+	os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+	try:
+		with ConfigStore(args.db, legacy_json_path=None) as store:
+			if args.command == "import":
+				count = store.import_json(args.json_path, replace=args.replace)
+				print(f"已匯入 {count} 個配置，配置庫共 {len(store)} 個")
+			else:
+				count = store.export_json(args.json_path)
+				print(f"已匯出 {count} 個配置到 {args.json_path}")
+	except Exception as e:
+		print(f"{'匯入' if args.command == 'import' else '匯出'}失敗：{e}", file=sys.stderr)
+		return 2
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSV表格
+背景執行緒串流載入CSV，Treeview只建立可見範圍的行，選取以CSV行號記錄
+"""
+
+import queue
+import threading
+from tkinter import ttk
+
+from engine import CsvChunk, CsvModel, iter_csv_chunks
+
+
+# 每批載入的行數
+CSV_CHUNK_SIZE = 5000
+
+# Treeview預設行高（樣式沒有設定時使用）
+DEFAULT_ROW_HEIGHT = 20
+
+
+class CsvStreamLoader:
+	"""在背景執行緒逐批讀取CSV並算好使用值（CsvChunk），界面執行緒只需合併"""
+
+	def __init__(self, path, chunk_size=CSV_CHUNK_SIZE):
+		self.path = path
+		self.chunk_size = chunk_size
+		self.queue = queue.Queue()
+		self.cancelled = False
+		self.finished = False
+		self.thread = threading.Thread(target=self._run, daemon=True)
+
+	def start(self):
+		self.thread.start()
+		return self
+
+	def cancel(self):
+		self.cancelled = True
+
+	def _run(self):
+		try:
+			start = 0
+			for rows in iter_csv_chunks(self.path, self.chunk_size):
+				if self.cancelled:
+					return
+				chunk = CsvChunk(rows, start)
+				start += len(chunk)
+				self.queue.put(('chunk', chunk))
+			self.queue.put(('done', None))
+		except Exception as e:
+			self.queue.put(('error', e))
+
+	def drain(self):
+		"""取出目前所有的訊息 [(種類, 內容)]，種類為 'chunk' / 'done' / 'error'"""
+		messages = []
+		while True:
+			try:
+				message = self.queue.get_nowait()
+			except queue.Empty:
+				break
+			messages.append(message)
+			if message[0] != 'chunk':
+				self.finished = True
+		return messages
+
+
+class VirtualCsvTable:
+	"""虛擬化的CSV表格：Treeview只保留一頁的項目，捲動時更新內容"""
+
+	def __init__(self, tree, scrollbar):
+		self.tree = tree
+		self.scrollbar = scrollbar
+		self.model = CsvModel()
+		self.offset = 0
+		self.page_size = int(str(tree.cget('height')))
+		self.selected = set()  # 已選取的CSV行號
+		self.slots = []  # Treeview項目，第k個顯示第 offset + k 行
+
+		self.scrollbar.configure(command=self.yview)
+		self.tree.configure(yscrollcommand='')
+		self.tree.bind('<Configure>', self.on_resize)
+		self.tree.bind('<MouseWheel>', self.on_mousewheel)
+		self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+		self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+
+	def set_model(self, model):
+		"""更換CSV數據並清除選取"""
+		self.model = model
+		self.offset = 0
+		self.selected = set()
+		self.render()
+
+	def rows_added(self):
+		"""串流載入新增資料後更新顯示"""
+		if len(self.slots) < self.page_size:
+			self.render()
+		else:
+			self.update_scrollbar()
+
+	def row_at(self, item_id):
+		"""Treeview項目對應的CSV行號，沒有時回傳None"""
+		if item_id in self.slots:
+			index = self.offset + self.slots.index(item_id)
+			if index < len(self.model):
+				return index
+		return None
+
+	def on_resize(self, event):
+		row_height = ttk.Style().lookup('Treeview', 'rowheight')
+		try:
+			row_height = int(row_height)
+		except (TypeError, ValueError):
+			row_height = DEFAULT_ROW_HEIGHT
+		page_size = max(1, event.height // row_height)
+		if page_size != self.page_size:
+			self.page_size = page_size
+			self.render()
+
+	def on_mousewheel(self, event):
+		self.scroll(-3 if event.delta > 0 else 3)
+		return "break"
+
+	def yview(self, *args):
+		"""捲軸命令（moveto / scroll）"""
+		total = len(self.model)
+		if not args:
+			return
+		if args[0] == 'moveto':
+			self.set_offset(int(float(args[1]) * total))
+		elif args[0] == 'scroll':
+			amount = int(args[1])
+			if args[2] == 'pages':
+				amount *= self.page_size
+			self.scroll(amount)
+
+	def scroll(self, amount):
+		self.set_offset(self.offset + amount)
+
+	def set_offset(self, offset):
+		offset = max(0, min(offset, len(self.model) - self.page_size))
+		if offset != self.offset:
+			self.offset = offset
+			self.render()
+
+	def render(self):
+		"""只建立可見範圍的項目"""
+		visible = max(0, min(self.page_size, len(self.model) - self.offset))
+
+		# 調整項目數量，之後只更新內容
+		while len(self.slots) > visible:
+			self.tree.delete(self.slots.pop())
+		while len(self.slots) < visible:
+			slot = f"slot{len(self.slots)}"
+			self.tree.insert('', 'end', iid=slot)
+			self.slots.append(slot)
+
+		for k, slot in enumerate(self.slots):
+			self.tree.item(slot, values=self.model.display_row(self.offset + k))
+
+		self.sync_selection()
+		self.update_scrollbar()
+
+	def sync_selection(self):
+		"""將選取的行反映到可見的項目"""
+		items = [slot for k, slot in enumerate(self.slots) if self.offset + k in self.selected]
+		if set(items) != set(self.tree.selection()):
+			self.tree.selection_set(items)
+
+	def update_scrollbar(self):
+		total = len(self.model)
+		if total == 0:
+			self.scrollbar.set(0.0, 1.0)
+			return
+		self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.page_size) / total))
+
+	# 選取
+	def selected_indices(self):
+		"""已選取的CSV行號（依表格順序）"""
+		return sorted(self.selected)
+
+	def toggle(self, index):
+		if index in self.selected:
+			self.selected.discard(index)
+		else:
+			self.selected.add(index)
+		self.sync_selection()
+
+	def set_selection(self, indices):
+		self.selected = set(indices)
+		self.sync_selection()
+
+	def select_all(self):
+		self.set_selection(range(len(self.model)))
+
+	def clear_selection(self):
+		self.set_selection(())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+空格遮罩
+每個工作表快照計算一次每格是否為空，掃描空格區塊時不再逐格轉換文字；
+大型工作表在安裝NumPy時以陣列運算找出垂直區塊，否則使用 bytearray
+"""
+
+from backends import backend_available, load_backend
+from engine import MAX_HORIZONTAL_SCAN_RANGE, MAX_VERTICAL_SCAN_RANGE, is_cell_empty
+
+
+# 儲存格數量達到此值才使用NumPy（小區塊的陣列運算反而較慢）
+NUMPY_MIN_CELLS = 4096
+
+# 垂直區塊先逐行檢查的行數，超過後改用陣列運算（每次加倍）
+LOOP_ROWS = 64
+
+
+def is_empty_value(value):
+	"""與 is_cell_empty 相同，常見型別不需轉為文字"""
+	if value is None:
+		return True
+	cls = value.__class__
+	if cls is str:
+		return not value.strip()
+	if cls is int or cls is float or cls is bool:
+		return False
+	return is_cell_empty(value)
+
+
+class EmptyMask:
+	"""每格是否為空（1 = 空，超出該行長度的位置為0），以行優先存放在 bytearray 中"""
+
+	def __init__(self, data):
+		self.height = len(data)
+		self.lengths = [len(row) for row in data]
+		self.width = max(self.lengths, default=0)
+		width = self.width
+		self.flags = bytearray(self.height * width)
+		for row_idx, row in enumerate(data):
+			start = row_idx * width
+			self.flags[start:start + len(row)] = bytes(is_empty_value(value) for value in row)
+
+		# 大型工作表共用同一塊記憶體建立NumPy陣列
+		self.array = None
+		if self.height * width >= NUMPY_MIN_CELLS and backend_available('numpy'):
+			np = load_backend('numpy')
+			self.array = np.frombuffer(self.flags, dtype=np.bool_).reshape(self.height, width)
+			self.length_array = np.array(self.lengths)
+
+	def is_empty(self, row, col):
+		"""超出範圍或該行長度的位置回傳False"""
+		if row >= self.height or col >= self.lengths[row]:
+			return False
+		return bool(self.flags[row * self.width + col])
+
+	def leading_empty(self, row, col, span):
+		"""從 (row, col) 往右連續為空的格數，及是否因遇到內容而停止"""
+		length = min(self.lengths[row], col + span)
+		start = row * self.width
+		count = 0
+		while col + count < length:
+			if not self.flags[start + col + count]:
+				return count, True
+			count += 1
+		return count, False
+
+	def vertical_block(self, field_row, field_col, span=MAX_HORIZONTAL_SCAN_RANGE):
+		"""目標欄位下方的垂直空格區塊 [(row, col)]（與逐格掃描的規則相同）
+
+		每行從目標欄往右最多 span 格：遇到內容時該行之前的空格仍計入並停止；
+		一行沒有任何空格時停止
+		"""
+		cells = []
+		row = field_row + 1
+		end = min(row + LOOP_ROWS, self.height)
+		while row < end:
+			count, has_content = self.leading_empty(row, field_col, span)
+			cells.extend((row, field_col + c) for c in range(count))
+			if has_content or count == 0:
+				return cells
+			row += 1
+
+		if self.array is None:
+			while row < self.height:
+				count, has_content = self.leading_empty(row, field_col, span)
+				cells.extend((row, field_col + c) for c in range(count))
+				if has_content or count == 0:
+					break
+				row += 1
+			return cells
+
+		# 長區塊：每次檢查加倍的行數
+		np = load_backend('numpy')
+		right = min(field_col + span, self.width)
+		width = right - field_col
+		if width <= 0:
+			return cells
+		offsets = np.arange(width)
+		chunk = LOOP_ROWS
+		while row < self.height:
+			bottom = min(row + chunk, self.height)
+			available = np.clip(self.length_array[row:bottom] - field_col, 0, width)
+			ok = self.array[row:bottom, field_col:right] & (offsets < available[:, None])
+			# 每行開頭連續為空的格數
+			counts = np.where(ok.all(axis=1), width, ok.argmin(axis=1))
+			stops = (counts < available) | (counts == 0)
+			last = int(stops.argmax()) if stops.any() else len(counts) - 1
+			# 依行優先順序取出各行開頭的空格位置
+			rows, cols = np.nonzero(offsets < counts[:last + 1, None])
+			cells.extend(zip((rows + row).tolist(), (cols + field_col).tolist()))
+			if stops.any():
+				break
+			row = bottom
+			chunk *= 2
+		return cells
+
+	def horizontal_cells(self, field_row, field_col, span=MAX_VERTICAL_SCAN_RANGE):
+		"""目標欄位下一行、往右 span - 1 格內的空格 [(row, col)]"""
+		row = field_row + 1
+		return [(row, col) for col in range(field_col + 1, field_col + span) if self.is_empty(row, col)]
@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SHT Excel 寫入核心
+不依賴界面的CSV模型、工作表模型、欄位定位與寫入
+"""
+
+import csv
+import json
+import os
+import sys
+from array import array
+from functools import lru_cache
+from itertools import accumulate
+
+from keyword_index import KeywordIndex
+from keyword_matcher import matcher_for_configs
+
+
+FIELD_MAPPING_DIR = os.path.expanduser("~/documents/field_mappings")
+FIELD_MAPPING_PATH = os.path.join(FIELD_MAPPING_DIR, "field_mappings.json")
+
+# 掃描範圍常量
+MAX_HORIZONTAL_SCAN_RANGE = 4
+MAX_VERTICAL_SCAN_RANGE = 8
+
+# CSV中使用的欄位
+CSV_COLUMNS = ('Element', 'Dev', 'Actual')
+
+
+class MappingError(Exception):
+	"""寫入流程錯誤（訊息可直接顯示給使用者）"""
+
+
+def is_cell_empty(cell_value):
+	"""檢查儲存格是否為空"""
+	return cell_value is None or str(cell_value).strip() == ''
+
+
+def get_display_value(value):
+	"""獲取顯示用的值"""
+	return str(value) if value and str(value).strip() else '-'
+
+
+@lru_cache(maxsize=1024)
+def get_excel_column_name(col_index):
+	"""將數字索引轉換為Excel列名（A, B, ..., Z, AA, AB, ...）"""
+	column_name = ""
+	while col_index >= 0:
+		column_name = chr(65 + (col_index % 26)) + column_name
+		col_index = col_index // 26 - 1
+	return column_name
+
+
+def make_cell_info(row, col, value=None):
+	"""建立空格資訊（0-based 行列）"""
+	return {
+		'position': f"{get_excel_column_name(col)}{row + 1}",
+		'row': row,
+		'col': col,
+		'value': value
+	}
+
+
+# 使用值來源
+SOURCE_NONE = 0
+SOURCE_DEV = 1
+SOURCE_ACTUAL = 2
+
+
+def resolve_use_source(dev, actual):
+	"""決定使用哪個值（Dev優先，沒有則用Actual），回傳 (來源, 文字)"""
+	if dev and str(dev).strip() and str(dev).strip().lower() != 'n/a':
+		return SOURCE_DEV, str(dev).strip()
+	if actual and str(actual).strip() and str(actual).strip().lower() != 'n/a':
+		return SOURCE_ACTUAL, str(actual).strip()
+	return SOURCE_NONE, ""
+
+
+def resolve_use_value(dev, actual):
+	"""決定使用哪個值，沒有可用值時回傳空字串"""
+	return resolve_use_source(dev, actual)[1]
+
+
+def to_excel_value(use_value):
+	"""轉換數值，無法轉換時保留文字"""
+	try:
+		return float(use_value)
+	except ValueError:
+		return use_value
+
+
+def values_to_rows(values):
+	"""將COM的Range.Value轉為列表（單一儲存格時為純量）"""
+	if isinstance(values, tuple):
+		return [list(row) if isinstance(row, tuple) else [row] for row in values]
+	return [[values]]
+
+
+def iter_csv_chunks(path, chunk_size=5000):
+	"""逐批讀取CSV，每批為 [(Element, Dev, Actual)]（缺少的欄位為None）"""
+	with open(path, 'r', encoding='utf-8', newline='') as f:
+		reader = csv.reader(f)
+		header = next(reader, None)
+		if header is None:
+			return
+
+		# 與DictReader相同，重複的欄位名稱以最後一個為準
+		columns = {name: i for i, name in enumerate(header)}
+		positions = [columns.get(name) for name in CSV_COLUMNS]
+
+		chunk = []
+		for record in reader:
+			if not record:
+				continue
+			size = len(record)
+			chunk.append(tuple(record[p] if p is not None and p < size else None for p in positions))
+			if len(chunk) >= chunk_size:
+				yield chunk
+				chunk = []
+		if chunk:
+			yield chunk
+
+
+class CsvChunk:
+	"""一批CSV行的欄式數據（使用值、數字、Element索引），不共用任何狀態，可在背景執行緒中建立"""
+
+	def __init__(self, rows, start=0):
+		"""rows: [(Element, Dev, Actual)]，start: 第一行在整個CSV中的行號"""
+		self.start = start
+		self.elements = []
+		self.text = b''
+		self.text_ends = array('Q')
+		self.sources = bytearray()
+		self.is_number = bytearray()
+		self.numbers = array('d')
+		self.element_rows = {}
+
+		elements = self.elements
+		element_rows = self.element_rows
+		texts = []
+		sources = []
+		is_number = []
+		numbers = []
+
+		for i, (element, dev, actual) in enumerate(rows, start):
+			if element is not None:
+				element = sys.intern(element)
+			elements.append(element)
+
+			texts.append(dev or '')
+			texts.append(actual or '')
+
+			name = element or ''
+			indices = element_rows.get(name)
+			if indices is None:
+				element_rows[name] = [i]
+			else:
+				indices.append(i)
+
+			source, use_value = resolve_use_source(dev, actual)
+			sources.append(source)
+			value = to_excel_value(use_value) if source else None
+			if isinstance(value, float):
+				is_number.append(1)
+				numbers.append(value)
+			else:
+				is_number.append(0)
+				numbers.append(0.0)
+
+		text = ''.join(texts)
+		self.text = text.encode('utf-8')
+		if len(self.text) != len(text):
+			# 含非ASCII字元時以編碼後的長度計算位置
+			texts = [piece.encode('utf-8') for piece in texts]
+		self.text_ends.extend(accumulate(map(len, texts)))
+		self.sources.extend(sources)
+		self.is_number.extend(is_number)
+		self.numbers.extend(numbers)
+
+	def __len__(self):
+		return len(self.elements)
+
+
+class CsvModel:
+	"""CSV數據（欄式存放：Element名稱、Dev/Actual原始文字，及載入時算好的使用值）
+
+	原始文字以UTF-8相接存放在同一個 bytearray，只有顯示或寫入文字時才轉為字串
+	"""
+
+	def __init__(self, rows=None, path=None):
+		self.path = path
+		self.elements = []  # Element名稱（相同名稱共用同一字串），沒有時為None
+		self.text = bytearray()  # 每行的Dev、Actual原始文字依序相接（UTF-8）
+		self.text_ends = array('Q')  # 每行兩個結束位置（Dev、Actual）
+		self.sources = bytearray()  # 使用值來源（SOURCE_*），SOURCE_NONE 表示沒有可用值
+		self.is_number = bytearray()  # 使用值可轉為數字時為1
+		self.numbers = array('d')  # 使用值的數字（非數字為0）
+		self.element_rows = {}  # Element名稱 -> 依序出現的行號
+		self.extend(rows or [])
+
+	@classmethod
+	def from_path(cls, path):
+		"""從檔案載入CSV"""
+		model = cls(path=path)
+		for chunk in iter_csv_chunks(path):
+			model.extend(chunk)
+		return model
+
+	def __len__(self):
+		return len(self.elements)
+
+	def extend(self, rows):
+		"""加入一批 (Element, Dev, Actual)（串流載入），同時算好使用值與Element索引"""
+		self.merge(CsvChunk(rows, len(self.elements)))
+
+	def merge(self, chunk):
+		"""加入已在背景執行緒算好的一批（chunk.start 必須等於目前的行數）"""
+		if chunk.start != len(self.elements):
+			raise ValueError(f"CSV批次順序錯誤: {chunk.start} != {len(self.elements)}")
+		self.elements.extend(chunk.elements)
+		# 批次內的結束位置加上目前文字的長度
+		self.text_ends.extend(map(len(self.text).__add__, chunk.text_ends))
+		self.text.extend(chunk.text)
+		self.sources.extend(chunk.sources)
+		self.is_number.extend(chunk.is_number)
+		self.numbers.extend(chunk.numbers)
+
+		element_rows = self.element_rows
+		for name, indices in chunk.element_rows.items():
+			existing = element_rows.get(name)
+			if existing is None:
+				element_rows[name] = indices
+			else:
+				existing.extend(indices)
+
+	def element(self, index):
+		"""取得Element名稱"""
+		return self.elements[index] or ''
+
+	def raw_values(self, index):
+		"""取得原始的 (Dev, Actual) 文字（CSV中沒有值時為空字串）"""
+		ends = self.text_ends
+		start = ends[2 * index - 1] if index else 0
+		middle = ends[2 * index]
+		text = self.text
+		return text[start:middle].decode('utf-8'), text[middle:ends[2 * index + 1]].decode('utf-8')
+
+	def use_value(self, index):
+		"""取得使用值的文字（沒有可用值時為空字串）"""
+		source = self.sources[index]
+		if source == SOURCE_NONE:
+			return ""
+		dev, actual = self.raw_values(index)
+		return (dev if source == SOURCE_DEV else actual).strip()
+
+	def write_value(self, index):
+		"""取得寫入Excel的值（數字或文字），沒有可用值時回傳None"""
+		if not self.sources[index]:
+			return None
+		if self.is_number[index]:
+			return self.numbers[index]
+		return self.use_value(index)
+
+	def display_row(self, index):
+		"""取得表格顯示用的一行 (Element, Dev, Actual, 使用值)"""
+		element = self.elements[index]
+		dev, actual = self.raw_values(index)
+		use_value = self.use_value(index)
+		return (element if element is not None else f'行{index+1}',
+				get_display_value(dev),
+				get_display_value(actual),
+				use_value if use_value else '-')
+
+	def elements_at(self, indices):
+		"""行號轉為Element名稱（find_rows 的反向，用於保存配置）"""
+		return [self.element(i) for i in indices if i < len(self.elements)]
+
+	def find_rows(self, elements):
+		"""根據Element名稱找出對應的行（依表格順序）
+
+		同名Element出現多次時，配置中第n次出現對應CSV中第n個同名的行
+		"""
+		found = set()
+		seen = {}
+		for config_element_name in elements:
+			indices = self.element_rows.get(config_element_name)
+			if not indices:
+				continue
+			occurrence = seen.get(config_element_name, 0)
+			seen[config_element_name] = occurrence + 1
+			if occurrence < len(indices):
+				found.add(indices[occurrence])
+		return sorted(found)
+
+
+class SheetModel:
+	"""工作表數據快照（0-based 的列表）"""
+
+	def __init__(self, data=None, name=''):
+		self.data = data if data is not None else []
+		self.name = name
+		self.formulas = {}  # (row, col) -> 公式（只有直接解析xlsx時才有）
+		self._index = None
+		self._empty_mask = None
+
+	@classmethod
+	def from_com_worksheet(cls, worksheet):
+		"""從COM接口讀取UsedRange"""
+		used_range = worksheet.UsedRange
+		data = values_to_rows(used_range.Value)
+
+		# UsedRange不一定從A1開始，補齊前方空白，使行列索引與工作表位置一致
+		top = used_range.Row - 1
+		left = used_range.Column - 1
+		if left > 0:
+			data = [[None] * left + row for row in data]
+		if top > 0:
+			data = [[] for _ in range(top)] + data
+		return cls(data, worksheet.Name)
+
+	@classmethod
+	def from_openpyxl_sheet(cls, sheet):
+		"""從openpyxl讀取"""
+		data = [list(row) for row in sheet.iter_rows(values_only=True)]
+		return cls(data, sheet.title)
+
+	def __len__(self):
+		return len(self.data)
+
+	@property
+	def index(self):
+		"""關鍵字索引（每個快照只建立一次）"""
+		if self._index is None:
+			self._index = KeywordIndex(self.data)
+		return self._index
+
+	@property
+	def empty_mask(self):
+		"""空格遮罩（每個快照只計算一次）"""
+		if self._empty_mask is None:
+			from empty_mask import EmptyMask
+			self._empty_mask = EmptyMask(self.data)
+		return self._empty_mask
+
+	def invalidate_index(self):
+		"""數據被修改後丟棄索引與空格遮罩"""
+		self._index = None
+		self._empty_mask = None
+
+
+class FieldLocator:
+	"""在工作表中定位目標欄位並獲取空格位置"""
+
+	def __init__(self, sheet_model, index=None):
+		"""index: 查詢關鍵字的索引（預設為工作表快照的 KeywordIndex）"""
+		self.sheet = sheet_model
+		self._index = index
+
+	@property
+	def index(self):
+		return self._index or self.sheet.index
+
+	def find_field_position(self, field_name):
+		"""尋找欄位位置（依行優先順序的第一個）"""
+		return self.index.find_first(field_name)
+
+	def find_second_keyword_in_column(self, first_row, col_idx, second_keyword):
+		"""在同一欄中往下尋找目標欄位"""
+		# 從定位列的下一行開始往下找
+		return self.index.find_in_column(col_idx, first_row, second_keyword)
+
+	def cells_at(self, positions):
+		"""[(row, col)] 轉為空格資訊"""
+		data = self.sheet.data
+		names = {}
+		cells = []
+		for row, col in positions:
+			name = names.get(col)
+			if name is None:
+				name = names[col] = get_excel_column_name(col)
+			cells.append({'position': f"{name}{row + 1}", 'row': row, 'col': col, 'value': data[row][col]})
+		return cells
+
+	def scan_vertical_empty_cells(self, field_row, field_col):
+		"""垂直獲取空格位置（每行往右最多 MAX_HORIZONTAL_SCAN_RANGE 格，遇到內容或整行沒有空格時停止）"""
+		return self.cells_at(self.sheet.empty_mask.vertical_block(field_row, field_col))
+
+	def scan_horizontal_empty_cells(self, field_row, field_col):
+		"""水平獲取空格位置"""
+		return self.cells_at(self.sheet.empty_mask.horizontal_cells(field_row, field_col))
+
+	def locate_field(self, first_keyword, second_keyword):
+		"""定位目標欄位（支援兩段定位），找不到時拋出MappingError"""
+		if first_keyword:
+			# 1. 先找定位列
+			first_position = self.find_field_position(first_keyword)
+			if not first_position:
+				raise MappingError(f"找不到定位列: {first_keyword}")
+
+			first_row, first_col = first_position
+
+			# 2. 在同一列往下找目標欄位
+			second_row = self.find_second_keyword_in_column(first_row, first_col, second_keyword)
+			if second_row is None:
+				raise MappingError(
+					f"在定位列 '{first_keyword}' 的同一欄中\n往下找不到目標欄位: {second_keyword}")
+			return (second_row, first_col)
+
+		# 沒有定位列，直接找目標欄位
+		field_position = self.find_field_position(second_keyword)
+		if not field_position:
+			raise MappingError(f"找不到目標欄位: {second_keyword}")
+		return field_position
+
+	def scan_empty_cells(self, field_row, field_col):
+		"""在目標欄位下方獲取空格位置（先垂直後水平）"""
+		empty_cells = self.scan_vertical_empty_cells(field_row, field_col)
+		if not empty_cells:
+			empty_cells = self.scan_horizontal_empty_cells(field_row, field_col)
+		return empty_cells
+
+	def locate(self, first_keyword, second_keyword):
+		"""定位目標欄位並回傳空格位置"""
+		field_row, field_col = self.locate_field(first_keyword, second_keyword)
+		return self.scan_empty_cells(field_row, field_col)
+
+
+def build_write_plan(csv_model, row_indices, empty_cells):
+	"""依序配對CSV行與空格，回傳 [(row, col, value)]（0-based，略過沒有可用值的行）"""
+	plan = []
+	for i, row_index in enumerate(row_indices):
+		value = csv_model.write_value(row_index)
+		if value is not None:
+			empty_cell = empty_cells[i]
+			plan.append((empty_cell['row'], empty_cell['col'], value))
+	return plan
+
+
+def group_write_blocks(plan):
+	"""將 [(row, col, value)] 合併為矩形區塊 [(top, left, bottom, right, rows)]（0-based，含邊界）"""
+	cells = {}
+	for row, col, value in plan:
+		cells[(row, col)] = value
+
+	# 1. 每一行找出連續的欄位區段
+	row_runs = {}
+	for row, col in sorted(cells):
+		runs = row_runs.setdefault(row, [])
+		if runs and runs[-1][1] == col - 1:
+			runs[-1][1] = col
+		else:
+			runs.append([col, col])
+
+	# 2. 相鄰行中欄位區段相同者向下合併
+	blocks = []
+	open_blocks = {}  # (left, right) -> block
+	for row in sorted(row_runs):
+		next_open = {}
+		for left, right in row_runs[row]:
+			block = open_blocks.get((left, right))
+			if block and block[2] == row - 1:
+				block[2] = row
+			else:
+				block = [row, left, row, right]
+				blocks.append(block)
+			next_open[(left, right)] = block
+		open_blocks = next_open
+
+	return [(top, left, bottom, right,
+			 [[cells[(r, c)] for c in range(left, right + 1)] for r in range(top, bottom + 1)])
+			for top, left, bottom, right in blocks]
+
+
+class ComSheetWriter:
+	"""透過COM寫入Excel（連續的儲存格以區塊一次寫入）"""
+
+	def __init__(self, worksheet, workbook=None):
+		self.worksheet = worksheet
+		self.workbook = workbook
+		self.stats = {'cells': 0, 'calls': 0, 'saved': 0}
+
+	def write_cells(self, plan, progress=None):
+		"""寫入 [(row, col, value)]，回傳填入數量
+
+		progress: 每寫入一個區塊呼叫 progress(已寫入數量, 總數)
+		"""
+		calls = 0
+		written = 0
+		for top, left, bottom, right, rows in group_write_blocks(plan):
+			if top == bottom and left == right:
+				# 零散的單一儲存格
+				self.worksheet.Cells(top + 1, left + 1).Value = rows[0][0]
+			else:
+				address = (f"{get_excel_column_name(left)}{top + 1}:"
+						   f"{get_excel_column_name(right)}{bottom + 1}")
+				self.worksheet.Range(address).Value = tuple(tuple(r) for r in rows)
+			calls += 1
+			if progress:
+				written += (bottom - top + 1) * (right - left + 1)
+				progress(written, len(plan))
+
+		# 每個儲存格原本需要一次跨程序呼叫
+		self.stats = {'cells': len(plan), 'calls': calls, 'saved': len(plan) - calls}
+		return len(plan)
+
+	def save(self):
+		"""儲存工作簿"""
+		if self.workbook:
+			self.workbook.Save()
+
+
+class OpenpyxlSheetWriter:
+	"""透過openpyxl寫入檔案"""
+
+	def __init__(self, sheet, workbook, path=None):
+		self.sheet = sheet
+		self.workbook = workbook
+		self.path = path
+
+	def write_cells(self, plan):
+		"""寫入 [(row, col, value)]，回傳填入數量"""
+		for row, col, value in plan:
+			# cell(value=None) 不會清除舊值，直接指定
+			self.sheet.cell(row=row + 1, column=col + 1).value = value
+		return len(plan)
+
+	def save(self, path=None):
+		"""儲存工作簿（預設覆寫原檔案）"""
+		save_path = path or self.path or getattr(self.workbook, 'filename', None)
+		if not save_path:
+			raise MappingError("沒有可儲存的檔案路徑")
+		self.workbook.save(save_path)
+
+
+def load_field_mappings(path=FIELD_MAPPING_PATH):
+	"""讀取保存的配置"""
+	if not os.path.exists(path):
+		return {}
+	with open(path, 'r', encoding='utf-8') as f:
+		return json.load(f)
+
+
+def save_field_mappings(field_mappings, path=FIELD_MAPPING_PATH):
+	"""保存所有配置"""
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump(field_mappings, f, ensure_ascii=False, indent=2)
+
+
+def config_keywords(config_data):
+	"""取得配置的 (定位列, 目標欄位)"""
+	second_keyword = (config_data.get('field_name') or '').strip()
+	if not second_keyword:
+		raise MappingError("配置缺少目標欄位信息，無法使用")
+	first_keyword = (config_data.get('first_keyword') or '').strip()
+	return first_keyword, second_keyword
+
+
+def plan_config(config_data, csv_model, empty_cells):
+	"""依配置選取CSV元素並與空格配對，回傳寫入計畫"""
+	if not empty_cells:
+		second_keyword = (config_data.get('field_name') or '').strip()
+		raise MappingError(f"在目標欄位 '{second_keyword}' 下方沒有找到空白位置")
+
+	row_indices = csv_model.find_rows(config_data.get('selected_elements', []))
+	if len(row_indices) != len(empty_cells):
+		raise MappingError(
+			f"數量必須完全匹配！CSV元素: {len(row_indices)} 個，空格位置: {len(empty_cells)} 個")
+
+	return build_write_plan(csv_model, row_indices, empty_cells)
+
+
+def plan_config_set(configs, csv_model, sheet_model):
+	"""多個配置共用同一個工作表快照，合併為一個寫入計畫
+
+	所有配置的關鍵字以同一個自動機走訪工作表一次即全部定位
+	configs: [(配置名稱, 配置)]
+	任一配置無法套用（找不到欄位、數量不符、與其他配置的空格重疊）時拋出MappingError並列出全部原因，
+	不產生部分的計畫；成功時回傳 (寫入計畫, {配置名稱: 填入數量})
+	"""
+	locator = FieldLocator(sheet_model, matcher_for_configs(configs).scan(sheet_model.data))
+	plan = []
+	counts = {}
+	owners = {}  # (row, col) -> 配置名稱
+	errors = []
+	for name, config_data in configs:
+		try:
+			first_keyword, second_keyword = config_keywords(config_data)
+			empty_cells = locator.locate(first_keyword, second_keyword)
+			config_plan = plan_config(config_data, csv_model, empty_cells)
+		except MappingError as e:
+			errors.append(f"{name}: {e}")
+			continue
+
+		overlap = next((owners[(row, col)] for row, col, _ in config_plan if (row, col) in owners), None)
+		if overlap:
+			errors.append(f"{name}: 空格位置與配置 '{overlap}' 重疊")
+			continue
+		for row, col, _ in config_plan:
+			owners[(row, col)] = name
+		plan.extend(config_plan)
+		counts[name] = len(config_plan)
+
+	if errors:
+		raise MappingError("以下配置無法套用：\n" + "\n".join(errors))
+	return plan, counts
+
+
+def apply_config(config_data, csv_model, sheet_model, writer):
+	"""套用配置：定位空格、選取CSV元素並寫入，回傳填入數量"""
+	first_keyword, second_keyword = config_keywords(config_data)
+	empty_cells = FieldLocator(sheet_model).locate(first_keyword, second_keyword)
+	plan = plan_config(config_data, csv_model, empty_cells)
+	return writer.write_cells(plan)
+
+
+def run_mapping(config_data, csv_path, xlsx_path, sheet_name=None, output_path=None):
+	"""以配置將一個CSV寫入一個Excel檔案並儲存，回傳填入數量"""
+	from sheet_backend import open_file_backend
+	from tracing import span
+
+	with span('csv_load') as csv_span:
+		csv_model = CsvModel.from_path(csv_path)
+		csv_span.set(rows=len(csv_model))
+
+	# 先逐行定位，找到空格區塊即停止；定位或配對失敗時不需載入整個工作簿
+	first_keyword, second_keyword = config_keywords(config_data)
+	with open_file_backend(xlsx_path, sheet_name) as backend:
+		empty_cells = backend.find(first_keyword, second_keyword)
+		plan = plan_config(config_data, csv_model, empty_cells)
+
+		# 只有要寫入的儲存格交給寫入器，就地修補工作表XML
+		with span('write', backend=backend.name, cells=len(plan)):
+			filled_count = backend.write_cells(plan)
+		with span('save', backend=backend.name) as save_span:
+			save_span.set(method=backend.save(output_path))
+	return filled_count
+
+
+def run_mapping_set(configs, csv_path, xlsx_path, sheet_name=None, output_path=None):
+	"""以多個配置將一個CSV寫入同一個Excel檔案：工作表只載入一次，所有配置一起寫入後只儲存一次
+
+	configs: [(配置名稱, 配置)]，回傳 {配置名稱: 填入數量}
+	"""
+	from sheet_backend import open_file_backend
+	from tracing import span
+
+	with span('csv_load') as csv_span:
+		csv_model = CsvModel.from_path(csv_path)
+		csv_span.set(rows=len(csv_model))
+
+	with open_file_backend(xlsx_path, sheet_name) as backend:
+		with span('sheet_load', backend=backend.name) as load_span:
+			sheet_model = backend.read_all()
+			load_span.set(rows=len(sheet_model))
+		with span('locate_config_set', backend=backend.name, configs=len(configs)):
+			plan, counts = plan_config_set(configs, csv_model, sheet_model)
+
+		with span('write', backend=backend.name, cells=len(plan)):
+			backend.write_cells(plan)
+		with span('save', backend=backend.name) as save_span:
+			save_span.set(method=backend.save(output_path))
+	return counts
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excel連接管理
+快取Application物件，以輕量的存活檢查取代每次重新取得；Excel未開啟時以指數退避重試，
+工作簿/工作表切換由事件通知，不需每次讀取名稱
+"""
+
+import time
+
+from backends import load_backend
+
+
+# Excel忙碌（編輯儲存格、重新計算）時的COM錯誤
+RPC_E_CALL_REJECTED = -2147418111
+RPC_E_SERVERCALL_RETRYLATER = -2147417846
+BUSY_HRESULTS = (RPC_E_CALL_REJECTED, RPC_E_SERVERCALL_RETRYLATER)
+
+# 連接狀態
+STATE_ABSENT = 'absent'
+STATE_NO_WORKBOOK = 'no_workbook'
+STATE_CONNECTED = 'connected'
+
+
+def get_active_excel():
+	"""取得執行中的Excel（預設的提供者）"""
+	return load_backend('com').GetActiveObject("Excel.Application")
+
+
+def is_busy_error(error):
+	"""是否為Excel忙碌造成的錯誤（連接仍然有效）"""
+	hresult = getattr(error, 'hresult', None)
+	if hresult is None and getattr(error, 'args', None):
+		hresult = error.args[0]
+	return hresult in BUSY_HRESULTS
+
+
+class ExcelSwitchEvents:
+	"""Excel.Application事件：工作簿或工作表切換時通知連接管理"""
+
+	connection = None
+
+	def _notify(self, *args):
+		if self.connection is not None:
+			self.connection.switch_pending = True
+
+	OnWorkbookActivate = _notify
+	OnWorkbookDeactivate = _notify
+	OnWorkbookOpen = _notify
+	OnNewWorkbook = _notify
+	OnWorkbookBeforeClose = _notify
+	OnSheetActivate = _notify
+
+
+class ExcelConnection:
+	"""Excel連接管理"""
+
+	def __init__(self, provider=None, clock=None, interval=3.0, max_backoff=30.0,
+				 attach_events=None, refresh_every=10):
+		"""
+		provider: 回傳Excel.Application的函式，Excel未開啟時拋出例外
+		clock: 回傳秒數的函式（預設 time.monotonic）
+		attach_events: 掛上切換事件的函式 (app, connection) -> 事件物件，失敗回傳None
+		refresh_every: 沒有事件時仍每隔幾次檢查重新讀取名稱，避免漏掉切換
+		"""
+		self.provider = provider or get_active_excel
+		self.clock = clock or time.monotonic
+		self.interval = interval
+		self.max_backoff = max_backoff
+		self.attach_events = attach_events if attach_events is not None else attach_switch_events
+		self.refresh_every = refresh_every
+
+		self.state = STATE_ABSENT
+		self.app = None
+		self.workbook = None
+		self.worksheet = None
+		self.identity = None  # (工作簿名稱, 工作表名稱)
+		self.events = None
+		self.switch_pending = True
+
+		self.backoff = interval
+		self.next_attempt = 0.0
+		self.polls_since_refresh = 0
+
+		self.stats = {
+			'probes': 0,
+			'probe_seconds': 0.0,
+			'probe_max_seconds': 0.0,
+			'attach_attempts': 0,
+			'attach_failures': 0,
+			'identity_reads': 0,
+		}
+
+	@property
+	def workbook_name(self):
+		return self.identity[0] if self.identity else None
+
+	def _timed(self, func):
+		"""執行一次COM呼叫並記錄耗時"""
+		start = self.clock()
+		try:
+			return func()
+		finally:
+			elapsed = self.clock() - start
+			self.stats['probes'] += 1
+			self.stats['probe_seconds'] += elapsed
+			self.stats['probe_max_seconds'] = max(self.stats['probe_max_seconds'], elapsed)
+
+	def next_delay(self):
+		"""距離下一次檢查的秒數"""
+		if self.app is not None:
+			return self.interval
+		return max(self.next_attempt - self.clock(), 0.1)
+
+	def connect(self):
+		"""立即嘗試取得Excel（忽略退避），回傳狀態變化"""
+		self.next_attempt = 0.0
+		return self.poll()
+
+	def poll(self):
+		"""檢查一次連接狀態，回傳變化：'connected' / 'switched' / 'no_workbook' / 'disconnected' / None"""
+		if self.app is None:
+			if self.clock() < self.next_attempt:
+				return None
+			if not self._attach():
+				return None
+			return self._refresh_identity()
+
+		# 存活檢查：只讀取一個屬性
+		try:
+			ready = self._timed(lambda: self.app.Ready)
+		except Exception as e:
+			if is_busy_error(e):
+				return None
+			return self._drop()
+
+		if not ready:
+			# Excel忙碌中，不打擾
+			return None
+
+		self.polls_since_refresh += 1
+		if (self.switch_pending or self.events is None
+				or self.polls_since_refresh >= self.refresh_every):
+			return self._refresh_identity()
+		return None
+
+	def _attach(self):
+		"""取得Excel，失敗時延長下次重試的間隔"""
+		self.stats['attach_attempts'] += 1
+		try:
+			self.app = self._timed(self.provider)
+		except Exception:
+			self.app = None
+			self.stats['attach_failures'] += 1
+			self.next_attempt = self.clock() + self.backoff
+			self.backoff = min(self.backoff * 2, self.max_backoff)
+			return False
+
+		self.backoff = self.interval
+		self.events = self.attach_events(self.app, self) if self.attach_events else None
+		self.switch_pending = True
+		return True
+
+	def _drop(self):
+		"""Excel已關閉"""
+		previous = self.state
+		self.app = None
+		self.events = None
+		self.workbook = None
+		self.worksheet = None
+		self.identity = None
+		self.state = STATE_ABSENT
+		self.backoff = self.interval
+		self.next_attempt = self.clock() + self.interval
+		return 'disconnected' if previous != STATE_ABSENT else None
+
+	def _refresh_identity(self):
+		"""讀取目前的工作簿與工作表"""
+		self.switch_pending = False
+		self.polls_since_refresh = 0
+		self.stats['identity_reads'] += 1
+		try:
+			def read():
+				workbook = self.app.ActiveWorkbook
+				if not workbook:
+					return None, None, None
+				worksheet = workbook.ActiveSheet
+				return workbook, worksheet, (workbook.Name, worksheet.Name)
+			workbook, worksheet, identity = self._timed(read)
+		except Exception as e:
+			if is_busy_error(e):
+				self.switch_pending = True
+				return None
+			return self._drop()
+
+		previous_state = self.state
+		previous_identity = self.identity
+		self.workbook = workbook
+		self.worksheet = worksheet
+		self.identity = identity
+
+		if workbook is None:
+			self.state = STATE_NO_WORKBOOK
+			return 'no_workbook' if previous_state != STATE_NO_WORKBOOK else None
+
+		self.state = STATE_CONNECTED
+		if previous_state != STATE_CONNECTED:
+			return 'connected'
+		if identity != previous_identity:
+			return 'switched'
+		return None
+
+
+def attach_switch_events(app, connection):
+	"""掛上工作簿/工作表切換事件，失敗時回傳None"""
+	try:
+		events = load_backend('com').WithEvents(app, ExcelSwitchEvents)
+		events.connection = connection
+		return events
+	except Exception:
+		return None
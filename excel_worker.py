@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excel工作執行緒
+所有工作簿存取（COM、openpyxl、xlsx）由同一個背景執行緒依序執行，界面執行緒不會被長時間的讀寫卡住；
+Windows上此執行緒有自己的COM apartment，Excel物件只在此執行緒中取得與使用，
+等待工作時處理COM事件訊息（SheetChange、工作簿切換）
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from backends import load_backend
+
+
+# 界面執行緒取出回呼的間隔
+PUMP_INTERVAL_MS = 50
+
+# 沒有工作時等待的秒數（期間處理COM訊息）
+IDLE_WAIT = 0.05
+
+# 進度回報的最短間隔（秒），完成時一定回報
+PROGRESS_INTERVAL = 0.1
+
+
+class JobCancelled(Exception):
+	"""工作被取消"""
+
+
+class Job:
+	"""工作執行緒中的一個工作：func(job) 可呼叫 job.report() 回報進度、job.check_cancelled() 檢查取消"""
+
+	def __init__(self, worker, func, name='', on_done=None, on_error=None, on_progress=None):
+		self.worker = worker
+		self.func = func
+		self.name = name
+		self.on_done = on_done
+		self.on_error = on_error
+		self.on_progress = on_progress
+		self.future = Future()
+		self.cancel_requested = threading.Event()
+		self.cancellable = True
+		self.lock = threading.Lock()  # 取消與開始寫入不可交錯
+		self.last_report = 0.0
+
+	def report(self, done, total=None, text=''):
+		"""（工作執行緒）回報進度，界面執行緒收到後呼叫 on_progress(done, total, text)"""
+		if not self.on_progress:
+			return
+		now = time.perf_counter()
+		if done != total and now - self.last_report < PROGRESS_INTERVAL:
+			return
+		self.last_report = now
+		self.worker.post(self.on_progress, done, total, text)
+
+	def check_cancelled(self):
+		"""（工作執行緒）已要求取消時拋出JobCancelled"""
+		if self.cancel_requested.is_set():
+			raise JobCancelled(self.name)
+
+	def commit(self):
+		"""（工作執行緒）開始寫入：之後不可取消，避免只寫入一部分"""
+		with self.lock:
+			self.check_cancelled()
+			self.cancellable = False
+
+	def cancel(self):
+		"""要求取消，已開始寫入時回傳False"""
+		if self.future.cancel():
+			return True
+		with self.lock:
+			if not self.cancellable:
+				return False
+			self.cancel_requested.set()
+			return True
+
+
+class ExcelWorker:
+	"""Excel工作執行緒：依序執行工作，結果由界面執行緒定期取出"""
+
+	def __init__(self, schedule, com=False, error_handler=None):
+		"""
+		schedule: 界面執行緒的延遲呼叫 (ms, func)，通常為 root.after
+		com: 是否在執行緒中初始化COM
+		error_handler: (界面執行緒) 沒有指定錯誤處理的工作失敗或回呼失敗時呼叫 error_handler(名稱, 例外)
+		"""
+		self.schedule = schedule
+		self.com = com
+		self.error_handler = error_handler or report_error
+		self.requests = queue.Queue()
+		self.callbacks = queue.Queue()
+		self.thread = threading.Thread(target=self._run, name='excel-worker', daemon=True)
+		self.running = False
+
+	def start(self):
+		self.running = True
+		self.thread.start()
+		self.schedule(PUMP_INTERVAL_MS, self.pump)
+		return self
+
+	def shutdown(self):
+		self.running = False
+		self.requests.put(None)
+
+	def submit(self, func, on_done=None, on_error=None, on_progress=None, name=''):
+		"""加入工作，回傳 Job（job.future 為其結果）
+
+		on_done(result) / on_error(error) / on_progress(done, total, text) 都在界面執行緒中呼叫；
+		取消的工作以 JobCancelled 呼叫 on_error
+		"""
+		job = Job(self, func, name, on_done, on_error, on_progress)
+		self.requests.put(job)
+		return job
+
+	def post(self, callback, *args):
+		"""交給界面執行緒呼叫"""
+		self.callbacks.put((callback, args))
+
+	def _run(self):
+		try:
+			pythoncom = load_backend('pythoncom') if self.com else None
+			if pythoncom:
+				pythoncom.CoInitialize()
+		except Exception as e:
+			# 無法初始化COM：之後的工作都以此錯誤失敗，呼叫端不會一直等待
+			self._reject_all(e)
+			return
+		try:
+			while True:
+				try:
+					job = self.requests.get(timeout=IDLE_WAIT)
+				except queue.Empty:
+					if pythoncom:
+						pythoncom.PumpWaitingMessages()
+					continue
+				if job is None:
+					return
+				self._execute(job)
+				if pythoncom:
+					pythoncom.PumpWaitingMessages()
+		finally:
+			if pythoncom:
+				pythoncom.CoUninitialize()
+
+	def _reject_all(self, error):
+		while True:
+			job = self.requests.get()
+			if job is None:
+				return
+			if not job.future.set_running_or_notify_cancel():
+				self._fail(job, JobCancelled(job.name))
+				continue
+			job.future.set_exception(error)
+			self._fail(job, error)
+
+	def _fail(self, job, error):
+		if job.on_error:
+			self.post(job.on_error, error)
+		elif not isinstance(error, JobCancelled):
+			self.post(self.error_handler, job.name, error)
+
+	def _execute(self, job):
+		if not job.future.set_running_or_notify_cancel():
+			self._fail(job, JobCancelled(job.name))
+			return
+		try:
+			result = job.func(job)
+		except Exception as e:
+			job.future.set_exception(e)
+			self._fail(job, e)
+		else:
+			job.future.set_result(result)
+			if job.on_done:
+				self.post(job.on_done, result)
+
+	def pump(self):
+		"""（界面執行緒）執行工作完成後的回呼"""
+		while True:
+			try:
+				callback, args = self.callbacks.get_nowait()
+			except queue.Empty:
+				break
+			try:
+				callback(*args)
+			except Exception as e:
+				self.error_handler('', e)
+		if self.running:
+			self.schedule(PUMP_INTERVAL_MS, self.pump)
+
+
+def report_error(name, error):
+	"""預設的錯誤處理（沒有界面時）"""
+	print(f"背景工作失敗（{name or '未命名'}）: {error}")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作表關鍵字索引
+對每個工作表快照建立一次，查詢時保持 `keyword in str(cell)` 的比對規則
+"""
+
+from bisect import bisect_right
+
+
+# n-gram 長度（較短的關鍵字改為掃描不重複文字）
+GRAM_SIZE = 3
+
+
+class KeywordIndex:
+	"""儲存格文字的倒排索引"""
+
+	def __init__(self, data):
+		self.texts = []  # 不重複的儲存格文字
+		self.first_cells = []  # 文字第一次出現的位置 (row, col)，依行優先順序
+		self.columns = []  # 文字在各欄出現的行 {col: [row, ...]}（已排序）
+		self.grams = {}  # n-gram -> 含有該片段的文字編號
+		self._match_cache = {}
+
+		text_ids = {}
+		for row_idx, row in enumerate(data):
+			for col_idx, cell in enumerate(row):
+				if not cell:
+					continue
+				text = str(cell)
+				text_id = text_ids.get(text)
+				if text_id is None:
+					text_id = len(self.texts)
+					text_ids[text] = text_id
+					self.texts.append(text)
+					self.first_cells.append((row_idx, col_idx))
+					self.columns.append({})
+					for gram in {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}:
+						self.grams.setdefault(gram, []).append(text_id)
+				# 逐行建立，各欄的行號自然遞增
+				self.columns[text_id].setdefault(col_idx, []).append(row_idx)
+
+	def matching_texts(self, keyword):
+		"""回傳包含關鍵字的文字編號"""
+		matches = self._match_cache.get(keyword)
+		if matches is not None:
+			return matches
+
+		if len(keyword) < GRAM_SIZE:
+			candidates = range(len(self.texts))
+		else:
+			postings = []
+			for gram in {keyword[i:i + GRAM_SIZE] for i in range(len(keyword) - GRAM_SIZE + 1)}:
+				posting = self.grams.get(gram)
+				if not posting:
+					self._match_cache[keyword] = []
+					return []
+				postings.append(posting)
+			# 從最短的清單開始，再逐一確認子字串
+			candidates = min(postings, key=len)
+
+		matches = [text_id for text_id in candidates if keyword in self.texts[text_id]]
+		self._match_cache[keyword] = matches
+		return matches
+
+	def find_first(self, keyword):
+		"""依行優先順序找出第一個包含關鍵字的儲存格 (row, col)"""
+		positions = [self.first_cells[text_id] for text_id in self.matching_texts(keyword)]
+		return min(positions) if positions else None
+
+	def find_in_column(self, col_idx, after_row, keyword):
+		"""在同一欄中找出 after_row 之後第一個包含關鍵字的行"""
+		best = None
+		for text_id in self.matching_texts(keyword):
+			rows = self.columns[text_id].get(col_idx)
+			if not rows:
+				continue
+			i = bisect_right(rows, after_row)
+			if i < len(rows) and (best is None or rows[i] < best):
+				best = rows[i]
+		return best
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多關鍵字比對
+以配置中所有關鍵字建立 Aho-Corasick 自動機，走訪工作表一次即找出每個關鍵字的所有位置；
+比對規則與 KeywordIndex 相同（`keyword in str(cell)`，略過空值）
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+
+
+# 保留的自動機數量（依關鍵字組合）
+MATCHER_CACHE_SIZE = 8
+
+
+class KeywordMatcher:
+	"""Aho-Corasick 自動機"""
+
+	def __init__(self, keywords):
+		self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+		self.goto = [{}]  # 節點 -> {字元: 下一個節點}
+		self.fail = [0]
+		self.outputs = [()]  # 節點 -> 在此結束的關鍵字編號（包含失敗連結上的）
+
+		for keyword_id, keyword in enumerate(self.keywords):
+			node = 0
+			for char in keyword:
+				next_node = self.goto[node].get(char)
+				if next_node is None:
+					next_node = len(self.goto)
+					self.goto[node][char] = next_node
+					self.goto.append({})
+					self.fail.append(0)
+					self.outputs.append(())
+				node = next_node
+			self.outputs[node] += (keyword_id,)
+
+		# 依深度建立失敗連結（第一層指向根節點）
+		queue = list(self.goto[0].values())
+		for node in queue:
+			for char, child in self.goto[node].items():
+				queue.append(child)
+				state = self.fail[node]
+				while state and char not in self.goto[state]:
+					state = self.fail[state]
+				target = self.goto[state].get(char, 0)
+				self.fail[child] = target
+				if self.outputs[target]:
+					self.outputs[child] += self.outputs[target]
+
+	def match(self, text):
+		"""回傳文字中出現的關鍵字編號"""
+		goto = self.goto
+		fail = self.fail
+		outputs = self.outputs
+		found = set()
+		node = 0
+		for char in text:
+			while node and char not in goto[node]:
+				node = fail[node]
+			node = goto[node].get(char, 0)
+			if outputs[node]:
+				found.update(outputs[node])
+		return found
+
+	def scan(self, data):
+		"""走訪工作表一次，回傳 KeywordHits"""
+		hits = KeywordHits(self.keywords)
+		first_cells = hits.first_cells
+		columns = hits.columns
+		text_matches = {}  # 相同文字只比對一次
+
+		for row_idx, row in enumerate(data):
+			for col_idx, cell in enumerate(row):
+				if not cell:
+					continue
+				text = str(cell)
+				matches = text_matches.get(text)
+				if matches is None:
+					matches = text_matches[text] = [self.keywords[k] for k in self.match(text)]
+				for keyword in matches:
+					if keyword not in first_cells:
+						first_cells[keyword] = (row_idx, col_idx)
+					# 逐行走訪，各欄的行號自然遞增
+					columns[keyword].setdefault(col_idx, []).append(row_idx)
+		return hits
+
+
+class KeywordHits:
+	"""一次走訪的結果，查詢介面與 KeywordIndex 相同（只能查詢建立時的關鍵字）"""
+
+	def __init__(self, keywords):
+		self.first_cells = {}  # 關鍵字 -> 依行優先順序的第一個位置 (row, col)
+		self.columns = {keyword: {} for keyword in keywords}  # 關鍵字 -> {col: [row, ...]}
+
+	def find_first(self, keyword):
+		"""依行優先順序找出第一個包含關鍵字的儲存格 (row, col)"""
+		self.check(keyword)
+		return self.first_cells.get(keyword)
+
+	def find_in_column(self, col_idx, after_row, keyword):
+		"""在同一欄中找出 after_row 之後第一個包含關鍵字的行"""
+		self.check(keyword)
+		rows = self.columns[keyword].get(col_idx)
+		if not rows:
+			return None
+		i = bisect_right(rows, after_row)
+		return rows[i] if i < len(rows) else None
+
+	def check(self, keyword):
+		if keyword not in self.columns:
+			raise KeyError(f"關鍵字不在比對器中: {keyword}")
+
+
+def config_set_keywords(configs):
+	"""配置中的所有關鍵字（排序後作為快取鍵）"""
+	keywords = set()
+	for _, config_data in configs:
+		for key in ('first_keyword', 'field_name'):
+			keyword = (config_data.get(key) or '').strip()
+			if keyword:
+				keywords.add(keyword)
+	return tuple(sorted(keywords))
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def build_matcher(keywords):
+	return KeywordMatcher(keywords)
+
+
+def matcher_for_configs(configs):
+	"""配置組合的自動機；關鍵字相同時沿用，配置變更後自動重建"""
+	return build_matcher(config_set_keywords(configs))
@@ -5,21 +5,32 @@ SHT Excel CSV寫入工具
 自動識別Excel中的特定欄位和空格，建立寫入
 """
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import csv
-import json
-import os
-from openpyxl import load_workbook
-import win32com.client
+import sys
 
+from startup_profile import StartupProfile
 
-FIELD_MAPPING_DIR = os.path.expanduser("~/documents/field_mappings")
-FIELD_MAPPING_PATH = os.path.join(FIELD_MAPPING_DIR, "field_mappings.json")
+# 在其他匯入之前開始計時
+STARTUP = StartupProfile(enabled='--startup-profile' in sys.argv)
 
-# UI常量
-MAX_HORIZONTAL_SCAN_RANGE = 4
-MAX_VERTICAL_SCAN_RANGE = 8
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import os
+STARTUP.mark("匯入tkinter")
+
+from engine import FIELD_MAPPING_DIR, MappingError, CsvModel, SheetModel, build_write_plan, plan_config_set
+from sheet_snapshot import SheetSnapshot, ChangeTracker, ComSheetSource
+from sheet_backend import ComSheetBackend, open_file_backend
+from scan_cache import ScanCache
+from xlsx_reader import active_sheet_name
+from excel_connection import ExcelConnection, STATE_CONNECTED, STATE_NO_WORKBOOK
+from csv_table import CsvStreamLoader, VirtualCsvTable
+from config_store import ConfigStore
+from config_picker import SEARCH_DELAY_MS, ConfigIndex, VirtualListbox
+from sheet_search import search_com, search_files, rank_hits, format_hit
+from backends import backend_available, loaded_backends
+from excel_worker import ExcelWorker, JobCancelled
+import tracing
+STARTUP.mark("匯入模組")
 
 class SmartExcelMapper:
 	"""Excel寫入工具"""
@@ -28,21 +39,39 @@ class SmartExcelMapper:
 		self.root = tk.Tk()
 		self.root.title("RATC Excel Mapper (SHT)")
 		self.root.geometry("1400x1000")
+		STARTUP.mark("建立視窗")
 
 		# 數據存儲
-		self.csv_data = []
-		self.excel_data = []
-		self.excel_workbook = None
-		self.excel_sheet = None
+		self.csv_model = CsvModel()
+		self.csv_loader = None
+		self.csv_span = tracing.NULL_SPAN  # CSV載入的計時（跨多次輪詢）
+		self.csv_filename = ""
+		self.sheet_model = SheetModel()
+		self.sheet_snapshot = SheetSnapshot()
+		self.sheet_source = None
+		self.change_tracker = ChangeTracker()
+		self.scan_cache = ScanCache()  # 工作表未變更時沿用空格位置
+		self.excel_path = None  # 檔案模式的xlsx路徑（寫入時才完整載入）
+		self.excel_sheet_name = None
 		self.active_workbook = None
 		self.active_worksheet = None
 
-		# Excel連接模式
-		self.auto_detect_mode = True  # 預設使用自動偵測
+		# Excel連接模式（沒有COM後端時只能選擇檔案）
+		self.com_available = backend_available('com')
+		self.auto_detect_mode = self.com_available  # 預設使用自動偵測
+		self.connection = ExcelConnection()
+
+		# 所有Excel存取都在工作執行緒中執行（COM物件只在該執行緒中使用）
+		self.worker = ExcelWorker(self.root.after, com=self.com_available,
+								  error_handler=self.show_background_error).start()
+		self.busy_job = None  # 目前由使用者啟動的工作（同時只有一個）
 
 		# 寫入配置
-		self.field_mappings = {}  # 存儲不同欄位的寫入配置
+		self.config_store = None  # 配置庫（SQLite，配置內容使用時才讀取）
+		self.config_names = []  # 配置名稱列表
+		self.config_index = None  # 配置搜尋索引（第一次開啟選擇視窗時建立）
 		self.empty_cells = []  # 當前欄位的空格
+		self.empty_cells_target = None  # 空格所在的 (工作簿, 工作表)，寫入前確認未切換
 
 		# 初始化界面變量
 		self.config_var = tk.StringVar()
@@ -53,17 +82,29 @@ class SmartExcelMapper:
 		# 建立寫入資料夾
 		os.makedirs(FIELD_MAPPING_DIR, exist_ok=True)
 
+		# 初始化彈出式選單變數
+		self.config_popup = None
+
 		self.setup_ui()
-		self.load_configs()
+		STARTUP.mark("建立界面")
 
-		# 啟動時自動嘗試連接Excel
-		self.root.after(500, self.auto_connect_excel)
+		# 配置在視窗顯示後才載入
+		self.root.after_idle(self.finish_startup)
 
-		# 定期檢查Excel連接狀態
-		self.start_excel_monitoring()
+		if self.com_available:
+			# 啟動時自動嘗試連接Excel
+			self.root.after(500, self.auto_connect_excel)
 
-		# 初始化彈出式選單變數
-		self.config_popup = None
+			# 定期檢查Excel連接狀態
+			self.start_excel_monitoring()
+
+	def finish_startup(self):
+		"""首次繪製後載入配置"""
+		STARTUP.mark("首次繪製")
+		self.load_configs()
+		STARTUP.mark("載入配置")
+		STARTUP.report({'已匯入後端': ', '.join(loaded_backends()) or '無',
+						'COM後端': '可用' if self.com_available else '無法使用'})
 
 	def setup_ui(self):
 		"""設置界面"""
@@ -96,6 +137,8 @@ class SmartExcelMapper:
 		self.manual_connect_btn = ttk.Button(file_group, text="連接Excel", command=self.connect_excel_windows, width=12,
 											style="Large.TButton")
 		# 預設不顯示，由toggle_connection_mode控制
+		if not self.auto_detect_mode:
+			self.manual_connect_btn.pack(side=tk.LEFT)
 
 		# Excel模式和狀態群組
 		excel_group = ttk.Frame(row1)
@@ -105,11 +148,13 @@ class SmartExcelMapper:
 		mode_frame = ttk.Frame(excel_group)
 		mode_frame.pack(side=tk.TOP, anchor=tk.W)
 
-		self.mode_var = tk.BooleanVar(value=True)
+		self.mode_var = tk.BooleanVar(value=self.auto_detect_mode)
 		self.auto_radio = ttk.Radiobutton(mode_frame, text="自動偵測", variable=self.mode_var,
 											value=True, command=self.toggle_connection_mode,
 											style="Large.TRadiobutton")
 		self.auto_radio.pack(side=tk.LEFT, padx=(0, 15))
+		if not self.com_available:
+			self.auto_radio.state(['disabled'])
 
 		self.manual_radio = ttk.Radiobutton(mode_frame, text="手動連接", variable=self.mode_var,
 													value=False, command=self.toggle_connection_mode,
@@ -144,6 +189,17 @@ class SmartExcelMapper:
 											font=('Arial', 10), foreground="gray", width=35)
 		self.excel_name_label.pack(side=tk.LEFT, padx=(8, 0))
 
+		# Excel工作進度與取消
+		progress_frame = ttk.Frame(file_info_frame)
+		progress_frame.pack(fill=tk.X, pady=(5, 0))
+		self.progress_bar = ttk.Progressbar(progress_frame, length=160, mode='determinate')
+		self.progress_bar.pack(side=tk.LEFT)
+		self.progress_label = ttk.Label(progress_frame, text="", font=('Arial', 9), foreground="gray", width=22)
+		self.progress_label.pack(side=tk.LEFT, padx=(8, 0))
+		self.cancel_btn = ttk.Button(progress_frame, text="取消", command=self.cancel_excel_job, width=6,
+									 state='disabled')
+		self.cancel_btn.pack(side=tk.RIGHT)
+
 		# 創建寫入按鈕（大的方形，醒目顏色）
 		self.execute_btn = tk.Button(execute_main_group, text="寫入",
 									command=self.execute_smart_mapping,
@@ -187,6 +243,10 @@ class SmartExcelMapper:
 		ttk.Button(current_config_group, text="刪除配置", command=self.delete_config, width=12,
 							style="Large.TButton").pack(side=tk.LEFT)
 
+		# 一次套用多個配置（只儲存一次）
+		ttk.Button(current_config_group, text="套用多個配置", command=self.choose_config_set, width=14,
+							style="Large.TButton").pack(side=tk.LEFT, padx=(10, 0))
+
 		# 新配置保存
 		new_config_group = ttk.Frame(config_content)
 		new_config_group.pack(side=tk.LEFT)
@@ -232,6 +292,9 @@ class SmartExcelMapper:
 							style="Large.TButton").pack(side=tk.LEFT, padx=(0, 10))
 
 		ttk.Button(scan_buttons_group, text="手動選取儲存格", command=self.scan_selection_range, width=15,
+							style="Large.TButton").pack(side=tk.LEFT, padx=(0, 10))
+
+		ttk.Button(scan_buttons_group, text="搜尋所有工作表", command=self.search_all_sheets, width=15,
 							style="Large.TButton").pack(side=tk.LEFT)
 
 		# =================== 主工作區 ===================
@@ -248,8 +311,7 @@ class SmartExcelMapper:
 
 		# 建立Treeview表格
 		self.csv_tree = ttk.Treeview(csv_table_frame, selectmode="extended", height=25)
-		csv_scroll_y = ttk.Scrollbar(csv_table_frame, orient=tk.VERTICAL, command=self.csv_tree.yview)
-		self.csv_tree.configure(yscrollcommand=csv_scroll_y.set)
+		csv_scroll_y = ttk.Scrollbar(csv_table_frame, orient=tk.VERTICAL)
 
 		# 綁定點擊事件，實現單擊切換選取狀態
 		self.csv_tree.bind('<Button-1>', self.on_tree_click)
@@ -272,6 +334,9 @@ class SmartExcelMapper:
 		self.csv_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 		csv_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
 
+		# 只建立可見範圍的行，捲軸由表格控制
+		self.csv_table = VirtualCsvTable(self.csv_tree, csv_scroll_y)
+
 		# 選取數量顯示和操作按鈕
 		csv_info_frame = ttk.Frame(csv_frame)
 		csv_info_frame.pack(fill=tk.X, pady=(5, 0))
@@ -316,6 +381,10 @@ class SmartExcelMapper:
 		self.match_status_label = ttk.Label(status_frame, text="數量不匹配", foreground="orange", font=('Arial', 11, 'bold'))
 		self.match_status_label.pack(anchor=tk.W)
 
+		# 掃描快取統計
+		self.cache_status_label = ttk.Label(status_frame, text="", font=('Arial', 9), foreground="gray")
+		self.cache_status_label.pack(anchor=tk.W, pady=(5, 0))
+
 		# 空格信息詳細顯示
 		info_frame = ttk.LabelFrame(mapping_frame, text="空格位置詳細", padding=5)
 		info_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
@@ -339,7 +408,7 @@ class SmartExcelMapper:
 		# 創建彈出視窗
 		self.config_popup = tk.Toplevel(self.root)
 		self.config_popup.title("選擇配置")
-		self.config_popup.geometry("300x200")
+		self.config_popup.geometry("360x300")
 		self.config_popup.resizable(False, False)
 
 		# 設定彈出視窗位置（在點擊位置附近）
@@ -347,24 +416,22 @@ class SmartExcelMapper:
 		y = self.root.winfo_rooty() + event.y_root - self.root.winfo_rooty() + 30
 		self.config_popup.geometry(f"+{x}+{y}")
 
+		# 搜尋欄（配置名稱、定位列、目標欄位、元素名稱）
+		search_frame = ttk.Frame(self.config_popup)
+		search_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+		ttk.Label(search_frame, text="搜尋:").pack(side=tk.LEFT)
+		search_var = tk.StringVar()
+		search_entry = ttk.Entry(search_frame, textvariable=search_var)
+		search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+
 		# 創建列表框
 		listbox_frame = ttk.Frame(self.config_popup)
 		listbox_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-		# 配置列表
-		config_listbox = tk.Listbox(listbox_frame, height=8)
-		config_scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=config_listbox.yview)
-		config_listbox.configure(yscrollcommand=config_scrollbar.set)
-
-		# 添加配置選項
-		config_names = list(self.field_mappings.keys())
-		for name in config_names:
-			config_listbox.insert(tk.END, name)
-
-		# 選中當前配置
-		current_config = self.config_var.get()
-		if current_config in config_names:
-			config_listbox.selection_set(config_names.index(current_config))
+		# 配置列表（只顯示可見的行）
+		config_listbox = tk.Listbox(listbox_frame, height=10, exportselection=False)
+		config_scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL)
+		config_list = VirtualListbox(config_listbox, config_scrollbar)
 
 		config_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 		config_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -373,16 +440,38 @@ class SmartExcelMapper:
 		button_frame = ttk.Frame(self.config_popup)
 		button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
 
+		count_label = ttk.Label(button_frame, text="", foreground="gray")
+		count_label.pack(side=tk.LEFT)
+
+		config_index = self.get_config_index()
+		pending = [None]
+
+		def update_results():
+			pending[0] = None
+			query = search_var.get()
+			names = config_index.search(query) if config_index else list(self.config_names)
+			config_list.set_items(names, current=self.config_var.get() if not query.strip() else None)
+			count_label.config(text=f"{len(names)} / {len(self.config_names)} 個配置")
+
+		def on_search_change(*args):
+			# 連續輸入時只更新最後一次
+			if pending[0]:
+				self.config_popup.after_cancel(pending[0])
+			pending[0] = self.config_popup.after(SEARCH_DELAY_MS, update_results)
+
 		def on_select():
-			selection = config_listbox.curselection()
-			if selection:
-				selected_config = config_listbox.get(selection[0])
+			selected_config = config_list.selected_item()
+			if selected_config:
 				self.config_var.set(selected_config)
 				# 自動套用選中的配置
 				self.load_config()
 			self.config_popup.destroy()
 			self.config_popup = None
 
+		def on_double_click(event):
+			if config_list.item_at(event.y):
+				on_select()
+
 		def on_cancel():
 			self.config_popup.destroy()
 			self.config_popup = None
@@ -390,15 +479,26 @@ class SmartExcelMapper:
 		ttk.Button(button_frame, text="取消", command=on_cancel).pack(side=tk.RIGHT)
 		ttk.Button(button_frame, text="確定", command=on_select).pack(side=tk.RIGHT)
 
+		update_results()
+		search_var.trace_add('write', on_search_change)
+
 		# 綁定雙擊事件（自動套用配置）
-		config_listbox.bind('<Double-Button-1>', lambda e: on_select())
+		config_listbox.bind('<Double-Button-1>', on_double_click)
+
+		# 搜尋欄中以上下鍵移動選取，Enter套用
+		search_entry.bind('<Down>', lambda e: config_list.move(1))
+		search_entry.bind('<Up>', lambda e: config_list.move(-1))
+		search_entry.bind('<Next>', lambda e: config_list.move(config_list.page_size))
+		search_entry.bind('<Prior>', lambda e: config_list.move(-config_list.page_size))
+		search_entry.bind('<Return>', lambda e: on_select())
+		config_listbox.bind('<Return>', lambda e: on_select())
 
 		# 綁定ESC鍵關閉
 		self.config_popup.bind('<Escape>', lambda e: on_cancel())
 
 		# 設定焦點
 		self.config_popup.focus_set()
-		config_listbox.focus_set()
+		search_entry.focus_set()
 
 		# 讓彈出視窗保持在最上層
 		self.config_popup.transient(self.root)
@@ -412,50 +512,59 @@ class SmartExcelMapper:
 		)
 
 		if file_path:
-			try:
-				with open(file_path, 'r', encoding='utf-8') as f:
-					reader = csv.DictReader(f)
-					self.csv_data = list(reader)
+			# 停止上一次尚未完成的載入
+			if self.csv_loader:
+				self.csv_loader.cancel()
+				self.csv_span.finish(error="cancelled", rows=len(self.csv_model))
 
-				# 更新CSV檔案名稱顯示
-				csv_filename = os.path.basename(file_path)
-				self.csv_name_label.config(text=csv_filename, foreground="black")
+			self.csv_model = CsvModel(path=file_path)
+			self.display_csv_data()
+			self.update_selection_info()
 
-				self.display_csv_data()
+			self.csv_filename = os.path.basename(file_path)
+			self.csv_name_label.config(text=f"{self.csv_filename}（載入中...）", foreground="gray")
 
-				# 自動套用當前選中的配置
-				self.auto_apply_current_config()
+			# 背景逐批讀取，第一批到達即可顯示
+			self.csv_span = tracing.span('csv_load', file=self.csv_filename)
+			self.csv_loader = CsvStreamLoader(file_path).start()
+			self.root.after(50, self.poll_csv_loader, self.csv_loader)
 
-			except Exception as e:
-				messagebox.showerror("錯誤", f"載入CSV失敗：{str(e)}")
+	def poll_csv_loader(self, loader):
+		"""取出背景載入的CSV數據"""
+		if loader is not self.csv_loader:
+			# 已載入其他CSV
+			return
 
-	def display_csv_data(self):
-		"""顯示CSV數據"""
-		# 清除舊數據
-		for item in self.csv_tree.get_children():
-			self.csv_tree.delete(item)
+		for kind, payload in loader.drain():
+			if kind == 'chunk':
+				self.csv_model.merge(payload)
+			elif kind == 'error':
+				self.csv_loader = None
+				self.csv_span.finish(error=str(payload))
+				self.csv_name_label.config(text="未載入", foreground="gray")
+				self.csv_model = CsvModel()
+				self.display_csv_data()
+				messagebox.showerror("錯誤", f"載入CSV失敗：{str(payload)}")
+				return
 
-		if not self.csv_data:
-			return
+		self.csv_table.rows_added()
 
-		for i, row in enumerate(self.csv_data):
-			element = row.get('Element', f'行{i+1}')
-			dev = row.get('Dev', '')
-			actual = row.get('Actual', '')
+		if not loader.finished:
+			self.csv_name_label.config(text=f"{self.csv_filename}（載入中... {len(self.csv_model)} 行）")
+			self.root.after(50, self.poll_csv_loader, loader)
+			return
 
-			# 決定使用哪個值（Dev優先，沒有則用Actual）
-			use_value = ""
-			if dev and str(dev).strip() and str(dev).strip().lower() != 'n/a':
-				use_value = str(dev).strip()
-			elif actual and str(actual).strip() and str(actual).strip().lower() != 'n/a':
-				use_value = str(actual).strip()
+		self.csv_loader = None
+		self.csv_span.finish(rows=len(self.csv_model))
+		# 更新CSV檔案名稱顯示
+		self.csv_name_label.config(text=self.csv_filename, foreground="black")
 
-			# 顯示格式化的值
-			dev_display = self.get_display_value(dev)
-			actual_display = self.get_display_value(actual)
-			value_display = use_value if use_value else '-'
+		# 自動套用當前選中的配置
+		self.auto_apply_current_config()
 
-			self.csv_tree.insert('', 'end', values=(element, dev_display, actual_display, value_display))
+	def display_csv_data(self):
+		"""顯示CSV數據"""
+		self.csv_table.set_model(self.csv_model)
 
 	def on_tree_click(self, event):
 		"""處理Treeview點擊事件，實現單擊切換選取"""
@@ -463,19 +572,11 @@ class SmartExcelMapper:
 		item = self.csv_tree.identify_row(event.y)
 
 		if item:
-			# 獲取目前選取的項目
-			current_selection = self.csv_tree.selection()
-
 			# 如果項目已被選取，則取消選取；否則加入選取
-			if item in current_selection:
-				# 取消選取這個項目
-				new_selection = [i for i in current_selection if i != item]
-			else:
-				# 加入選取
-				new_selection = list(current_selection) + [item]
-
-			# 更新選取狀態
-			self.csv_tree.selection_set(new_selection)
+			row_index = self.csv_table.row_at(item)
+			if row_index is not None:
+				self.csv_table.toggle(row_index)
+				self.update_selection_info()
 
 			# 阻止預設的選取行為
 			return "break"
@@ -485,7 +586,7 @@ class SmartExcelMapper:
 
 	def update_selection_info(self, event=None):
 		"""更新選取信息"""
-		selected_count = len(self.csv_tree.selection())
+		selected_count = len(self.csv_table.selected)
 		self.csv_selection_label.config(text=f"已選取: {selected_count} 個元素")
 
 		# 更新匹配狀態
@@ -493,18 +594,17 @@ class SmartExcelMapper:
 
 	def select_all_csv(self):
 		"""全選CSV中的所有元素"""
-		all_items = self.csv_tree.get_children()
-		self.csv_tree.selection_set(all_items)
+		self.csv_table.select_all()
 		self.update_selection_info()
 
 	def deselect_all_csv(self):
 		"""取消全選CSV中的所有元素"""
-		self.csv_tree.selection_remove(self.csv_tree.selection())
+		self.csv_table.clear_selection()
 		self.update_selection_info()
 
 	def update_match_status(self):
 		"""更新匹配狀態顯示"""
-		selected_count = len(self.csv_tree.selection())
+		selected_count = len(self.csv_table.selected)
 		spaces_count = len(self.empty_cells)
 
 		if spaces_count == 0:
@@ -516,49 +616,123 @@ class SmartExcelMapper:
 		else:
 			self.match_status_label.config(text=f"數量不匹配 ({selected_count}/{spaces_count})", foreground="red")
 
+	def update_cache_status(self):
+		"""顯示掃描快取的命中次數"""
+		stats = self.scan_cache.stats
+		self.cache_status_label.config(
+			text=f"掃描快取: 命中 {stats['hits']} 次 / 未命中 {stats['misses']} 次（保存 {stats['entries']} 筆）")
+
 	def update_excel_name_display(self, name, color="black"):
 		"""統一更新Excel檔案名稱顯示"""
 		self.excel_name_label.config(text=name, foreground=color)
 
-	def is_cell_empty(self, cell_value):
-		"""檢查儲存格是否為空"""
-		return cell_value is None or str(cell_value).strip() == ''
+	def run_excel_job(self, func, on_done, description, on_error=None, quiet=False):
+		"""在Excel工作執行緒中執行 func(job)，完成後在界面執行緒呼叫 on_done(結果)
 
-	def get_display_value(self, value):
-		"""獲取顯示用的值"""
-		return str(value) if value and str(value).strip() else '-'
+		同時只執行一個使用者啟動的工作；on_error(例外) 處理失敗（預設顯示錯誤訊息），取消時不呼叫
+		quiet: 已有工作執行中時不顯示提示（自動觸發的掃描）
+		"""
+		if self.busy_job:
+			if not quiet:
+				messagebox.showwarning("警告", "Excel仍在處理中，請稍候或取消目前的工作")
+			return None
 
-	def get_excel_column_name(self, col_index):
-		"""將數字索引轉換為Excel列名（A, B, ..., Z, AA, AB, ...）"""
-		column_name = ""
-		while col_index >= 0:
-			column_name = chr(65 + (col_index % 26)) + column_name
-			col_index = col_index // 26 - 1
-		return column_name
-
-	def auto_connect_excel(self):
-		"""啟動時自動連接Excel（靜默模式）"""
-		try:
-			excel_app = win32com.client.GetActiveObject("Excel.Application")
-			self.active_workbook = excel_app.ActiveWorkbook
+		def done(result):
+			self.finish_excel_job(job, "完成")
+			on_done(result)
 
-			if self.active_workbook:
-				# 使用當前活動的工作表
-				self.active_worksheet = self.active_workbook.ActiveSheet
-
-				workbook_name = self.active_workbook.Name
-				self.update_excel_name_display(workbook_name)
-				self.load_excel_data()
+		def failed(error):
+			if isinstance(error, JobCancelled):
+				self.finish_excel_job(job, "已取消")
+				return
+			self.finish_excel_job(job, "失敗")
+			if on_error:
+				on_error(error)
 			else:
-				raise Exception("沒有開啟的工作簿")
+				messagebox.showerror("錯誤", f"{description}失敗：{str(error)}")
+
+		job = self.worker.submit(func, done, failed, self.show_job_progress, name=description)
+		self.busy_job = job
+		self.execute_btn.config(state='disabled')
+		self.cancel_btn.config(state='normal')
+		self.progress_bar.config(mode='indeterminate', value=0)
+		self.progress_bar.start(15)
+		self.progress_label.config(text=f"{description}...", foreground="black")
+		return job
+
+	def show_job_progress(self, done, total, text):
+		"""顯示工作進度（總數未知時只顯示數量）"""
+		if total:
+			if str(self.progress_bar.cget('mode')) != 'determinate':
+				self.progress_bar.stop()
+				self.progress_bar.config(mode='determinate')
+			self.progress_bar.config(maximum=total, value=done)
+			self.progress_label.config(text=f"{text} {done}/{total}")
+		else:
+			self.progress_label.config(text=f"{text} {done}")
+
+		# 開始寫入後不可取消
+		if self.busy_job and not self.busy_job.cancellable:
+			self.cancel_btn.config(state='disabled')
+
+	def finish_excel_job(self, job, result_text):
+		"""工作結束，恢復按鈕"""
+		if self.busy_job is job:
+			self.busy_job = None
+		self.progress_bar.stop()
+		self.progress_bar.config(mode='determinate', value=0)
+		self.progress_label.config(text=f"{job.name}: {result_text}", foreground="gray")
+		self.cancel_btn.config(state='disabled')
+		self.execute_btn.config(state='normal')
+
+	def show_background_error(self, name, error):
+		"""背景工作或回呼失敗（沒有指定錯誤處理時）"""
+		messagebox.showerror("錯誤", f"{name or '背景工作'}失敗：{str(error)}")
+
+	def cancel_excel_job(self):
+		"""取消目前的工作（尚未開始寫入時）"""
+		job = self.busy_job
+		if not job:
+			return
+		if job.cancel():
+			self.progress_label.config(text="取消中...")
+		else:
+			messagebox.showinfo("提示", "已開始寫入Excel，無法取消")
 
-		except:
+	def auto_connect_excel(self):
+		"""啟動時自動連接Excel（靜默模式）"""
+		def failed():
 			# 靜默失敗，在自動模式下顯示等待狀態
 			if self.auto_detect_mode:
 				self.update_excel_name_display("等待中", "gray")
 			else:
 				self.update_excel_name_display("未連接", "gray")
 
+		self.connect_excel(failed)
+
+	def connect_excel(self, on_failed):
+		"""在工作執行緒中立即連接Excel並使用當前活動的工作表，失敗時呼叫 on_failed()"""
+		def connect(job):
+			self.connection.connect()
+			if self.connection.state != STATE_CONNECTED:
+				raise MappingError("沒有開啟的工作簿")
+
+			self.active_workbook = self.connection.workbook
+			self.active_worksheet = self.connection.worksheet
+			try:
+				self.refresh_sheet_model()
+			except Exception as e:
+				return self.connection.workbook_name, e
+			return self.connection.workbook_name, None
+
+		def done(result):
+			workbook_name, load_error = result
+			self.update_excel_name_display(workbook_name)
+			if load_error:
+				messagebox.showerror("錯誤", f"載入Excel數據失敗：{str(load_error)}")
+
+		self.worker.submit(connect, done, lambda error: on_failed(), name="連接Excel")
+
 	def start_excel_monitoring(self):
 		"""開始監控Excel狀態"""
 		self.monitor_excel()
@@ -571,36 +745,75 @@ class SmartExcelMapper:
 			self.root.after(3000, self.monitor_excel)
 			return
 
-		try:
-			current_status = self.check_excel_status()
+		def done(result):
+			if result:
+				self.sync_excel_connection(*result)
+			self.schedule_excel_monitor()
 
-			# 記錄上次的連接狀態，用於檢測狀態變化
-			if not hasattr(self, '_last_excel_status'):
-				self._last_excel_status = ""
+		def failed(error):
+			# 監控過程中的錯誤不要打擾用戶
+			self.schedule_excel_monitor()
+
+		# 在工作執行緒中檢查；上一次檢查完成後才排下一次，長時間寫入時不會累積
+		self.worker.submit(self.poll_excel, done, failed, name="檢查Excel")
+
+	def schedule_excel_monitor(self):
+		# 已連接時每3秒檢查一次，Excel未開啟時逐漸拉長間隔
+		self.root.after(int(self.connection.next_delay() * 1000), self.monitor_excel)
+
+	def poll_excel(self, job):
+		"""（工作執行緒）檢查一次Excel狀態並更新目前的工作簿，沒有變化時回傳None，否則回傳 (變化, 之前是否已連接)"""
+		poll_span = tracing.span('excel_poll')
+		change = self.connection.poll()
+		if not change:
+			# 沒有變化的檢查不記錄
+			return None
+		# 狀態變化時記錄這次檢查及累計的探測次數與耗時
+		poll_span.finish(change=change, state=self.connection.state, **self.connection.stats)
+
+		was_connected = self.active_workbook is not None
+		if self.connection.state == STATE_CONNECTED:
+			# 使用當前活動的工作表
+			self.active_workbook = self.connection.workbook
+			self.active_worksheet = self.connection.worksheet
+		else:
+			self.active_workbook = None
+			self.active_worksheet = None
+			if was_connected:
+				# Excel斷開後事件失效（在此執行緒中釋放），事件計數歸零，斷開期間的修改無法判斷
+				self.change_tracker.detach()
+				self.scan_cache.invalidate()
+		return change, was_connected
 
-			# 如果狀態發生變化，更新顯示
-			if current_status != self._last_excel_status:
-				if current_status.startswith("已連接"):
-					# Excel重新連接，嘗試載入數據
-					if not self._last_excel_status.startswith("已連接"):
-						self.load_excel_data()
-						# 如果有配置，自動重新獲取空格位置
-						self.auto_rescan_on_reconnect()
-						print(f"Excel狀態變化: {self._last_excel_status} → {current_status}")
+	def sync_excel_connection(self, change, was_connected):
+		"""依Excel連接狀態的變化更新界面"""
+		connection = self.connection
 
-				self._last_excel_status = current_status
+		if connection.state == STATE_CONNECTED:
+			self.update_excel_name_display(connection.workbook_name)
 
-		except Exception as e:
-			# 監控過程中的錯誤不要打擾用戶
-			pass
+			if change == 'connected':
+				# Excel重新連接，嘗試載入數據
+				self.load_excel_data()
+				# 如果有配置，自動重新獲取空格位置
+				self.auto_rescan_on_reconnect()
+		else:
+			if was_connected:
+				# 從有連接變成無工作簿或斷開，重置界面
+				self.reset_excel_interface()
 
-		# 每3秒檢查一次
-		self.root.after(3000, self.monitor_excel)
+			if connection.state == STATE_NO_WORKBOOK:
+				self.update_excel_name_display("無工作簿", "gray")
+			else:
+				self.update_excel_name_display("未連接", "gray")
+
+		print(f"Excel狀態變化: {change}")
 
 	def reset_excel_interface(self):
 		"""重置Excel相關界面"""
 		# 清空空格位置
 		self.empty_cells = []
+		self.empty_cells_target = None
 
 		# 更新空格信息顯示
 		self.empty_cells_info.delete(1.0, tk.END)
@@ -612,46 +825,6 @@ class SmartExcelMapper:
 		# 更新匹配狀態
 		self.update_match_status()
 
-	def check_excel_status(self):
-		"""檢查Excel當前狀態"""
-		try:
-			excel_app = win32com.client.GetActiveObject("Excel.Application")
-			active_workbook = excel_app.ActiveWorkbook
-
-			if active_workbook:
-				workbook_name = active_workbook.Name
-				# 更新實例變數，使用當前活動的工作表
-				self.active_workbook = active_workbook
-				self.active_worksheet = active_workbook.ActiveSheet
-
-				self.update_excel_name_display(workbook_name)
-				return f"已連接: {workbook_name}"
-			else:
-				# Excel開啟但沒有工作簿
-				if self.active_workbook is not None:
-					# 從有連接變成無工作簿，重置界面
-					self.reset_excel_interface()
-
-				self.active_workbook = None
-				self.active_worksheet = None
-				self.update_excel_name_display("無工作簿", "gray")
-				return "Excel已開啟但無工作簿"
-
-		except:
-			# Excel未開啟或連接失敗
-			if self.active_workbook is not None:
-				# 從有連接變成斷開，重置界面
-				self.reset_excel_interface()
-
-			self.active_workbook = None
-			self.active_worksheet = None
-			self.update_excel_name_display("未連接", "gray")
-			# 在自動模式下顯示等待，手動模式顯示未連接
-			if self.auto_detect_mode:
-				return "等待Excel開啟..."
-			else:
-				return "未連接Excel"
-
 	def auto_rescan_on_reconnect(self):
 		"""Excel重新連接時自動重新掃描"""
 		try:
@@ -660,7 +833,7 @@ class SmartExcelMapper:
 
 			if target_field:
 				# 靜默重新獲取空格位置
-				self.scan_empty_cells()
+				self.scan_empty_cells(quiet=True)
 				print(f"Excel重新連接，已自動重新掃描欄位: {target_field}")
 
 		except Exception as e:
@@ -683,26 +856,14 @@ class SmartExcelMapper:
 
 	def connect_excel_windows(self):
 		"""Windows連接"""
-		try:
-			excel_app = win32com.client.GetActiveObject("Excel.Application")
-			self.active_workbook = excel_app.ActiveWorkbook
-
-			if not self.active_workbook:
-				raise Exception("沒有開啟的工作簿")
-
-			# 使用當前活動的工作表
-			self.active_worksheet = self.active_workbook.ActiveSheet
-
-			workbook_name = self.active_workbook.Name
-			self.update_excel_name_display(workbook_name)
-			self.load_excel_data()
-
-		except Exception as e:
+		def failed():
 			# 在自動模式下，不做任何操作，讓監控繼續等待Excel開啟
 			# 在手動模式下，直接跳轉到文件選擇
 			if not self.auto_detect_mode:
 				self.manual_excel_setup()
 
+		self.connect_excel(failed)
+
 	def manual_excel_setup(self):
 		"""手動選擇Excel文件"""
 		# 在手動模式下，直接選擇文件而不顯示"連接失敗"訊息
@@ -720,117 +881,62 @@ class SmartExcelMapper:
 
 			if file_path:
 				try:
-					self.excel_workbook = load_workbook(file_path, data_only=True)
-					# 使用活動的工作表
-					self.excel_sheet = self.excel_workbook.active
+					# 只讀取活動的工作表名稱；掃描時逐行解析，寫入時只修補該工作表
+					self.excel_sheet_name = active_sheet_name(file_path)
+					self.excel_path = file_path
 					filename = os.path.basename(file_path)
 					self.update_excel_name_display(filename, "blue")
-					self.load_excel_data()
 				except Exception as e:
 					messagebox.showerror("錯誤", f"載入Excel失敗：{str(e)}")
 
-	def load_excel_data(self):
-		"""載入Excel數據"""
-		try:
-			# 更新到當前的 ActiveSheet
-			if self.active_workbook:
-				self.active_worksheet = self.active_workbook.ActiveSheet
-
-			if self.active_worksheet:
-				# 從COM接口讀取
-				used_range = self.active_worksheet.UsedRange
-				values = used_range.Value
-				if isinstance(values, tuple):
-					self.excel_data = [list(row) if isinstance(row, tuple) else [row] for row in values]
-				else:
-					self.excel_data = [[values]]
-			elif self.excel_sheet:
-				# 從openpyxl讀取
-				self.excel_data = []
-				for row in self.excel_sheet.iter_rows(values_only=True):
-					self.excel_data.append(list(row))
+	def get_sheet_source(self):
+		"""（工作執行緒）取得目前工作表的數據來源"""
+		if self.active_worksheet is not None:
+			# 從COM接口讀取，以SheetChange/SheetCalculate事件判斷是否變更
+			self.change_tracker.attach(self.active_worksheet.Application)
+			self.sheet_source = ComSheetSource(self.active_workbook, self.active_worksheet,
+											   self.change_tracker)
+		else:
+			# 檔案模式不保留快照，掃描時直接逐行讀取檔案
+			self.sheet_source = None
+		return self.sheet_source
+
+	def get_backend(self):
+		"""（工作執行緒）目前工作表的後端：COM模式使用Excel，檔案模式使用最快的可用讀取方式"""
+		# 更新到當前的 ActiveSheet
+		if self.active_workbook is not None:
+			self.active_worksheet = self.active_workbook.ActiveSheet
 
-		except Exception as e:
-			messagebox.showerror("錯誤", f"載入Excel數據失敗：{str(e)}")
-
-	def find_field_position(self, field_name):
-		"""尋找欄位位置"""
-		for row_idx, row in enumerate(self.excel_data):
-			for col_idx, cell in enumerate(row):
-				if cell and field_name in str(cell):
-					return (row_idx, col_idx)
-		return None
-
-	def find_second_keyword_in_column(self, first_row, col_idx, second_keyword):
-		"""在同一欄中往下尋找目標欄位"""
-		# 從定位列的下一行開始往下找
-		for row_idx in range(first_row + 1, len(self.excel_data)):
-			if col_idx < len(self.excel_data[row_idx]):
-				cell = self.excel_data[row_idx][col_idx]
-				if cell and second_keyword in str(cell):
-					return row_idx
-		return None
-
-	def scan_vertical_empty_cells(self, field_row, field_col):
-		"""垂直獲取空格位置"""
-		empty_cells = []
-		current_row = field_row + 1
-
-		while current_row < len(self.excel_data):
-			row_empty_count = 0
-			row_has_content = False
-
-			for col_offset in range(MAX_HORIZONTAL_SCAN_RANGE):
-				check_col = field_col + col_offset
-				if check_col < len(self.excel_data[current_row]):
-					cell_value = self.excel_data[current_row][check_col]
-					cell_str = str(cell_value).strip() if cell_value is not None else ''
-
-					if not self.is_cell_empty(cell_value):
-						row_has_content = True
-						break
-
-					col_letter = self.get_excel_column_name(check_col)
-					cell_position = f"{col_letter}{current_row + 1}"
-					empty_cells.append({
-						'position': cell_position,
-						'row': current_row,
-						'col': check_col,
-						'value': cell_value
-					})
-					row_empty_count += 1
-				else:
-					break
-
-			if row_has_content or row_empty_count == 0:
-				break
-
-			current_row += 1
-
-		return empty_cells
-
-	def scan_horizontal_empty_cells(self, field_row, field_col):
-		"""水平獲取空格位置"""
-		empty_cells = []
-		for col_offset in range(1, MAX_VERTICAL_SCAN_RANGE):
-			check_col = field_col + col_offset
-			check_row = field_row + 1
-			if (check_row < len(self.excel_data) and
-				check_col < len(self.excel_data[check_row])):
-				cell_value = self.excel_data[check_row][check_col]
-				if self.is_cell_empty(cell_value):
-					col_letter = self.get_excel_column_name(check_col)
-					cell_position = f"{col_letter}{check_row + 1}"
-					empty_cells.append({
-						'position': cell_position,
-						'row': check_row,
-						'col': check_col,
-						'value': cell_value
-					})
-		return empty_cells
-
-	def scan_empty_cells(self):
-		"""獲取空格位置（支援兩段定位）"""
+		if self.active_worksheet is not None:
+			# 需要完整數據時才重新載入整個UsedRange
+			return ComSheetBackend(self.active_workbook, self.active_worksheet, self.refresh_sheet_model,
+								   self.get_sheet_source())
+
+		if self.excel_path:
+			return open_file_backend(self.excel_path, self.excel_sheet_name)
+		raise MappingError("請先連接Excel")
+
+	def load_excel_data(self, force=False):
+		"""在工作執行緒中載入Excel數據"""
+		def failed(error):
+			messagebox.showerror("錯誤", f"載入Excel數據失敗：{str(error)}")
+
+		self.worker.submit(lambda job: self.refresh_sheet_model(force), on_error=failed, name="載入Excel數據")
+
+	def refresh_sheet_model(self, force=False):
+		"""（工作執行緒）更新到當前的 ActiveSheet 並取得工作表數據（未變更時沿用快照）"""
+		if self.active_workbook is not None:
+			self.active_worksheet = self.active_workbook.ActiveSheet
+
+		source = self.get_sheet_source()
+		if source:
+			with tracing.span('sheet_load', backend='com') as load_span:
+				self.sheet_model = self.sheet_snapshot.refresh(source, force)
+				load_span.set(rows=len(self.sheet_model))
+		return self.sheet_model
+
+	def scan_empty_cells(self, quiet=False):
+		"""獲取空格位置（支援兩段定位），在工作執行緒中定位"""
 		first_keyword = self.first_keyword_var.get().strip()
 		second_keyword = self.field_var.get().strip()
 
@@ -838,149 +944,201 @@ class SmartExcelMapper:
 			messagebox.showwarning("警告", "請輸入目標欄位")
 			return
 
-		if not self.excel_data:
+		if self.active_workbook is None and not self.excel_path:
 			messagebox.showwarning("警告", "請先連接Excel")
 			return
 
-		# 更新到當前的 ActiveSheet 並重新載入數據
-		if self.active_workbook:
-			self.active_worksheet = self.active_workbook.ActiveSheet
-			self.load_excel_data()
-
-		try:
-			field_row = None
-			field_col = None
-
-			# 如果有定位列，使用兩段定位
-			if first_keyword:
-				# 1. 先找定位列
-				first_position = self.find_field_position(first_keyword)
-				if not first_position:
-					# 清空之前的結果
-					self.empty_cells = []
-					self.display_empty_cells_info()
-					self.spaces_count_label.config(text="找到空格: 0 個")
-					self.update_match_status()
-					messagebox.showwarning("警告", f"找不到定位列: {first_keyword}")
-					return
-
-				first_row, first_col = first_position
-
-				# 2. 在同一列往下找目標欄位
-				second_row = self.find_second_keyword_in_column(first_row, first_col, second_keyword)
-				if second_row is None:
-					# 清空之前的結果
-					self.empty_cells = []
-					self.display_empty_cells_info()
-					self.spaces_count_label.config(text="找到空格: 0 個")
-					self.update_match_status()
-					messagebox.showwarning("警告",
-						f"在定位列 '{first_keyword}' 的同一欄中\n往下找不到目標欄位: {second_keyword}")
-					return
-
-				field_row = second_row
-				field_col = first_col
-
-			else:
-				# 沒有定位列，直接找目標欄位
-				field_position = self.find_field_position(second_keyword)
-				if not field_position:
-					# 清空之前的結果
-					self.empty_cells = []
-					self.display_empty_cells_info()
-					self.spaces_count_label.config(text="找到空格: 0 個")
-					self.update_match_status()
-					messagebox.showwarning("警告", f"找不到目標欄位: {second_keyword}")
-					return
-
-				field_row, field_col = field_position
-
-			# 3. 在目標欄位下方獲取空格位置
-			empty_cells = self.scan_vertical_empty_cells(field_row, field_col)
-
-			if not empty_cells:
-				empty_cells = self.scan_horizontal_empty_cells(field_row, field_col)
-
+		def done(result):
+			empty_cells, self.empty_cells_target = result
 			self.empty_cells = empty_cells
 			self.display_empty_cells_info()
 			self.spaces_count_label.config(text=f"找到空格: {len(empty_cells)} 個")
 			self.update_match_status()
+			self.update_cache_status()
 
 			if not empty_cells:
-				if first_keyword:
-					messagebox.showwarning("警告",
-						f"在目標欄位 '{second_keyword}' 下方沒有找到空白位置")
-				else:
-					messagebox.showwarning("警告",
-						f"在目標欄位 '{second_keyword}' 下方沒有找到空白位置")
+				messagebox.showwarning("警告",
+					f"在目標欄位 '{second_keyword}' 下方沒有找到空白位置")
 
-		except Exception as e:
-			messagebox.showerror("錯誤", f"掃描失敗：{str(e)}")
+		def failed(error):
+			if not isinstance(error, MappingError):
+				messagebox.showerror("錯誤", f"掃描失敗：{str(error)}")
+				return
+			# 清空之前的結果
+			self.empty_cells = []
+			self.empty_cells_target = None
+			self.display_empty_cells_info()
+			self.spaces_count_label.config(text="找到空格: 0 個")
+			self.update_match_status()
+			self.update_cache_status()
+			messagebox.showwarning("警告", str(error))
+
+		self.run_excel_job(lambda job: self.find_empty_cells(job, first_keyword, second_keyword),
+						   done, "獲取空格位置", failed, quiet=quiet)
+
+	def find_empty_cells(self, job, first_keyword, second_keyword):
+		"""（工作執行緒）定位目標欄位，回傳 (空格位置, 工作表識別)，找不到時拋出MappingError"""
+		# COM模式優先使用Excel的Find，只讀取目標欄位附近的區塊；檔案模式逐行讀取，找到空格區塊即停止
+		# 工作表內容未變更時直接使用上次的結果
+		backend = self.get_backend()
+		job.check_cancelled()
+		with tracing.span('scan', backend=backend.name) as scan_span:
+			fingerprint = backend.fingerprint()
+			empty_cells = self.scan_cache.get(fingerprint, first_keyword, second_keyword)
+			if empty_cells is None:
+				empty_cells = backend.find(first_keyword, second_keyword)
+				self.scan_cache.put(fingerprint, first_keyword, second_keyword, empty_cells)
+				scan_span.set(cache='miss')
+				if backend.name == 'xlsx':
+					scan_span.set(rows_read=backend.rows_read)
+			else:
+				scan_span.set(cache='hit')
+			stats = self.scan_cache.stats
+			scan_span.set(cells=len(empty_cells), cache_hits=stats['hits'], cache_misses=stats['misses'],
+						  cache_entries=stats['entries'])
+		return empty_cells, backend.identity()
+
+	def search_all_sheets(self):
+		"""在所有工作表中搜尋目標欄位（COM模式包含所有開啟的工作簿）"""
+		first_keyword = self.first_keyword_var.get().strip()
+		second_keyword = self.field_var.get().strip()
 
-	def scan_selection_range(self):
-		"""使用Excel中的選取範圍作為目標位置"""
-		if not self.excel_data:
+		if not second_keyword:
+			messagebox.showwarning("警告", "請輸入目標欄位")
+			return
+
+		if self.active_workbook is None and not self.excel_path:
 			messagebox.showwarning("警告", "請先連接Excel")
 			return
 
-		try:
-			# 更新到當前的 ActiveSheet
-			if self.active_workbook:
-				self.active_worksheet = self.active_workbook.ActiveSheet
-				self.load_excel_data()
+		def search(job):
+			searched = [0]
+
+			def on_hit(hit):
+				searched[0] += 1
+				job.report(searched[0], None, "已搜尋工作表")
+				job.check_cancelled()
 
-			# 檢查是否有活動的工作表
-			if not self.active_worksheet:
-				messagebox.showwarning("警告", "此功能需要COM模式連接Excel\n請確認Excel已開啟並處於自動偵測模式")
+			with tracing.span('search', backend='com' if self.active_workbook is not None else 'file') as search_span:
+				if self.active_workbook is not None:
+					workbooks = list(self.active_workbook.Application.Workbooks)
+					hits = search_com(workbooks, first_keyword, second_keyword, self.active_worksheet, on_hit)
+				else:
+					# 檔案模式以程序池並行掃描各工作表
+					hits = search_files([self.excel_path], first_keyword, second_keyword, on_hit=on_hit)
+				search_span.set(sheets=len(hits), found=sum(1 for hit in hits if hit['cells']))
+			return hits
+
+		def done(hits):
+			# 空格數量與已選取的CSV元素相同者排在前面
+			hits = rank_hits(hits, len(self.csv_table.selected) or None)
+
+			found = [hit for hit in hits if hit['cells']]
+			if not found:
+				messagebox.showwarning("警告", f"所有工作表中都找不到目標欄位: {second_keyword}")
 				return
+			self.show_search_results(found)
 
-			# 獲取選取範圍
-			selection = self.active_worksheet.Application.Selection
+		self.run_excel_job(search, done, "搜尋所有工作表",
+						   lambda error: messagebox.showerror("錯誤", f"搜尋失敗：{str(error)}"))
 
-			empty_cells = []
+	def show_search_results(self, hits):
+		"""列出搜尋結果，選擇後切換到該工作表並使用其空格位置"""
+		popup = tk.Toplevel(self.root)
+		popup.title("搜尋結果")
+		popup.geometry("520x260")
+		popup.transient(self.root)
 
-			# 處理選取範圍
-			# 處理單個儲存格或範圍
-			try:
-				# 嘗試遍歷選取的儲存格
-				for cell in selection:
-					row_num = cell.Row - 1  # 轉換為0-based索引
-					col_num = cell.Column - 1  # 轉換為0-based索引
-					col_letter = self.get_excel_column_name(col_num)
-					cell_position = f"{col_letter}{row_num + 1}"
-
-					empty_cells.append({
-						'position': cell_position,
-						'row': row_num,
-						'col': col_num,
-						'value': cell.Value
-					})
-			except:
-				# 如果是單個儲存格
-				row_num = selection.Row - 1
-				col_num = selection.Column - 1
-				col_letter = self.get_excel_column_name(col_num)
-				cell_position = f"{col_letter}{row_num + 1}"
-
-				empty_cells.append({
-					'position': cell_position,
-					'row': row_num,
-					'col': col_num,
-					'value': selection.Value
-				})
+		listbox_frame = ttk.Frame(popup)
+		listbox_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+		result_listbox = tk.Listbox(listbox_frame, height=10)
+		result_scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=result_listbox.yview)
+		result_listbox.configure(yscrollcommand=result_scrollbar.set)
+		for hit in hits:
+			result_listbox.insert(tk.END, format_hit(hit))
+		result_listbox.selection_set(0)
+
+		result_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+		result_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+		button_frame = ttk.Frame(popup)
+		button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+		def on_select():
+			selection = result_listbox.curselection()
+			popup.destroy()
+			if selection:
+				self.use_search_hit(hits[selection[0]])
+
+		ttk.Button(button_frame, text="取消", command=popup.destroy).pack(side=tk.RIGHT)
+		ttk.Button(button_frame, text="使用", command=on_select).pack(side=tk.RIGHT)
+
+		result_listbox.bind('<Double-Button-1>', lambda e: on_select())
+		popup.bind('<Escape>', lambda e: popup.destroy())
+
+	def use_search_hit(self, hit):
+		"""切換到搜尋結果的工作表並使用其空格位置"""
+		def switch(job):
+			if self.active_workbook is not None:
+				workbook = self.active_workbook.Application.Workbooks(hit['workbook'])
+				workbook.Activate()
+				workbook.Worksheets(hit['sheet']).Activate()
+				self.active_workbook = workbook
+				self.active_worksheet = workbook.ActiveSheet
+				self.refresh_sheet_model()
+				display = workbook.Name, "black"
+			else:
+				self.excel_path = hit['workbook']
+				self.excel_sheet_name = hit['sheet']
+				display = f"{os.path.basename(self.excel_path)} / {hit['sheet']}", "blue"
+			return display, self.get_backend().identity()
+
+		def done(result):
+			display, self.empty_cells_target = result
+			self.update_excel_name_display(*display)
+			self.empty_cells = hit['cells']
+			self.display_empty_cells_info()
+			self.spaces_count_label.config(text=f"找到空格: {len(self.empty_cells)} 個")
+			self.update_match_status()
+
+		self.run_excel_job(switch, done, "切換工作表",
+						   lambda error: messagebox.showerror("錯誤", f"切換工作表失敗：{str(error)}"))
+
+	def scan_selection_range(self):
+		"""使用Excel中的選取範圍作為目標位置"""
+		if self.active_workbook is None and not self.excel_path:
+			messagebox.showwarning("警告", "請先連接Excel")
+			return
+
+		def read_selection(job):
+			# 更新到當前的 ActiveSheet
+			if self.active_workbook is not None:
+				self.refresh_sheet_model()
+			# 獲取選取範圍（只有COM模式支援）
+			backend = self.get_backend()
+			return backend.selection(), backend.identity()
+
+		def done(result):
+			empty_cells, target = result
 			if not empty_cells:
 				messagebox.showwarning("警告", "未選取任何儲存格")
 				return
 
 			# 更新空格列表
 			self.empty_cells = empty_cells
+			self.empty_cells_target = target
 			self.display_empty_cells_info_for_selection()
 			self.spaces_count_label.config(text=f"選取範圍: {len(empty_cells)} 個儲存格")
 			self.update_match_status()
 
-		except Exception as e:
-			messagebox.showerror("錯誤", f"讀取選取範圍失敗：{str(e)}")
+		def failed(error):
+			if isinstance(error, MappingError):
+				messagebox.showwarning("警告", str(error))
+			else:
+				messagebox.showerror("錯誤", f"讀取選取範圍失敗：{str(error)}")
+
+		self.run_excel_job(read_selection, done, "讀取選取範圍", failed)
 
 	def display_empty_cells_info(self):
 		"""顯示空格信息"""
@@ -1024,10 +1182,14 @@ class SmartExcelMapper:
 	def execute_smart_mapping(self):
 		"""寫入"""
 		# 獲取選中的CSV項目
-		selected_items = self.csv_tree.selection()
+		selected_items = self.csv_table.selected_indices()
 
 		# 詳細的防呆檢查
-		if not self.csv_data:
+		if self.csv_loader:
+			messagebox.showwarning("警告", "CSV仍在載入中，請稍候")
+			return
+
+		if not self.csv_model:
 			messagebox.showerror("錯誤", "請先載入CSV文件")
 			return
 
@@ -1048,7 +1210,7 @@ class SmartExcelMapper:
 			return
 
 		# 檢查Excel連接狀態
-		if not self.active_worksheet and not self.excel_sheet:
+		if self.active_worksheet is None and not self.excel_path:
 			messagebox.showerror("錯誤", "Excel連接已斷開，請重新連接Excel")
 			return
 
@@ -1072,64 +1234,15 @@ class SmartExcelMapper:
 			return
 
 		try:
-			filled_count = 0
-
-			for i, item_id in enumerate(selected_items):
-				# 獲取選中項目的索引
-				item_index = self.csv_tree.index(item_id)
-				csv_row = self.csv_data[item_index]
-
-				# 決定使用Dev還是Actual（Dev優先）
-				dev_value = csv_row.get('Dev', '')
-				actual_value = csv_row.get('Actual', '')
-
-				use_value = None
-				if dev_value and str(dev_value).strip() and str(dev_value).strip().lower() != 'n/a':
-					use_value = str(dev_value).strip()
-				elif actual_value and str(actual_value).strip() and str(actual_value).strip().lower() != 'n/a':
-					use_value = str(actual_value).strip()
-
-				if use_value:
-					empty_cell = self.empty_cells[i]
-					row_num = empty_cell['row'] + 1  # Excel行從1開始
-					col_num = empty_cell['col'] + 1  # Excel列從1開始
-
-					# 轉換數值
-					try:
-						numeric_value = float(use_value)
-					except ValueError:
-						numeric_value = use_value
-
-					# 填入數據
-					if self.active_worksheet:
-						self.active_worksheet.Cells(row_num, col_num).Value = numeric_value
-					elif self.excel_sheet:
-						self.excel_sheet.cell(row=row_num, column=col_num, value=numeric_value)
+			plan = build_write_plan(self.csv_model, selected_items, self.empty_cells)
+		except Exception as e:
+			messagebox.showerror("錯誤", f"寫入失敗：{str(e)}")
+			return
 
-					filled_count += 1
-
-			if self.excel_workbook and not self.active_worksheet:
-				# openpyxl模式，自動儲存（覆寫原檔案）
-				try:
-					if hasattr(self.excel_workbook, 'filename') and self.excel_workbook.filename:
-						self.excel_workbook.save(self.excel_workbook.filename)
-					else:
-						# 若無原始檔名，則另存新檔
-						save_path = filedialog.asksaveasfilename(
-							title="保存Excel文件",
-							defaultextension=".xlsx",
-							filetypes=[("Excel files", "*.xlsx")]
-						)
-						if save_path:
-							self.excel_workbook.save(save_path)
-				except Exception as e:
-					messagebox.showwarning("警告", f"自動儲存Excel失敗：{str(e)}")
-			elif self.active_workbook:
-				# Windows COM模式，自動儲存
-				try:
-					self.active_workbook.Save()
-				except Exception as e:
-					messagebox.showwarning("警告", f"自動儲存Excel失敗：{str(e)}")
+		def done(result):
+			filled_count, save_error = result
+			if save_error:
+				messagebox.showwarning("警告", f"自動儲存Excel失敗：{str(save_error)}")
 
 			# 構建成功訊息
 			if first_keyword:
@@ -1144,18 +1257,212 @@ class SmartExcelMapper:
 					f"請檢查Excel文件確認結果")
 
 			messagebox.showinfo("成功", success_msg)
+			self.clear_csv()
+
+		# 填入數據（檔案模式只修補目標工作表的XML，儲存時寫入）
+		target = self.empty_cells_target
+		self.run_excel_job(lambda job: self.write_plan(job, self.get_backend(), plan, target), done, "寫入Excel",
+						   lambda error: messagebox.showerror("錯誤", f"寫入失敗：{str(error)}"))
+
+	def write_plan(self, job, backend, plan, target=None):
+		"""（工作執行緒）寫入並自動儲存，回傳 (寫入數量, 儲存失敗的例外)
+
+		target: 獲取空格位置時的工作表識別，與目前的工作表不同時拒絕寫入（使用者已切換工作表）
+		開始寫入後不可取消，避免只寫入一部分
+		"""
+		if target is not None and backend.identity() != target:
+			raise MappingError("目前的工作表與獲取空格位置時不同，已取消寫入\n請切換回原工作表或重新獲取空格位置")
+		job.commit()
+		total = len(plan)
+		with tracing.span('write', backend=backend.name, cells=total) as write_span:
+			filled_count = backend.write_cells(plan, lambda done, _: job.report(done, total, "寫入"))
+			if backend.name == 'com':
+				stats = backend.stats
+				write_span.set(calls=stats['calls'], saved_calls=stats['saved'])
+
+		# 寫入的值直接更新到快照
+		self.sheet_snapshot.apply_writes(self.sheet_source, plan)
+
+		# 自動儲存（檔案模式覆寫原檔案）
+		save_error = None
+		try:
+			with tracing.span('save', backend=backend.name) as save_span:
+				method = backend.save()
+				save_span.set(method=method)
+		except Exception as e:
+			save_error = e
+
+		# 寫入後該工作表的掃描結果失效
+		fingerprint = backend.fingerprint()
+		if fingerprint:
+			self.scan_cache.invalidate(fingerprint[0])
+		return filled_count, save_error
+
+	def clear_csv(self):
+		"""寫入完成後清空CSV資料與介面"""
+		self.csv_model = CsvModel()
+		self.display_csv_data()
+		self.csv_selection_label.config(text="已選取: 0 個元素")
+		self.csv_name_label.config(text="未載入", foreground="gray")
+		self.update_match_status()
 
-			# 清空CSV資料與介面
-			self.csv_data = []
-			for item in self.csv_tree.get_children():
-				self.csv_tree.delete(item)
-			self.csv_tree.selection_remove(self.csv_tree.selection())
-			self.csv_selection_label.config(text="已選取: 0 個元素")
-			self.csv_name_label.config(text="未載入", foreground="gray")
-			self.update_match_status()
+	def choose_config_set(self):
+		"""選擇要一起套用的配置（左側搜尋，右側為依序套用的配置）"""
+		popup = tk.Toplevel(self.root)
+		popup.title("套用多個配置")
+		popup.geometry("620x360")
+		popup.transient(self.root)
+
+		search_frame = ttk.Frame(popup)
+		search_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+		ttk.Label(search_frame, text="搜尋:").pack(side=tk.LEFT)
+		search_var = tk.StringVar()
+		search_entry = ttk.Entry(search_frame, textvariable=search_var)
+		search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+
+		lists_frame = ttk.Frame(popup)
+		lists_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+		# 搜尋結果（只顯示可見的行）
+		config_listbox = tk.Listbox(lists_frame, height=12, exportselection=False)
+		config_scrollbar = ttk.Scrollbar(lists_frame, orient=tk.VERTICAL)
+		config_list = VirtualListbox(config_listbox, config_scrollbar)
+		config_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+		config_scrollbar.pack(side=tk.LEFT, fill=tk.Y)
 
-		except Exception as e:
-			messagebox.showerror("錯誤", f"寫入失敗：{str(e)}")
+		move_frame = ttk.Frame(lists_frame)
+		move_frame.pack(side=tk.LEFT, padx=10)
+
+		chosen_listbox = tk.Listbox(lists_frame, height=12, exportselection=False)
+		chosen_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+		button_frame = ttk.Frame(popup)
+		button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+		count_label = ttk.Label(button_frame, text="已選: 0 個配置", foreground="gray")
+		count_label.pack(side=tk.LEFT)
+
+		config_index = self.get_config_index()
+		chosen = []
+		pending = [None]
+
+		def update_results():
+			pending[0] = None
+			query = search_var.get()
+			config_list.set_items(config_index.search(query) if config_index else list(self.config_names))
+
+		def on_search_change(*args):
+			if pending[0]:
+				popup.after_cancel(pending[0])
+			pending[0] = popup.after(SEARCH_DELAY_MS, update_results)
+
+		def update_chosen():
+			chosen_listbox.delete(0, tk.END)
+			if chosen:
+				chosen_listbox.insert(tk.END, *chosen)
+			count_label.config(text=f"已選: {len(chosen)} 個配置")
+
+		def add_config(name=None):
+			name = name or config_list.selected_item()
+			if name and name not in chosen:
+				chosen.append(name)
+				update_chosen()
+
+		def remove_config():
+			selection = chosen_listbox.curselection()
+			if selection:
+				del chosen[selection[0]]
+				update_chosen()
+
+		def on_apply():
+			if not chosen:
+				messagebox.showwarning("警告", "請選擇要套用的配置", parent=popup)
+				return
+			popup.destroy()
+			self.apply_config_set(list(chosen))
+
+		ttk.Button(move_frame, text="加入 >", command=add_config).pack(pady=(0, 5))
+		ttk.Button(move_frame, text="< 移除", command=remove_config).pack()
+		ttk.Button(button_frame, text="取消", command=popup.destroy).pack(side=tk.RIGHT)
+		ttk.Button(button_frame, text="套用", command=on_apply).pack(side=tk.RIGHT)
+
+		update_results()
+		search_var.trace_add('write', on_search_change)
+
+		config_listbox.bind('<Double-Button-1>', lambda e: add_config(config_list.item_at(e.y)))
+		chosen_listbox.bind('<Double-Button-1>', lambda e: remove_config())
+		chosen_listbox.bind('<Delete>', lambda e: remove_config())
+		search_entry.bind('<Down>', lambda e: config_list.move(1))
+		search_entry.bind('<Up>', lambda e: config_list.move(-1))
+		search_entry.bind('<Return>', lambda e: add_config())
+		popup.bind('<Escape>', lambda e: popup.destroy())
+		search_entry.focus_set()
+
+	def apply_config_set(self, config_names):
+		"""一次套用多個配置：工作表只載入一次、定位全部配置，合併寫入後只儲存一次"""
+		if self.csv_loader:
+			messagebox.showwarning("警告", "CSV仍在載入中，請稍候")
+			return
+
+		if not self.csv_model:
+			messagebox.showerror("錯誤", "請先載入CSV文件")
+			return
+
+		if self.active_workbook is None and not self.excel_path:
+			messagebox.showwarning("警告", "請先連接Excel")
+			return
+
+		configs = [(name, self.get_config(name)) for name in config_names]
+		missing = [name for name, config_data in configs if config_data is None]
+		if missing:
+			messagebox.showwarning("警告", f"找不到配置: {', '.join(missing)}")
+			return
+
+		csv_model = self.csv_model
+
+		def locate(job):
+			backend = self.get_backend()
+			if backend.name == 'com':
+				# COM模式沿用工作表快照
+				sheet_model = self.refresh_sheet_model()
+			else:
+				with tracing.span('sheet_load', backend=backend.name) as load_span:
+					sheet_model = backend.read_all()
+					load_span.set(rows=len(sheet_model))
+			job.check_cancelled()
+
+			with tracing.span('locate_config_set', backend=backend.name, configs=len(configs)):
+				plan, counts = plan_config_set(configs, csv_model, sheet_model)
+			return backend, plan, counts
+
+		def located(result):
+			backend, plan, counts = result
+			lines = [f"{name}: {count} 個" for name, count in counts.items()]
+			if len(lines) > 15:
+				lines = lines[:15] + [f"... 另外 {len(lines) - 15} 個配置"]
+			confirm_msg = (f"即將以 {len(configs)} 個配置填入 {len(plan)} 個數據到Excel\n\n"
+				+ "\n".join(lines) + "\n\n確定要執行嗎？")
+			if not messagebox.askyesno("確認執行", confirm_msg):
+				return
+
+			# 所有配置的儲存格一起合併為區塊寫入，只儲存一次
+			self.run_excel_job(lambda job: self.write_plan(job, backend, plan), written, "寫入Excel",
+							   lambda error: messagebox.showerror("錯誤", f"寫入失敗：{str(error)}"))
+
+		def written(result):
+			filled_count, save_error = result
+			if save_error:
+				messagebox.showwarning("警告", f"自動儲存Excel失敗：{str(save_error)}")
+			messagebox.showinfo("成功", f"寫入完成！\n\n已以 {len(configs)} 個配置填入 {filled_count} 個數據\n"
+				f"請檢查Excel文件確認結果")
+			self.clear_csv()
+
+		def failed(error):
+			if isinstance(error, MappingError):
+				messagebox.showwarning("警告", str(error))
+			else:
+				messagebox.showerror("錯誤", f"套用配置失敗：{str(error)}")
+
+		self.run_excel_job(locate, located, "定位配置", failed)
 
 	def save_config(self):
 		"""保存配置"""
@@ -1182,13 +1489,7 @@ class SmartExcelMapper:
 			return
 
 		# 只保存 element
-		selected_items = self.csv_tree.selection()
-		selected_elements = []
-		for item_id in selected_items:
-			item_index = self.csv_tree.index(item_id)
-			if item_index < len(self.csv_data):
-				csv_row = self.csv_data[item_index]
-				selected_elements.append(csv_row.get('Element', ''))
+		selected_elements = self.csv_model.elements_at(self.csv_table.selected_indices())
 
 		config_data = {
 			'first_keyword': self.first_keyword_var.get(),  # 保存定位列
@@ -1196,11 +1497,15 @@ class SmartExcelMapper:
 			'selected_elements': selected_elements,
 		}
 
-		self.field_mappings[config_name] = config_data
+		if not self.config_store:
+			messagebox.showerror("錯誤", "配置庫無法使用，無法保存配置")
+			return
 
 		try:
-			with open(FIELD_MAPPING_PATH, 'w', encoding='utf-8') as f:
-				json.dump(self.field_mappings, f, ensure_ascii=False, indent=2)
+			# 只更新這一個配置
+			self.config_store.put(config_name, config_data)
+			if self.config_index is not None:
+				self.config_index.add(config_name, config_data)
 
 			self.update_config_list()
 			self.config_var.set(config_name)
@@ -1213,14 +1518,14 @@ class SmartExcelMapper:
 	def load_config(self):
 		"""套用配置"""
 		config_name = self.config_var.get().strip()
-		if not config_name or config_name not in self.field_mappings:
+		config_data = self.get_config(config_name)
+		if config_data is None:
 			messagebox.showwarning("警告", "請選擇有效的配置")
 			return
 
 		try:
-			config_data = self.field_mappings[config_name]
 
-			if not self.active_worksheet and not self.excel_sheet:
+			if self.active_worksheet is None and not self.excel_path:
 				messagebox.showwarning("警告", "請先連接Excel，然後重新套用配置")
 				return
 
@@ -1245,26 +1550,41 @@ class SmartExcelMapper:
 			self.scan_empty_cells()
 
 			# 自動選取CSV元素
-			if 'selected_elements' in config_data and self.csv_data:
+			if 'selected_elements' in config_data and self.csv_model:
 				self.auto_select_elements(config_data['selected_elements'])
 		except Exception as e:
 			messagebox.showerror("錯誤", f"套用配置失敗：{str(e)}")
 
 	def load_configs(self):
-		"""套用保存的配置"""
+		"""開啟配置庫（只讀取名稱，舊的JSON配置檔第一次開啟時自動匯入）"""
 		try:
-			if os.path.exists(FIELD_MAPPING_PATH):
-				with open(FIELD_MAPPING_PATH, 'r', encoding='utf-8') as f:
-					self.field_mappings = json.load(f)
+			self.config_store = ConfigStore()
 		except Exception as e:
-			self.field_mappings = {}
+			self.config_store = None
+			messagebox.showerror("錯誤", f"開啟配置庫失敗：{str(e)}")
 
 		# 更新配置列表
 		self.update_config_list()
 
+	def get_config_index(self):
+		"""配置搜尋索引，第一次使用時從配置庫建立，之後隨保存/刪除更新"""
+		if self.config_index is None and self.config_store:
+			try:
+				self.config_index = ConfigIndex(self.config_store.items())
+			except Exception as e:
+				messagebox.showerror("錯誤", f"建立配置索引失敗：{str(e)}")
+		return self.config_index
+
+	def get_config(self, config_name):
+		"""從配置庫讀取單一配置，不存在時回傳None"""
+		if not config_name or not self.config_store:
+			return None
+		return self.config_store.get(config_name)
+
 	def update_config_list(self):
 		"""更新配置下拉列表"""
-		config_names = list(self.field_mappings.keys())
+		self.config_names = self.config_store.names() if self.config_store else []
+		config_names = self.config_names
 		self.config_combo['values'] = config_names
 
 		# 不自動選擇配置，讓使用者手動選擇
@@ -1277,11 +1597,10 @@ class SmartExcelMapper:
 		"""載入CSV時自動套用當前選中的配置"""
 		try:
 			current_config = self.config_var.get().strip()
-			if not current_config or current_config not in self.field_mappings:
+			config_data = self.get_config(current_config)
+			if config_data is None:
 				return  # 沒有選中配置或配置不存在，自動忽略
 
-			config_data = self.field_mappings[current_config]
-
 			# 檢查配置是否有效（有 field_name 就是有效的關鍵字模式配置）
 			if 'field_name' in config_data and config_data['field_name']:
 				# 設定定位列
@@ -1294,15 +1613,15 @@ class SmartExcelMapper:
 				self.field_var.set(config_data['field_name'])
 
 				# 如果Excel已連接，嘗試獲取空格位置
-				if self.active_worksheet or self.excel_sheet:
+				if self.active_worksheet is not None or self.excel_path:
 					try:
-						self.scan_empty_cells()
+						self.scan_empty_cells(quiet=True)
 					except:
 						# 掃描失敗時自動忽略
 						pass
 
 			# 自動選中對應的CSV元素
-			if 'selected_elements' in config_data and self.csv_data:
+			if 'selected_elements' in config_data and self.csv_model:
 				self.auto_select_elements(config_data['selected_elements'])
 
 		except Exception:
@@ -1311,34 +1630,19 @@ class SmartExcelMapper:
 
 	def auto_select_elements(self, selected_elements):
 		"""根據配置自動選中對應的CSV元素"""
-		if not self.csv_data or not selected_elements:
+		if not self.csv_model or not selected_elements:
 			return
 
-		# 清除當前選擇
-		self.csv_tree.selection_remove(self.csv_tree.selection())
-
-		selected_items = []
-
-		# 只比對 element
-		for config_element_name in selected_elements:
-			for i, csv_row in enumerate(self.csv_data):
-				csv_element = csv_row.get('Element', '')
-				if csv_element == config_element_name:
-					children = self.csv_tree.get_children()
-					if i < len(children):
-						item_id = children[i]
-						selected_items.append(item_id)
-						break
-
-		if selected_items:
-			self.csv_tree.selection_set(selected_items)
-			self.update_selection_info()
+		# 只比對 element，一次設定選取
+		selected_rows = self.csv_model.find_rows(selected_elements)
+		self.csv_table.set_selection(selected_rows)
+		self.update_selection_info()
 
 
 	def delete_config(self):
 		"""刪除配置"""
 		config_name = self.config_var.get().strip()
-		if not config_name or config_name not in self.field_mappings:
+		if not config_name or config_name not in self.config_names:
 			messagebox.showwarning("警告", "請選擇要刪除的配置")
 			return
 
@@ -1350,12 +1654,10 @@ class SmartExcelMapper:
 			return
 
 		try:
-			# 從記憶體中刪除
-			del self.field_mappings[config_name]
-
-			# 保存到檔案
-			with open(FIELD_MAPPING_PATH, 'w', encoding='utf-8') as f:
-				json.dump(self.field_mappings, f, ensure_ascii=False, indent=2)
+			# 從配置庫中刪除（只影響這一個配置）
+			self.config_store.delete(config_name)
+			if self.config_index is not None:
+				self.config_index.remove(config_name)
 
 			# 清空當前選擇
 			self.config_var.set('')
@@ -1367,7 +1669,21 @@ class SmartExcelMapper:
 	def run(self):
 		"""運行程序"""
 		self.root.mainloop()
+		self.worker.shutdown()
 
 if __name__ == "__main__":
+	if len(sys.argv) > 1 and sys.argv[1] == "batch":
+		# 批次模式不建立界面
+		import batch
+		sys.exit(batch.main(sys.argv[2:]))
+
+	if len(sys.argv) > 1 and sys.argv[1] == "search":
+		import sheet_search
+		sys.exit(sheet_search.main(sys.argv[2:]))
+
+	if len(sys.argv) > 1 and sys.argv[1] == "config":
+		import config_store
+		sys.exit(config_store.main(sys.argv[2:]))
+
 	app = SmartExcelMapper()
 	app.run()
\ No newline at end of file
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+掃描結果快取
+以 (工作表, 內容標記, 定位列, 目標欄位, 掃描範圍) 為鍵保存空格位置；
+同一工作表未變更時重複套用配置不需重新定位，寫入後明確清除該工作表的結果
+"""
+
+from collections import OrderedDict
+
+from engine import MAX_HORIZONTAL_SCAN_RANGE, MAX_VERTICAL_SCAN_RANGE
+
+
+SCAN_CACHE_SIZE = 64
+
+
+class ScanCache:
+	"""LRU快取；fingerprint 為 (工作表識別, 內容標記)，None 表示無法判斷是否變更（不快取）"""
+
+	def __init__(self, max_entries=SCAN_CACHE_SIZE):
+		self.max_entries = max_entries
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.invalidations = 0
+
+	@staticmethod
+	def make_key(fingerprint, first_keyword, second_keyword):
+		return (fingerprint, first_keyword, second_keyword,
+				MAX_HORIZONTAL_SCAN_RANGE, MAX_VERTICAL_SCAN_RANGE)
+
+	def get(self, fingerprint, first_keyword, second_keyword):
+		"""回傳快取的空格位置（複本），沒有時回傳None"""
+		if fingerprint is None:
+			self.misses += 1
+			return None
+		key = self.make_key(fingerprint, first_keyword, second_keyword)
+		cells = self.entries.get(key)
+		if cells is None:
+			self.misses += 1
+			return None
+		self.entries.move_to_end(key)
+		self.hits += 1
+		return [dict(cell) for cell in cells]
+
+	def put(self, fingerprint, first_keyword, second_keyword, cells):
+		if fingerprint is None:
+			return
+		key = self.make_key(fingerprint, first_keyword, second_keyword)
+		self.entries[key] = [dict(cell) for cell in cells]
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.max_entries:
+			self.entries.popitem(last=False)
+
+	def invalidate(self, sheet_key=None):
+		"""清除某個工作表的所有結果（None 為全部清除），回傳清除的數量"""
+		if sheet_key is None:
+			removed = len(self.entries)
+			self.entries.clear()
+		else:
+			keys = [key for key in self.entries if key[0][0] == sheet_key]
+			for key in keys:
+				del self.entries[key]
+			removed = len(keys)
+		self.invalidations += removed
+		return removed
+
+	def __len__(self):
+		return len(self.entries)
+
+	@property
+	def stats(self):
+		return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+				'invalidations': self.invalidations}
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作表後端
+統一的工作表操作介面（讀取區塊、定位、寫入儲存格、儲存），由COM、openpyxl及直接解析xlsx三種後端實作；
+檔案模式以最快的可用後端讀取，寫入一律經由就地修補（失敗時改用openpyxl）
+"""
+
+import os
+
+from backends import backend_available, load_backend
+from engine import (MappingError, SheetModel, FieldLocator, ComSheetWriter, OpenpyxlSheetWriter,
+					make_cell_info, values_to_rows)
+from com_locator import locate_in_worksheet, range_address
+from stream_locator import locate_in_file
+from xlsx_patch import XlsxPatchWriter
+from xlsx_reader import XlsxSheetReader
+from tracing import span, traced_locate
+
+
+def slice_region(rows, left, right):
+	"""取出每一行的欄位範圍並補齊寬度"""
+	width = right - left + 1
+	region = []
+	for row in rows:
+		values = list(row[left:right + 1])
+		if len(values) < width:
+			values.extend([None] * (width - len(values)))
+		region.append(values)
+	return region
+
+
+def file_identity(path, sheet_name=None):
+	return (os.path.abspath(path), sheet_name or '')
+
+
+def file_fingerprint(path, sheet_name=None):
+	"""檔案的內容標記：((路徑, 工作表), 修改時間, 大小)"""
+	stat = os.stat(path)
+	return (file_identity(path, sheet_name), stat.st_mtime_ns, stat.st_size)
+
+
+class SheetBackend:
+	"""工作表後端介面（行列皆為 0-based，範圍含邊界）"""
+
+	name = ''
+
+	def read_region(self, top, left, bottom, right):
+		"""讀取矩形區塊，回傳二維列表"""
+		raise NotImplementedError
+
+	def read_all(self):
+		"""讀取整個工作表為 SheetModel"""
+		raise NotImplementedError
+
+	def identity(self):
+		"""工作表識別 (工作簿, 工作表)，用於確認寫入的是定位時的工作表"""
+		raise NotImplementedError
+
+	def fingerprint(self):
+		"""內容標記，第一項為工作表識別；無法判斷是否變更時回傳None（不使用掃描快取）"""
+		return None
+
+	def find(self, first_keyword, second_keyword):
+		"""定位目標欄位並回傳空格位置，找不到時拋出MappingError"""
+		with span('sheet_load', backend=self.name) as load_span:
+			sheet_model = self.read_all()
+			load_span.set(rows=len(sheet_model))
+		return traced_locate(FieldLocator(sheet_model), first_keyword, second_keyword, backend=self.name)
+
+	def write_cells(self, plan, progress=None):
+		"""寫入 [(row, col, value)]，回傳填入數量；progress(已寫入數量, 總數)"""
+		raise NotImplementedError
+
+	def selection(self):
+		"""使用者在Excel中選取的儲存格（只有COM後端支援）"""
+		raise MappingError("此功能需要COM模式連接Excel\n請確認Excel已開啟並處於自動偵測模式")
+
+	def save(self, path=None):
+		"""儲存寫入的內容，回傳使用的儲存方式"""
+		raise NotImplementedError
+
+	def close(self):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class ComSheetBackend(SheetBackend):
+	"""Excel COM後端：使用Excel的Find定位，連續的儲存格以區塊寫入"""
+
+	name = 'com'
+
+	def __init__(self, workbook, worksheet, load_sheet=None, source=None):
+		"""load_sheet: 回傳完整 SheetModel 的函式（預設直接讀取UsedRange）
+		source: ComSheetSource，用於取得變更標記
+		"""
+		self.workbook = workbook
+		self.worksheet = worksheet
+		self.load_sheet = load_sheet or self.read_all
+		self.source = source
+		self.stats = {}
+
+	def identity(self):
+		return (self.worksheet.Parent.FullName, self.worksheet.Name)
+
+	def fingerprint(self):
+		# 沒有SheetChange事件時無法判斷使用者是否修改過
+		return self.source.change_token() if self.source else None
+
+	def read_region(self, top, left, bottom, right):
+		values = self.worksheet.Range(range_address(top, left, bottom, right)).Value
+		return slice_region(values_to_rows(values), 0, right - left)
+
+	def read_all(self):
+		return SheetModel.from_com_worksheet(self.worksheet)
+
+	def find(self, first_keyword, second_keyword):
+		empty_cells, _ = locate_in_worksheet(self.worksheet, first_keyword, second_keyword,
+											 self.load_sheet)
+		return empty_cells
+
+	def write_cells(self, plan, progress=None):
+		writer = ComSheetWriter(self.worksheet, self.workbook)
+		filled_count = writer.write_cells(plan, progress)
+		self.stats = writer.stats
+		return filled_count
+
+	def selection(self):
+		selection = self.worksheet.Application.Selection
+		cells = []
+		try:
+			# 遍歷選取的儲存格
+			for cell in selection:
+				cells.append(make_cell_info(cell.Row - 1, cell.Column - 1, cell.Value))
+		except Exception:
+			# 單個儲存格
+			cells.append(make_cell_info(selection.Row - 1, selection.Column - 1, selection.Value))
+		return cells
+
+	def save(self, path=None):
+		if self.workbook:
+			self.workbook.Save()
+		return 'com'
+
+
+class OpenpyxlSheetBackend(SheetBackend):
+	"""openpyxl後端：讀取時載入快取值（data_only），寫入時另外載入保留公式的工作簿並重新儲存"""
+
+	name = 'openpyxl'
+
+	def __init__(self, path, sheet_name=None):
+		self.path = path
+		self.sheet_name = sheet_name
+		# 以公式載入時讀到的是公式字串而非計算結果，讀取與定位一律使用快取值
+		self.workbook = load_backend('openpyxl').load_workbook(path, data_only=True)
+		self.sheet = self.get_sheet(self.workbook)
+		self.writer = None
+		self.stats = {}
+
+	def get_sheet(self, workbook):
+		try:
+			return workbook[self.sheet_name] if self.sheet_name else workbook.active
+		except KeyError:
+			raise MappingError(f"找不到工作表: {self.sheet_name}")
+
+	def get_writer(self):
+		"""第一次寫入時載入保留公式的工作簿（以data_only儲存會失去所有公式）"""
+		if self.writer is None:
+			workbook = load_backend('openpyxl').load_workbook(self.path)
+			self.writer = OpenpyxlSheetWriter(self.get_sheet(workbook), workbook, self.path)
+		return self.writer
+
+	def read_region(self, top, left, bottom, right):
+		rows = self.sheet.iter_rows(min_row=top + 1, max_row=bottom + 1, min_col=left + 1,
+									max_col=right + 1, values_only=True)
+		return slice_region(rows, 0, right - left)
+
+	def read_all(self):
+		return SheetModel.from_openpyxl_sheet(self.sheet)
+
+	def identity(self):
+		return file_identity(self.path, self.sheet.title)
+
+	def fingerprint(self):
+		return file_fingerprint(self.path, self.sheet.title)
+
+	def write_cells(self, plan, progress=None):
+		# 只寫入記憶體，完成後一次回報
+		filled_count = self.get_writer().write_cells(plan)
+		if progress:
+			progress(filled_count, len(plan))
+		return filled_count
+
+	def save(self, path=None):
+		self.get_writer().save(path)
+		return 'openpyxl'
+
+	def close(self):
+		self.workbook.close()
+		if self.writer:
+			self.writer.workbook.close()
+
+
+class XlsxSheetBackend(SheetBackend):
+	"""直接解析xlsx的後端：以iterparse逐行讀取快取值，寫入時就地修補工作表XML"""
+
+	name = 'xlsx'
+
+	def __init__(self, path, sheet_name=None):
+		self.path = path
+		self.sheet_name = sheet_name
+		self.writer = XlsxPatchWriter(path, sheet_name)
+		self.rows_read = 0
+		self.stats = {}
+
+	def open_reader(self):
+		try:
+			return XlsxSheetReader(self.path, self.sheet_name)
+		except KeyError:
+			raise MappingError(f"找不到工作表: {self.sheet_name}")
+
+	def read_region(self, top, left, bottom, right):
+		rows = []
+		with self.open_reader() as reader:
+			for row_idx, row in enumerate(reader.iter_rows()):
+				if row_idx > bottom:
+					break
+				if row_idx >= top:
+					rows.append(row)
+		rows.extend([] for _ in range(bottom - top + 1 - len(rows)))
+		return slice_region(rows, left, right)
+
+	def read_all(self):
+		with self.open_reader() as reader:
+			return reader.read_all()
+
+	def identity(self):
+		return file_identity(self.path, self.sheet_name)
+
+	def fingerprint(self):
+		return file_fingerprint(self.path, self.sheet_name)
+
+	def find(self, first_keyword, second_keyword):
+		# 逐行讀取，找到空格區塊即停止
+		empty_cells, self.rows_read = locate_in_file(self.path, first_keyword, second_keyword,
+													 self.sheet_name)
+		return empty_cells
+
+	def write_cells(self, plan, progress=None):
+		# 只寫入記憶體，完成後一次回報
+		filled_count = self.writer.write_cells(plan)
+		if progress:
+			progress(filled_count, len(plan))
+		return filled_count
+
+	def save(self, path=None):
+		method = self.writer.save_with_fallback(path)
+		self.stats = self.writer.stats
+		return method
+
+
+# 檔案後端依讀取速度排列：(名稱, 類別, 需要的外部後端)
+FILE_BACKENDS = [
+	('xlsx', XlsxSheetBackend, None),
+	('openpyxl', OpenpyxlSheetBackend, 'openpyxl'),
+]
+
+
+def available_file_backends():
+	"""可用的檔案後端名稱"""
+	return [name for name, _, requires in FILE_BACKENDS if requires is None or backend_available(requires)]
+
+
+def open_file_backend(path, sheet_name=None, name=None):
+	"""開啟檔案後端：指定名稱時使用該後端，否則使用最快的可用後端"""
+	for backend_name, backend_class, requires in FILE_BACKENDS:
+		if name and backend_name != name:
+			continue
+		if requires and not backend_available(requires):
+			if name:
+				load_backend(requires)  # 拋出缺少套件的訊息
+			continue
+		return backend_class(path, sheet_name)
+	raise MappingError(f"沒有可用的檔案後端: {name}")
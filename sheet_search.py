@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多工作表搜尋
+在工作簿的每個工作表（以及多個工作簿）中尋找定位列/目標欄位，回傳排序後的結果與各工作表的掃描時間
+
+用法:
+	python main.py search --field 目標欄位 [--first 定位列] --xlsx a.xlsx [--xlsx b.xlsx ...]
+	python main.py search --field 目標欄位 --folder 資料夾 [--count 12] [--workers 8]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from engine import MappingError, SheetModel
+from com_locator import locate_in_worksheet
+from stream_locator import locate_in_file
+from xlsx_reader import resolve_sheet_part, sheet_names
+
+
+def new_hit(workbook, sheet, order, active=False, error=''):
+	"""建立一筆搜尋結果"""
+	return {
+		'workbook': workbook,
+		'sheet': sheet,
+		'order': order,  # 工作簿及工作表的原始順序
+		'active': active,
+		'cells': [],
+		'block': '',
+		'error': error,
+		'seconds': 0.0,
+	}
+
+
+def block_range(cells):
+	"""空格區塊的範圍，例如 'B4:E6'"""
+	if not cells:
+		return ''
+	first = cells[0]['position']
+	last = max(cells, key=lambda c: (c['row'], c['col']))['position']
+	return first if first == last else f"{first}:{last}"
+
+
+def search_file_sheet(job):
+	"""搜尋一個檔案中的一個工作表（錯誤不外拋）"""
+	hit = new_hit(job['workbook'], job['sheet'], job['order'], job['active'])
+	start = time.perf_counter()
+	try:
+		cells, _ = locate_in_file(job['workbook'], job['first_keyword'], job['second_keyword'],
+								  job['sheet'])
+		hit['cells'] = cells
+		hit['block'] = block_range(cells)
+	except MappingError as e:
+		hit['error'] = str(e)
+	except Exception as e:
+		hit['error'] = f"掃描失敗：{e}"
+	hit['seconds'] = time.perf_counter() - start
+	return hit
+
+
+def list_folder(folder):
+	"""資料夾中的xlsx檔案（略過Excel開啟時產生的 ~$ 暫存檔）"""
+	paths = glob.glob(os.path.join(folder, '*.xlsx')) + glob.glob(os.path.join(folder, '*.xlsm'))
+	return sorted(p for p in paths if not os.path.basename(p).startswith('~$'))
+
+
+def list_file_jobs(paths, first_keyword, second_keyword):
+	"""展開為每個工作表一個工作，無法開啟的檔案直接回傳錯誤結果"""
+	jobs = []
+	failed = []
+	for path in paths:
+		try:
+			with zipfile.ZipFile(path) as archive:
+				names = sheet_names(archive)
+				active = resolve_sheet_part(archive)[1]
+		except Exception as e:
+			failed.append(new_hit(path, '', len(jobs) + len(failed), error=f"無法開啟檔案：{e}"))
+			continue
+		for name in names:
+			jobs.append({'workbook': path, 'sheet': name, 'order': len(jobs) + len(failed),
+						 'active': name == active, 'first_keyword': first_keyword,
+						 'second_keyword': second_keyword})
+	return jobs, failed
+
+
+def search_files(paths, first_keyword, second_keyword, workers=None, on_hit=None):
+	"""以程序池搜尋多個檔案的所有工作表，回傳結果列表（未排序）"""
+	jobs, hits = list_file_jobs(paths, first_keyword, second_keyword)
+
+	def record(hit):
+		hits.append(hit)
+		if on_hit:
+			on_hit(hit)
+
+	if workers == 1 or len(jobs) <= 1:
+		for job in jobs:
+			record(search_file_sheet(job))
+		return hits
+
+	executor = ProcessPoolExecutor(max_workers=workers)
+	try:
+		futures = {executor.submit(search_file_sheet, job): job for job in jobs}
+		for future in as_completed(futures):
+			job = futures[future]
+			try:
+				record(future.result())
+			except BrokenProcessPool as e:
+				record(new_hit(job['workbook'], job['sheet'], job['order'], job['active'],
+							   f"工作程序異常終止：{e}"))
+	except BaseException:
+		# on_hit 要求停止（例如取消）：不等待其他工作表掃描完成
+		executor.shutdown(wait=False, cancel_futures=True)
+		raise
+	executor.shutdown()
+	return hits
+
+
+def search_com(workbooks, first_keyword, second_keyword, active_worksheet=None, on_hit=None):
+	"""搜尋Excel中已開啟工作簿的所有工作表
+
+	COM物件只能在建立它的執行緒使用，因此逐一搜尋；每個工作表使用Excel的Find，只讀取目標區塊
+	"""
+	hits = []
+	active_key = None
+	if active_worksheet is not None:
+		active_key = (active_worksheet.Parent.Name, active_worksheet.Name)
+
+	for workbook in workbooks:
+		for worksheet in workbook.Worksheets:
+			hit = new_hit(workbook.Name, worksheet.Name, len(hits),
+						  active=(workbook.Name, worksheet.Name) == active_key)
+			start = time.perf_counter()
+			try:
+				cells, _ = locate_in_worksheet(worksheet, first_keyword, second_keyword,
+											   lambda: SheetModel.from_com_worksheet(worksheet))
+				hit['cells'] = cells
+				hit['block'] = block_range(cells)
+			except MappingError as e:
+				hit['error'] = str(e)
+			except Exception as e:
+				hit['error'] = f"掃描失敗：{e}"
+			hit['seconds'] = time.perf_counter() - start
+			hits.append(hit)
+			if on_hit:
+				on_hit(hit)
+	return hits
+
+
+def rank_hits(hits, wanted_count=None):
+	"""排序：有空格的結果在前；空格數量等於所需數量者優先，其次為活動工作表，再依原始順序"""
+	def key(hit):
+		found = bool(hit['cells'])
+		exact = wanted_count is not None and len(hit['cells']) == wanted_count
+		return (not found, not exact, not hit['active'], hit['order'])
+	return sorted(hits, key=key)
+
+
+def format_hit(hit):
+	"""格式化單一結果"""
+	name = f"{os.path.basename(hit['workbook'])} / {hit['sheet']}"
+	if hit['cells']:
+		return f"{name}: {hit['block']}（{len(hit['cells'])} 個空格，{hit['seconds'] * 1000:.0f} ms）"
+	return f"{name}: {hit['error'] or '沒有空格'}（{hit['seconds'] * 1000:.0f} ms）"
+
+
+def build_parser():
+	"""建立命令列參數"""
+	parser = argparse.ArgumentParser(prog="main.py search", description="在所有工作表中搜尋目標欄位")
+	parser.add_argument("--field", required=True, help="目標欄位")
+	parser.add_argument("--first", default='', help="定位列（可選）")
+	parser.add_argument("--xlsx", action="append", default=[], help="Excel檔案（可重複）")
+	parser.add_argument("--folder", help="搜尋資料夾中所有的xlsx檔案")
+	parser.add_argument("--count", type=int, help="需要的空格數量（數量相同的結果排在前面）")
+	parser.add_argument("--workers", type=int, default=None, help="工作程序數量（預設為CPU核心數，1為不使用程序池）")
+	parser.add_argument("--report", help="將結果寫入JSON檔")
+	return parser
+
+
+def main(argv=None):
+	"""搜尋入口，回傳結束代碼（0 = 至少找到一個結果）"""
+	parser = build_parser()
+	args = parser.parse_args(argv)
+
+	if args.workers is not None and args.workers < 1:
+		parser.error("--workers 必須大於 0")
+
+	paths = list(args.xlsx)
+	if args.folder:
+		paths.extend(list_folder(args.folder))
+	if not paths:
+		parser.error("請指定 --xlsx 或 --folder")
+
+	start = time.perf_counter()
+	hits = rank_hits(search_files(paths, args.first.strip(), args.field.strip(), args.workers),
+					 args.count)
+	elapsed = time.perf_counter() - start
+
+	for hit in hits:
+		print(format_hit(hit), file=sys.stdout if hit['cells'] else sys.stderr)
+	found = [hit for hit in hits if hit['cells']]
+	print(f"搜尋 {len(hits)} 個工作表：{len(found)} 個找到空格，耗時 {elapsed:.2f}s")
+
+	if args.report:
+		with open(args.report, 'w', encoding='utf-8') as f:
+			json.dump({'elapsed_seconds': elapsed, 'hits': hits}, f, ensure_ascii=False, indent=2)
+
+	return 0 if found else 1
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作表快照
+記錄數據來自哪個工作簿/工作表及變更標記，未變更時不重新讀取，只有部分行變更時只重讀那些行；
+工作表重新計算後公式的值可能在任何一行改變，一律完整重讀
+"""
+
+from backends import load_backend
+from engine import SheetModel, get_excel_column_name, values_to_rows
+
+
+# 變更的行區段超過此數量時視為整張工作表變更
+MAX_DIRTY_RANGES = 32
+
+
+class ChangeTracker:
+	"""記錄Excel的SheetChange/SheetCalculate事件：每個工作表的變更次數與變更的行（0-based，含邊界）"""
+
+	def __init__(self):
+		self.counters = {}
+		self.dirty_rows = {}  # key -> [(top, bottom)]，None 表示無法判斷範圍
+		self.app_events = None
+
+	def attach(self, app):
+		"""掛上Application事件（只掛一次），失敗時回傳False"""
+		if self.app_events is not None:
+			return True
+		try:
+			self.app_events = load_backend('com').WithEvents(app, ExcelAppEvents)
+			self.app_events.tracker = self
+			return True
+		except Exception:
+			self.app_events = None
+			return False
+
+	def detach(self):
+		"""Excel斷開時丟棄事件及記錄"""
+		self.app_events = None
+		self.counters.clear()
+		self.dirty_rows.clear()
+
+	@property
+	def attached(self):
+		return self.app_events is not None
+
+	def record(self, key, top=None, bottom=None):
+		"""記錄一次變更（top為None表示整張工作表）"""
+		self.counters[key] = self.counters.get(key, 0) + 1
+		ranges = self.dirty_rows.get(key, [])
+		if ranges is None or top is None or len(ranges) >= MAX_DIRTY_RANGES:
+			self.dirty_rows[key] = None
+		else:
+			ranges.append((top, bottom))
+			self.dirty_rows[key] = ranges
+
+	def counter(self, key):
+		return self.counters.get(key, 0)
+
+	def take_dirty_rows(self, key):
+		"""取出並清除變更的行，沒有記錄或無法判斷時回傳None"""
+		if key not in self.dirty_rows:
+			return None
+		return self.dirty_rows.pop(key)
+
+
+class ExcelAppEvents:
+	"""Excel.Application事件"""
+
+	tracker = None
+
+	def OnSheetChange(self, sh, target):
+		try:
+			key = (sh.Parent.FullName, sh.Name)
+			if target.Areas.Count > 1:
+				self.tracker.record(key)
+			else:
+				top = target.Row - 1
+				self.tracker.record(key, top, top + target.Rows.Count - 1)
+		except Exception:
+			# 事件中的錯誤不能影響Excel
+			pass
+
+	def OnSheetCalculate(self, sh):
+		# 重新計算（含連結更新）不會觸發SheetChange，無法得知哪些公式儲存格的值改變，視為整張工作表變更
+		try:
+			self.tracker.record((sh.Parent.FullName, sh.Name))
+		except Exception:
+			pass
+
+
+class ComSheetSource:
+	"""COM工作表來源"""
+
+	def __init__(self, workbook, worksheet, tracker=None):
+		self.workbook = workbook
+		self.worksheet = worksheet
+		self.tracker = tracker
+		self.key = (workbook.FullName, worksheet.Name)
+
+	def change_token(self):
+		"""變更標記：工作表、UsedRange位址與事件計數；沒有事件時無法判斷，回傳None"""
+		if not self.tracker or not self.tracker.attached:
+			return None
+		return (self.key, self.worksheet.UsedRange.Address, self.tracker.counter(self.key))
+
+	def take_dirty_rows(self):
+		if not self.tracker:
+			return None
+		return self.tracker.take_dirty_rows(self.key)
+
+	def read_all(self):
+		return SheetModel.from_com_worksheet(self.worksheet)
+
+	def read_rows(self, model, row_ranges):
+		"""只重新讀取指定的行，直接更新快照數據"""
+		used_range = self.worksheet.UsedRange
+		used_top = used_range.Row - 1
+		used_bottom = used_top + used_range.Rows.Count - 1
+		left = used_range.Column - 1
+		right = left + used_range.Columns.Count - 1
+
+		for top, bottom in row_ranges:
+			top = max(top, used_top)
+			bottom = min(bottom, used_bottom)
+			if top > bottom:
+				continue
+			address = (f"{get_excel_column_name(left)}{top + 1}:"
+					   f"{get_excel_column_name(right)}{bottom + 1}")
+			for offset, row in enumerate(values_to_rows(self.worksheet.Range(address).Value)):
+				model.data[top + offset] = [None] * left + row
+
+
+class OpenpyxlSheetSource:
+	"""openpyxl工作表來源（只會被本程式修改，以寫入次數作為變更標記）"""
+
+	def __init__(self, workbook, sheet):
+		self.workbook = workbook
+		self.sheet = sheet
+		self.key = (id(workbook), sheet.title)
+		self.generation = 0
+
+	def change_token(self):
+		return (self.key, self.generation)
+
+	def take_dirty_rows(self):
+		return None
+
+	def read_all(self):
+		return SheetModel.from_openpyxl_sheet(self.sheet)
+
+	def note_write(self):
+		"""記錄一次寫入"""
+		self.generation += 1
+
+
+class SheetSnapshot:
+	"""工作表快照：變更標記相同時直接沿用數據"""
+
+	def __init__(self):
+		self.model = SheetModel()
+		self.token = None
+		self.full_reloads = 0
+		self.partial_reloads = 0
+		self.hits = 0
+
+	def refresh(self, source, force=False):
+		"""取得最新的工作表數據"""
+		token = source.change_token()
+		if not force and token is not None and token == self.token:
+			self.hits += 1
+			return self.model
+
+		dirty_rows = source.take_dirty_rows()
+		# COM標記為 (工作表, UsedRange位址, 計數)，前兩項相同表示版面未變
+		same_layout = (token is not None and self.token is not None and len(token) == 3
+					   and token[:2] == self.token[:2])
+		if not force and dirty_rows and same_layout:
+			# 同一工作表且UsedRange未變，只重讀變更的行
+			source.read_rows(self.model, dirty_rows)
+			self.model.invalidate_index()
+			self.partial_reloads += 1
+		else:
+			self.model = source.read_all()
+			self.full_reloads += 1
+
+		self.token = token
+		return self.model
+
+	def apply_writes(self, source, plan):
+		"""將本程式寫入的值直接更新到快照，免去重新讀取"""
+		if source is None or self.token is None or self.token[0] != source.key:
+			# 快照不是這個工作表的，下次重新讀取
+			self.token = None
+			return
+
+		data = self.model.data
+		for row, col, value in plan:
+			while len(data) <= row:
+				data.append([])
+			if len(data[row]) <= col:
+				data[row].extend([None] * (col + 1 - len(data[row])))
+			data[row][col] = value
+		self.model.invalidate_index()
+
+		if isinstance(source, OpenpyxlSheetSource):
+			source.note_write()
+			self.token = source.change_token()
+
+	def clear(self):
+		"""清除快照"""
+		self.model = SheetModel()
+		self.token = None
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+啟動時間量測
+以 --startup-profile 啟動時，依階段（匯入、建立界面、首次繪製、載入配置）輸出耗時
+"""
+
+import sys
+import time
+
+
+class StartupProfile:
+	"""記錄各啟動階段的耗時（未啟用時不輸出）"""
+
+	def __init__(self, enabled=False):
+		self.enabled = enabled
+		self.start = time.perf_counter()
+		self.last = self.start
+		self.phases = []  # [(階段名稱, 秒數)]
+
+	def mark(self, phase):
+		"""結束一個階段"""
+		now = time.perf_counter()
+		self.phases.append((phase, now - self.last))
+		self.last = now
+
+	def total(self):
+		return self.last - self.start
+
+	def report(self, extra=None, file=None):
+		"""輸出各階段耗時，extra為附加的 {名稱: 內容}"""
+		if not self.enabled:
+			return
+		file = file or sys.stderr
+		print("啟動時間:", file=file)
+		for phase, seconds in self.phases:
+			print(f"  {phase:<12} {seconds * 1000:8.1f} ms", file=file)
+		print(f"  {'合計':<12} {self.total() * 1000:8.1f} ms", file=file)
+		for name, value in (extra or {}).items():
+			print(f"  {name}: {value}", file=file)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+檔案模式欄位定位
+逐行解析xlsx的工作表XML，找到目標欄位及其下方的空格區塊後即停止解析
+"""
+
+from engine import (MAX_HORIZONTAL_SCAN_RANGE, MappingError, SheetModel, FieldLocator, is_cell_empty,
+					make_cell_info)
+from xlsx_reader import XlsxSheetReader
+import tracing
+
+
+def cell_matches(cell, keyword):
+	"""與 KeywordIndex 相同的比對規則"""
+	return bool(cell) and keyword in str(cell)
+
+
+def ends_vertical_scan(row, field_col):
+	"""此行是否讓垂直掃描停止（範圍內有內容，或此行沒有涵蓋目標欄）"""
+	if len(row) <= field_col:
+		return True
+	for cell in row[field_col:field_col + MAX_HORIZONTAL_SCAN_RANGE]:
+		if not is_cell_empty(cell):
+			return True
+	return False
+
+
+class StreamingFieldLocator:
+	"""逐行定位目標欄位（結果與 FieldLocator 對完整工作表的結果相同）"""
+
+	def __init__(self, rows):
+		"""rows: 依序回傳每一行快取值列表的迭代器（0-based 絕對位置）"""
+		self.rows = rows
+		self.rows_read = 0
+
+	def iter_rows(self):
+		for row in self.rows:
+			self.rows_read += 1
+			yield row
+
+	def locate(self, first_keyword, second_keyword):
+		"""定位目標欄位並回傳空格位置，找不到時拋出MappingError"""
+		rows = enumerate(self.iter_rows())
+		with tracing.span('locate_field', backend='xlsx') as field_span:
+			field_row, field_col, row = self.find_field(rows, first_keyword, second_keyword)
+			field_span.set(rows_read=self.rows_read)
+
+		with tracing.span('scan_empty_cells', backend='xlsx') as scan_span:
+			# 只保留目標欄位及其下方需要的行
+			window = [row]
+			for _, row in rows:
+				window.append(row)
+				if ends_vertical_scan(row, field_col):
+					break
+
+			local_cells = FieldLocator(SheetModel(window)).scan_empty_cells(0, field_col)
+			scan_span.set(cells=len(local_cells), rows_read=self.rows_read)
+		return [make_cell_info(cell['row'] + field_row, cell['col'], cell['value'])
+				for cell in local_cells]
+
+	def find_field(self, rows, first_keyword, second_keyword):
+		"""從行迭代器中找出目標欄位，回傳 (row, col, 該行)"""
+		if first_keyword:
+			# 1. 先找定位列
+			first_position = None
+			for row_idx, row in rows:
+				for col_idx, cell in enumerate(row):
+					if cell_matches(cell, first_keyword):
+						first_position = (row_idx, col_idx)
+						break
+				if first_position:
+					break
+			if not first_position:
+				raise MappingError(f"找不到定位列: {first_keyword}")
+
+			# 2. 在同一欄往下找目標欄位
+			first_col = first_position[1]
+			for row_idx, row in rows:
+				if first_col < len(row) and cell_matches(row[first_col], second_keyword):
+					return row_idx, first_col, row
+			raise MappingError(
+				f"在定位列 '{first_keyword}' 的同一欄中\n往下找不到目標欄位: {second_keyword}")
+
+		# 沒有定位列，直接找目標欄位
+		for row_idx, row in rows:
+			for col_idx, cell in enumerate(row):
+				if cell_matches(cell, second_keyword):
+					return row_idx, col_idx, row
+		raise MappingError(f"找不到目標欄位: {second_keyword}")
+
+
+def locate_in_file(path, first_keyword, second_keyword, sheet_name=None):
+	"""在xlsx檔案中定位空格，回傳 (空格列表, 讀取的行數)"""
+	try:
+		reader = XlsxSheetReader(path, sheet_name)
+	except KeyError:
+		raise MappingError(f"找不到工作表: {sheet_name}")
+	with reader:
+		locator = StreamingFieldLocator(reader.iter_rows())
+		return locator.locate(first_keyword, second_keyword), locator.rows_read
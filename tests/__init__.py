@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""測試：以模擬的COM工作表與合成的檔案驗證各模組，不需要Excel"""
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模擬的COM工作表
+提供本程式使用到的Excel物件模型（UsedRange、Range/Cells的Value、Find/FindNext、Selection、
+隱藏行列與篩選狀態），在Linux上測試與量測COM路徑（benchmarks 也使用）；每次屬性存取都計為一次跨程序呼叫
+"""
+
+import re
+
+from engine import get_excel_column_name
+
+
+ADDRESS = re.compile(r'^\$?([A-Z]+)\$?(\d+)(?::\$?([A-Z]+)\$?(\d+))?$')
+
+
+def column_number(letters):
+	number = 0
+	for char in letters:
+		number = number * 26 + (ord(char) - 64)
+	return number
+
+
+def parse_address(address):
+	"""'A1:B2' -> (top, left, bottom, right)（0-based，含邊界）"""
+	match = ADDRESS.match(address)
+	if not match:
+		raise ValueError(f"無法解析位址: {address}")
+	left_letters, top, right_letters, bottom = match.groups()
+	top = int(top) - 1
+	left = column_number(left_letters) - 1
+	if right_letters is None:
+		return top, left, top, left
+	return top, left, int(bottom) - 1, column_number(right_letters) - 1
+
+
+def display_text(value):
+	"""Find比對的顯示文字（整數值的浮點數不顯示小數）"""
+	if value is None:
+		return ''
+	if isinstance(value, float) and value.is_integer():
+		return str(int(value))
+	return str(value)
+
+
+class Count:
+	def __init__(self, count):
+		self.Count = count
+
+
+class Lines:
+	"""Range.EntireRow / EntireColumn：Hidden 全部隱藏為True、部分隱藏為None"""
+
+	def __init__(self, indices, hidden):
+		flags = {index in hidden for index in indices}
+		self.Hidden = flags.pop() if len(flags) == 1 else None
+
+
+class FakeCells:
+	"""Range.Cells：Cells(n) 依行優先順序，Cells(r, c) 為範圍內的相對位置（1-based）"""
+
+	def __init__(self, parent):
+		self.parent = parent
+
+	@property
+	def Count(self):
+		top, left, bottom, right = self.parent.bounds
+		return (bottom - top + 1) * (right - left + 1)
+
+	def __call__(self, row, col=None):
+		top, left, bottom, right = self.parent.bounds
+		if col is None:
+			width = right - left + 1
+			r, c = top + (row - 1) // width, left + (row - 1) % width
+		else:
+			r, c = top + row - 1, left + col - 1
+		return FakeRange(self.parent.sheet, r, c, r, c)
+
+
+class FakeRange:
+	"""Excel.Range"""
+
+	def __init__(self, sheet, top, left, bottom, right):
+		self.sheet = sheet
+		self.bounds = (top, left, bottom, right)
+		self.what = None
+
+	@property
+	def Row(self):
+		return self.bounds[0] + 1
+
+	@property
+	def Column(self):
+		return self.bounds[1] + 1
+
+	@property
+	def Rows(self):
+		return Count(self.bounds[2] - self.bounds[0] + 1)
+
+	@property
+	def Columns(self):
+		return Count(self.bounds[3] - self.bounds[1] + 1)
+
+	@property
+	def Areas(self):
+		return Count(1)
+
+	@property
+	def Cells(self):
+		return FakeCells(self)
+
+	@property
+	def EntireRow(self):
+		return Lines(range(self.bounds[0], self.bounds[2] + 1), self.sheet.hidden_rows)
+
+	@property
+	def EntireColumn(self):
+		return Lines(range(self.bounds[1], self.bounds[3] + 1), self.sheet.hidden_cols)
+
+	@property
+	def Address(self):
+		top, left, bottom, right = self.bounds
+		first = f"${get_excel_column_name(left)}${top + 1}"
+		if (top, left) == (bottom, right):
+			return first
+		return f"{first}:${get_excel_column_name(right)}${bottom + 1}"
+
+	@property
+	def Value(self):
+		self.sheet.calls += 1
+		top, left, bottom, right = self.bounds
+		if (top, left) == (bottom, right):
+			return self.sheet.get(top, left)
+		return tuple(tuple(self.sheet.get(r, c) for c in range(left, right + 1))
+					 for r in range(top, bottom + 1))
+
+	@Value.setter
+	def Value(self, value):
+		self.sheet.calls += 1
+		top, left, bottom, right = self.bounds
+		if (top, left) == (bottom, right):
+			self.sheet.set(top, left, value)
+			return
+		for r, row in enumerate(value):
+			for c, cell in enumerate(row):
+				self.sheet.set(top + r, left + c, cell)
+
+	def __iter__(self):
+		top, left, bottom, right = self.bounds
+		for r in range(top, bottom + 1):
+			for c in range(left, right + 1):
+				yield FakeRange(self.sheet, r, c, r, c)
+
+	def Find(self, What, After=None, **options):
+		"""依行優先順序，從After的下一格開始找出顯示文字包含What的儲存格（到結尾後從頭繼續）
+
+		與Excel相同：單一儲存格的範圍搜尋整個UsedRange、略過隱藏的行列；不支援萬用字元
+		"""
+		self.sheet.calls += 1
+		self.what = What
+		top, left, bottom, right = self.bounds
+		if (top, left) == (bottom, right):
+			top, left, bottom, right = self.sheet.UsedRange.bounds
+		width = right - left + 1
+		total = (bottom - top + 1) * width
+		start = 0
+		if After is not None:
+			start = (After.bounds[0] - top) * width + (After.bounds[1] - left) + 1
+		for k in range(total):
+			n = (start + k) % total
+			r, c = top + n // width, left + n % width
+			if r in self.sheet.hidden_rows or c in self.sheet.hidden_cols:
+				continue
+			if What in display_text(self.sheet.get(r, c)):
+				return FakeRange(self.sheet, r, c, r, c)
+		return None
+
+	def FindNext(self, After=None):
+		return self.Find(self.what, After)
+
+
+class FakeApplication:
+	def __init__(self, workbook=None):
+		self.Selection = None
+		self.Ready = True
+		self.ActiveWorkbook = workbook
+
+
+class FakeWorkbook:
+	def __init__(self, name='Book1.xlsx'):
+		self.Name = name
+		self.FullName = f"C:\\{name}"
+		self.ActiveSheet = None
+		self.saves = 0
+
+	def Save(self):
+		self.saves += 1
+
+
+class FakeWorksheet:
+	"""Excel.Worksheet（數據為 0-based 的列表）"""
+
+	def __init__(self, data, name='Sheet1', workbook=None):
+		self.data = [list(row) for row in data]
+		self.Name = name
+		self.Parent = workbook or FakeWorkbook()
+		self.Application = FakeApplication()
+		self.AutoFilterMode = False
+		self.FilterMode = False
+		self.hidden_rows = set()  # 0-based
+		self.hidden_cols = set()
+		self.calls = 0  # 跨程序呼叫次數
+
+	def get(self, row, col):
+		if row < len(self.data) and col < len(self.data[row]):
+			return self.data[row][col]
+		return None
+
+	def set(self, row, col, value):
+		while len(self.data) <= row:
+			self.data.append([])
+		line = self.data[row]
+		if len(line) <= col:
+			line.extend([None] * (col + 1 - len(line)))
+		line[col] = value
+
+	@property
+	def UsedRange(self):
+		self.calls += 1
+		width = max((len(row) for row in self.data), default=1)
+		return FakeRange(self, 0, 0, max(len(self.data), 1) - 1, max(width, 1) - 1)
+
+	def Range(self, address):
+		return FakeRange(self, *parse_address(address))
+
+	def Cells(self, row, col):
+		return FakeRange(self, row - 1, col - 1, row - 1, col - 1)
+
+	def select(self, address):
+		"""模擬使用者在Excel中選取範圍"""
+		self.Application.Selection = self.Range(address)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+COM路徑測試
+以 tests/fake_com 的模擬工作表驗證區塊寫入、Find定位與連接退避，不需要Excel
+
+用法:
+	python -m pytest -q tests
+	python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from com_locator import ComFieldLocator, locate_in_worksheet
+from engine import MappingError, SheetModel, ComSheetWriter, group_write_blocks
+from excel_connection import ExcelConnection, STATE_ABSENT, STATE_CONNECTED
+
+from tests.fake_com import FakeApplication, FakeRange, FakeWorkbook, FakeWorksheet
+
+
+def locate(worksheet, first_keyword, second_keyword):
+	"""locate_in_worksheet，完整讀取時使用模擬工作表的數據"""
+	return locate_in_worksheet(worksheet, first_keyword, second_keyword,
+							   lambda: SheetModel([list(row) for row in worksheet.data]))
+
+
+class ComSheetWriterTest(unittest.TestCase):
+
+	def test_group_write_blocks(self):
+		plan = [(1, 1, 'a'), (1, 2, 'b'), (2, 1, 'c'), (2, 2, 'd'), (3, 1, 'e'), (3, 2, 'f'),
+				(6, 4, 'x'), (7, 0, 'y'), (7, 1, 'z')]
+		blocks = group_write_blocks(plan)
+		self.assertEqual(blocks, [
+			(1, 1, 3, 2, [['a', 'b'], ['c', 'd'], ['e', 'f']]),
+			(6, 4, 6, 4, [['x']]),
+			(7, 0, 7, 1, [['y', 'z']]),
+		])
+
+	def test_later_value_wins(self):
+		self.assertEqual(group_write_blocks([(0, 0, 'old'), (0, 0, 'new')]), [(0, 0, 0, 0, [['new']])])
+
+	def test_write_cells_one_call_per_block(self):
+		worksheet = FakeWorksheet([[None] * 6 for _ in range(10)])
+		plan = [(r, c, f"{r},{c}") for r in range(2, 7) for c in range(1, 3)] + [(9, 5, 1.5)]
+		progress = []
+		writer = ComSheetWriter(worksheet)
+
+		self.assertEqual(writer.write_cells(plan, lambda done, total: progress.append((done, total))),
+						 len(plan))
+		self.assertEqual(writer.stats, {'cells': 11, 'calls': 2, 'saved': 9})
+		self.assertEqual(worksheet.calls, 2)
+		self.assertEqual(progress, [(10, 11), (11, 11)])
+		for row, col, value in plan:
+			self.assertEqual(worksheet.get(row, col), value)
+
+
+class ComFieldLocatorTest(unittest.TestCase):
+
+	def test_find_wraps_to_first_cell(self):
+		# Find從最後一格之後開始，第一個結果應為A1而非之後的儲存格
+		worksheet = FakeWorksheet([['目標', None], [None, '目標欄位'], ['目標', None]])
+		self.assertEqual(ComFieldLocator(worksheet).find_field_position('目標'), (0, 0))
+
+	def test_find_missing_keyword(self):
+		worksheet = FakeWorksheet([['a', 'b'], ['c', 'd']])
+		self.assertIsNone(ComFieldLocator(worksheet).find_field_position('目標'))
+
+	def test_single_cell_range_ignores_other_cells(self):
+		# 定位列下方只剩一格：Excel的Find會搜尋整個工作表，不能採用其他欄的結果
+		worksheet = FakeWorksheet([['定位', '目標'], ['x', '目標']])
+		locator = ComFieldLocator(worksheet)
+		self.assertIsNone(locator.find_second_keyword_in_column(0, 0, '目標'))
+		with self.assertRaises(MappingError):
+			locate(worksheet, '定位', '目標')
+
+	def test_single_cell_range_match(self):
+		worksheet = FakeWorksheet([['定位', 'x'], ['目標', 'y']])
+		self.assertEqual(ComFieldLocator(worksheet).find_second_keyword_in_column(0, 0, '目標'), 1)
+
+	def test_single_cell_used_range(self):
+		self.assertEqual(ComFieldLocator(FakeWorksheet([['目標']])).find_field_position('目標'), (0, 0))
+		self.assertIsNone(ComFieldLocator(FakeWorksheet([['其他']])).find_field_position('目標'))
+
+	def test_locate_with_find(self):
+		worksheet = FakeWorksheet([['定位', None, None], ['目標', None, None], [None, None, 'x']])
+		cells, method = locate(worksheet, '定位', '目標')
+		self.assertEqual(method, 'find')
+		self.assertEqual([cell['position'] for cell in cells], ['A3', 'B3'])
+
+	def test_hidden_rows_use_full_read(self):
+		worksheet = FakeWorksheet([['x'], ['目標'], [None]])
+		worksheet.hidden_rows.add(1)
+		cells, method = locate(worksheet, None, '目標')
+		self.assertEqual(method, 'full')
+		self.assertEqual([cell['position'] for cell in cells], ['A3'])
+
+	def test_auto_filter_uses_full_read(self):
+		worksheet = FakeWorksheet([['目標'], [None]])
+		worksheet.AutoFilterMode = True
+		self.assertEqual(locate(worksheet, None, '目標')[1], 'full')
+
+	def test_wildcard_keyword_uses_full_read(self):
+		worksheet = FakeWorksheet([['a*b'], [None]])
+		cells, method = locate(worksheet, None, 'a*b')
+		self.assertEqual(method, 'full')
+		self.assertEqual([cell['position'] for cell in cells], ['A2'])
+
+	def test_find_failure_uses_full_read(self):
+		# 例如保護的工作表：Find拋出COM錯誤時改用完整讀取
+		worksheet = FakeWorksheet([['定位', None], ['目標', None], [None, None]])
+		with mock.patch.object(FakeRange, 'Find', side_effect=OSError("Find失敗")):
+			cells, method = locate(worksheet, '定位', '目標')
+		self.assertEqual(method, 'full')
+		self.assertEqual([cell['position'] for cell in cells], ['A3', 'B3'])
+
+	def test_missing_keyword_is_not_retried(self):
+		# 找不到關鍵字是結果而非Find失敗，不應再完整讀取一次
+		worksheet = FakeWorksheet([['a'], ['b']])
+		load_sheet = mock.Mock(side_effect=AssertionError("不應完整讀取"))
+		with self.assertRaises(MappingError):
+			locate_in_worksheet(worksheet, None, '目標', load_sheet)
+		load_sheet.assert_not_called()
+
+	def test_full_read_errors_are_raised(self):
+		worksheet = FakeWorksheet([['目標'], [None]])
+		error = OSError("讀取失敗")
+		with mock.patch.object(FakeRange, 'Find', side_effect=OSError("Find失敗")):
+			with self.assertRaises(OSError) as context:
+				locate_in_worksheet(worksheet, None, '目標', mock.Mock(side_effect=error))
+		self.assertIs(context.exception, error)
+
+
+class FakeClock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+
+class ExcelConnectionTest(unittest.TestCase):
+
+	def setUp(self):
+		self.clock = FakeClock()
+		self.app = None
+
+		def provider():
+			if self.app is None:
+				raise OSError("Excel未開啟")
+			return self.app
+
+		self.connection = ExcelConnection(provider, self.clock, interval=3.0, max_backoff=20.0,
+										  attach_events=False)
+
+	def test_backoff_while_absent(self):
+		delays = []
+		for _ in range(5):
+			self.assertIsNone(self.connection.poll())
+			delays.append(self.connection.next_delay())
+			# 退避期間不嘗試連接
+			self.assertIsNone(self.connection.poll())
+			self.clock.now += delays[-1]
+		self.assertEqual(delays, [3.0, 6.0, 12.0, 20.0, 20.0])
+		self.assertEqual(self.connection.stats['attach_attempts'], 5)
+		self.assertEqual(self.connection.stats['attach_failures'], 5)
+		self.assertEqual(self.connection.stats['probes'], 5)
+		self.assertEqual(self.connection.state, STATE_ABSENT)
+
+	def test_connect_ignores_backoff_and_resets(self):
+		self.connection.poll()
+		self.connection.poll()
+		workbook = FakeWorkbook()
+		workbook.ActiveSheet = FakeWorksheet([['a']], workbook=workbook)
+		self.app = FakeApplication(workbook)
+
+		self.assertEqual(self.connection.connect(), 'connected')
+		self.assertEqual(self.connection.state, STATE_CONNECTED)
+		self.assertEqual(self.connection.identity, ('Book1.xlsx', 'Sheet1'))
+		self.assertEqual(self.connection.next_delay(), 3.0)
+
+	def test_disconnect_and_switch(self):
+		workbook = FakeWorkbook()
+		workbook.ActiveSheet = FakeWorksheet([['a']], workbook=workbook)
+		self.app = FakeApplication(workbook)
+		self.connection.connect()
+
+		# 沒有事件時每次檢查都重新讀取名稱
+		workbook.ActiveSheet = FakeWorksheet([['b']], name='Sheet2', workbook=workbook)
+		self.assertEqual(self.connection.poll(), 'switched')
+
+		# Excel關閉後存活檢查失敗
+		del self.app.Ready
+		self.assertEqual(self.connection.poll(), 'disconnected')
+		self.assertEqual(self.connection.state, STATE_ABSENT)
+
+
+if __name__ == "__main__":
+	unittest.main()
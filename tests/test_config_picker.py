@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置搜尋索引測試
+延伸、縮短、修改查詢字串及新增/刪除配置之後，重用上一次結果的搜尋應與重新建立的索引相同
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_picker import ConfigIndex, config_texts
+
+
+CONFIGS = [
+	('外觀檢查', {'first_keyword': '檢查項目', 'field_name': '量測值', 'selected_elements': ['ELEM_1', '外觀']}),
+	('尺寸量測', {'first_keyword': '尺寸', 'field_name': '實測值'}),
+	('Gauge A', {'first_keyword': 'No.', 'field_name': '量測值上限', 'selected_elements': ['gauge_b']}),
+	('檢查', {'first_keyword': '', 'field_name': 'ab量測'}),
+]
+
+
+def naive_search(items, query):
+	"""逐一配置比對的結果（不考慮排序）"""
+	query = query.strip().lower()
+	return {name for name, config_data in items
+			if any(query in text for text in config_texts(name, config_data))}
+
+
+class ConfigIndexTest(unittest.TestCase):
+
+	def assert_same_as_fresh(self, index, items, query):
+		result = index.search(query)
+		self.assertEqual(result, ConfigIndex(items).search(query), query)
+		if query.strip():
+			self.assertEqual(set(result), naive_search(items, query), query)
+
+	def test_ranking(self):
+		index = ConfigIndex(CONFIGS)
+		self.assertEqual(index.search('檢查'), ['檢查', '外觀檢查'])
+		self.assertEqual(index.search('量測'), ['尺寸量測', '外觀檢查', 'Gauge A', '檢查'])
+		self.assertEqual(index.search(' GAUGE '), ['Gauge A'])
+		self.assertEqual(index.search(''), [name for name, _ in CONFIGS])
+
+	def test_extend_shorten_and_edit_query(self):
+		index = ConfigIndex(CONFIGS)
+		# 逐字輸入、刪除、在中間修改及換成無關的查詢
+		queries = ['量', '量測', '量測值', '量測值上', '量測值上限', '量測值上', '量測', '量', '',
+				   '實', '實測值', '量測值', '測值', 'g', 'ga', 'gauge', 'gauge_', 'gaXge', 'gauge',
+				   'ab量', 'b量測', '不存在', '不存在的', '量測']
+		for query in queries:
+			self.assert_same_as_fresh(index, CONFIGS, query)
+
+	def test_add_and_remove_between_queries(self):
+		items = list(CONFIGS)
+		index = ConfigIndex(items)
+		self.assert_same_as_fresh(index, items, '量測')
+
+		new_config = ('新量測', {'first_keyword': '量測值下限', 'field_name': 'x'})
+		items.append(new_config)
+		index.add(*new_config)
+		self.assert_same_as_fresh(index, items, '量測值')
+
+		items = [item for item in items if item[0] != '外觀檢查']
+		index.remove('外觀檢查')
+		self.assert_same_as_fresh(index, items, '量測值下')
+
+		# 更新既有配置：保留原本的順序
+		updated = ('尺寸量測', {'first_keyword': '量測值下限', 'field_name': ''})
+		items = [updated if name == updated[0] else (name, data) for name, data in items]
+		index.add(*updated)
+		self.assert_same_as_fresh(index, items, '量測值下限')
+
+	def test_random_query_sequence(self):
+		rng = random.Random(5)
+		alphabet = 'ab量測值'
+		items = [(f'c{i}', {'first_keyword': ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))),
+							'field_name': ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))})
+				 for i in range(30)]
+		index = ConfigIndex(items)
+		query = ''
+		for _ in range(300):
+			action = rng.random()
+			if action < 0.5 or not query:
+				query += rng.choice(alphabet)
+			elif action < 0.8:
+				query = query[:-1]
+			else:
+				pos = rng.randrange(len(query))
+				query = query[:pos] + rng.choice(alphabet) + query[pos + 1:]
+			self.assert_same_as_fresh(index, items, query)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多配置合併套用測試
+合併的計畫應與逐一套用每個配置相同；空格重疊或任一配置失敗時拋出MappingError且不產生部分的計畫
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_xlsx
+from engine import MAX_HORIZONTAL_SCAN_RANGE, CsvModel, FieldLocator, MappingError, SheetModel, config_keywords, \
+	plan_config, plan_config_set, run_mapping_set
+from xlsx_reader import XlsxSheetReader
+
+
+ROWS = [(f'E{i}', f'{i}.5', '') for i in range(1, 11)]
+
+# 空格區塊每行往右最多掃描 MAX_HORIZONTAL_SCAN_RANGE 格
+A = ('量測值', {'field_name': '量測值', 'selected_elements': [f'E{i}' for i in range(1, 9)]})
+A_OVERLAP = ('量測值', {'field_name': '量測值', 'selected_elements': [f'E{i}' for i in range(1, 7)]})
+B = ('上限', {'field_name': '上限', 'selected_elements': ['E9', 'E10']})
+
+
+def make_sheet(separated):
+	"""量測值在A欄；separated 時上限在E欄（量測值的掃描範圍外），否則在C欄（兩個區塊重疊）"""
+	width = MAX_HORIZONTAL_SCAN_RANGE + 1 if separated else 3
+	header = ['量測值'] + [None] * (width - 1)
+	header[-1] = '上限'
+	return [header, [None] * width, [None] * width, ['結束'] * width]
+
+
+def plan_one(config_data, csv_model, sheet_model):
+	first_keyword, second_keyword = config_keywords(config_data)
+	empty_cells = FieldLocator(sheet_model).locate(first_keyword, second_keyword)
+	return plan_config(config_data, csv_model, empty_cells)
+
+
+class PlanConfigSetTest(unittest.TestCase):
+
+	def setUp(self):
+		self.csv_model = CsvModel(ROWS)
+
+	def test_combined_plan(self):
+		sheet_model = SheetModel(make_sheet(separated=True))
+		plan, counts = plan_config_set([A, B], self.csv_model, sheet_model)
+		self.assertEqual(plan, [(1, 0, 1.5), (1, 1, 2.5), (1, 2, 3.5), (1, 3, 4.5), (2, 0, 5.5), (2, 1, 6.5),
+								(2, 2, 7.5), (2, 3, 8.5), (1, 4, 9.5), (2, 4, 10.5)])
+		self.assertEqual(counts, {'量測值': 8, '上限': 2})
+		separate = [plan_one(config_data, self.csv_model, sheet_model) for _, config_data in (A, B)]
+		self.assertEqual(plan, separate[0] + separate[1])
+
+	def test_overlapping_configs(self):
+		sheet_model = SheetModel(make_sheet(separated=False))
+		# 各自套用時都成立
+		self.assertEqual(len(plan_one(A_OVERLAP[1], self.csv_model, sheet_model)), 6)
+		self.assertEqual(len(plan_one(B[1], self.csv_model, sheet_model)), 2)
+
+		with self.assertRaises(MappingError) as cm:
+			plan_config_set([A_OVERLAP, B], self.csv_model, sheet_model)
+		self.assertIn("上限: 空格位置與配置 '量測值' 重疊", str(cm.exception))
+
+	def test_all_errors_reported(self):
+		sheet_model = SheetModel(make_sheet(separated=False))
+		missing = ('缺少', {'field_name': '不存在', 'selected_elements': ['E7']})
+		with self.assertRaises(MappingError) as cm:
+			plan_config_set([missing, A_OVERLAP, B], self.csv_model, sheet_model)
+		message = str(cm.exception)
+		self.assertIn("缺少: 找不到目標欄位: 不存在", message)
+		self.assertIn("上限: 空格位置與配置 '量測值' 重疊", message)
+		self.assertNotIn("量測值:", message)
+
+	def test_overlap_leaves_file_unchanged(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+		xlsx_path = os.path.join(directory, 'book.xlsx')
+		csv_path = os.path.join(directory, 'data.csv')
+		write_xlsx(xlsx_path, make_sheet(separated=False))
+		with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+			f.write('Element,Dev,Actual\n' + ''.join(f'{e},{d},{a}\n' for e, d, a in ROWS))
+		with open(xlsx_path, 'rb') as f:
+			original = f.read()
+
+		with self.assertRaises(MappingError):
+			run_mapping_set([A_OVERLAP, B], csv_path, xlsx_path)
+		with open(xlsx_path, 'rb') as f:
+			self.assertEqual(f.read(), original)
+
+		write_xlsx(xlsx_path, make_sheet(separated=True))
+		self.assertEqual(run_mapping_set([A, B], csv_path, xlsx_path), {'量測值': 8, '上限': 2})
+		with XlsxSheetReader(xlsx_path) as reader:
+			rows = list(reader.iter_rows())
+		self.assertEqual(rows[1], [1.5, 2.5, 3.5, 4.5, 9.5])
+		self.assertEqual(rows[2], [5.5, 6.5, 7.5, 8.5, 10.5])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置庫測試
+舊JSON配置的一次性匯入、匯入標記與配置在同一個交易中寫入、import_json / export_json 來回轉換
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_store import META_IMPORTED_LEGACY, SCHEMA, ConfigStore
+
+
+LEGACY = {
+	'外觀檢查': {'first_keyword': '檢查項目', 'field_name': '量測值', 'elements': ['ELEM_1']},
+	'尺寸': {'first_keyword': '', 'field_name': '實測'},
+}
+
+
+def write_json(path, field_mappings):
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump(field_mappings, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def legacy_path(tmp_path):
+	path = tmp_path / 'field_mappings.json'
+	write_json(path, LEGACY)
+	return str(path)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+	return str(tmp_path / 'field_mappings.db')
+
+
+def test_legacy_import_once(db_path, legacy_path):
+	with ConfigStore(db_path, legacy_path) as store:
+		assert store.names() == ['外觀檢查', '尺寸']
+		assert store.get('外觀檢查') == LEGACY['外觀檢查']
+		assert store.get_meta(META_IMPORTED_LEGACY) == '1'
+		store.delete('尺寸')
+
+	# 已匯入後JSON的變更與刪除的配置都不會再匯入
+	write_json(legacy_path, dict(LEGACY, 新配置={'field_name': 'x'}))
+	with ConfigStore(db_path, legacy_path) as store:
+		assert store.names() == ['外觀檢查']
+
+
+def test_missing_legacy_file_sets_flag(db_path, tmp_path):
+	with ConfigStore(db_path, str(tmp_path / 'missing.json')) as store:
+		assert len(store) == 0
+		assert store.get_meta(META_IMPORTED_LEGACY) == '1'
+
+
+def test_existing_store_without_flag_is_not_overwritten(db_path, legacy_path):
+	# 舊版本建立的配置庫：有配置但沒有meta標記
+	with ConfigStore(db_path, legacy_json_path=None) as store:
+		store.put('尺寸', {'field_name': '已修改'})
+		assert store.get_meta(META_IMPORTED_LEGACY) is None
+
+	with ConfigStore(db_path, legacy_path) as store:
+		assert store.to_dict() == {'尺寸': {'field_name': '已修改'}}
+		assert store.get_meta(META_IMPORTED_LEGACY) == '1'
+
+
+def test_interrupted_import_is_retried(db_path, legacy_path):
+	# 寫入標記時失敗：同一個交易中的配置也不應保留
+	conn = sqlite3.connect(db_path)
+	conn.executescript(SCHEMA)
+	conn.execute("CREATE TRIGGER fail_meta BEFORE INSERT ON meta BEGIN SELECT RAISE(ABORT, '寫入失敗'); END")
+	conn.commit()
+	conn.close()
+
+	with pytest.raises(sqlite3.DatabaseError):
+		ConfigStore(db_path, legacy_path)
+	conn = sqlite3.connect(db_path)
+	assert conn.execute("SELECT COUNT(*) FROM configs").fetchone()[0] == 0
+	conn.execute("DROP TRIGGER fail_meta")
+	conn.commit()
+	conn.close()
+
+	with ConfigStore(db_path, legacy_path) as store:
+		assert store.names() == ['外觀檢查', '尺寸']
+		assert store.get_meta(META_IMPORTED_LEGACY) == '1'
+
+
+def test_put_keeps_order(db_path):
+	with ConfigStore(db_path, legacy_json_path=None) as store:
+		store.put('a', {'field_name': '1'})
+		store.put('b', {'field_name': '2'})
+		store.put('a', {'field_name': '3'})
+		assert store.names() == ['a', 'b']
+		assert store.get('a') == {'field_name': '3'}
+		assert 'b' in store and 'c' not in store
+		assert store.get('c', {}) == {}
+
+
+def test_json_round_trip(db_path, legacy_path, tmp_path):
+	export_path = str(tmp_path / 'export.json')
+	with ConfigStore(db_path, legacy_path) as store:
+		store.put('特殊 "字元"\n', {'field_name': '值 & <x>', 'count': 1.5, 'items': [None, True]})
+		expected = store.to_dict()
+		assert store.export_json(export_path) == 3
+
+	with open(export_path, encoding='utf-8') as f:
+		assert json.load(f) == expected
+	# 暫存檔已取代為匯出檔
+	assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.json')) == ['export.json',
+																					 'field_mappings.json']
+
+	other_path = str(tmp_path / 'other.db')
+	with ConfigStore(other_path, legacy_json_path=None) as store:
+		store.put('尺寸', {'field_name': '舊的'})
+		store.put('保留', {'field_name': 'y'})
+		assert store.import_json(export_path) == 3
+		assert store.names() == ['尺寸', '保留', '外觀檢查', '特殊 "字元"\n']
+		assert store.get('尺寸') == expected['尺寸']
+
+		assert store.import_json(export_path, replace=True) == 3
+		assert store.to_dict() == expected
+		assert list(store.to_dict()) == list(expected)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSV模型測試
+Element索引、數字欄與相接存放的原始文字在分批載入後應與一次載入相同
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import SOURCE_ACTUAL, SOURCE_DEV, SOURCE_NONE, CsvChunk, CsvModel, iter_csv_chunks
+
+
+ROWS = [
+	('A', '1.5', '9'),
+	('B', '', ' 2 '),
+	('A', 'n/a', 'N/A'),
+	(None, '文字', ''),
+	('量測值', None, '-3e2'),
+	('B', ' 0.1230 ', None),
+	('A', '1,5', '7'),
+	('', '', ''),
+]
+
+
+def chunked_model(rows, size):
+	model = CsvModel()
+	for start in range(0, len(rows), size):
+		model.merge(CsvChunk(rows[start:start + size], start))
+	return model
+
+
+class CsvModelTest(unittest.TestCase):
+
+	def test_element_rows(self):
+		model = CsvModel(ROWS)
+		self.assertEqual({name: list(rows) for name, rows in model.element_rows.items()},
+						 {'A': [0, 2, 6], 'B': [1, 5], '': [3, 7], '量測值': [4]})
+		# 配置中第n次出現的同名Element對應第n個同名的行
+		self.assertEqual(model.find_rows(['B', 'A', 'A', '量測值', 'B', 'B', '不存在']), [0, 1, 2, 4, 5])
+		self.assertEqual(model.elements_at([4, 3, 0, 99]), ['量測值', '', 'A'])
+
+	def test_numeric_column(self):
+		model = CsvModel(ROWS)
+		self.assertEqual(list(model.sources), [SOURCE_DEV, SOURCE_ACTUAL, SOURCE_NONE, SOURCE_DEV, SOURCE_ACTUAL,
+											   SOURCE_DEV, SOURCE_DEV, SOURCE_NONE])
+		self.assertEqual(list(model.is_number), [1, 1, 0, 0, 1, 1, 0, 0])
+		self.assertEqual(list(model.numbers), [1.5, 2.0, 0.0, 0.0, -300.0, 0.123, 0.0, 0.0])
+		self.assertEqual([model.write_value(i) for i in range(len(model))],
+						 [1.5, 2.0, None, '文字', -300.0, 0.123, '1,5', None])
+
+	def test_raw_text(self):
+		model = CsvModel(ROWS)
+		self.assertEqual([model.raw_values(i) for i in range(len(model))],
+						 [(dev or '', actual or '') for _, dev, actual in ROWS])
+		self.assertEqual([model.use_value(i) for i in range(len(model))],
+						 ['1.5', '2', '', '文字', '-3e2', '0.1230', '1,5', ''])
+		self.assertEqual(model.display_row(3), ('行4', '文字', '-', '文字'))
+		self.assertEqual(model.display_row(2), ('A', 'n/a', 'N/A', '-'))
+		self.assertEqual(model.display_row(5), ('B', ' 0.1230 ', '-', '0.1230'))
+
+	def test_chunked_same_as_single(self):
+		expected = CsvModel(ROWS)
+		for size in (1, 2, 3, len(ROWS)):
+			model = chunked_model(ROWS, size)
+			self.assertEqual(model.element_rows, expected.element_rows, size)
+			self.assertEqual(model.text, expected.text)
+			self.assertEqual(model.text_ends, expected.text_ends)
+			self.assertEqual(model.numbers, expected.numbers)
+			self.assertEqual([model.display_row(i) for i in range(len(model))],
+							 [expected.display_row(i) for i in range(len(expected))])
+
+	def test_merge_order(self):
+		model = CsvModel(ROWS[:2])
+		with self.assertRaises(ValueError):
+			model.merge(CsvChunk(ROWS[3:], 3))
+
+	def test_from_path(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+		path = os.path.join(directory, 'data.csv')
+		with open(path, 'w', encoding='utf-8', newline='') as f:
+			# 欄位順序不同、多餘的欄位、缺少欄位的行
+			f.write('Actual,Element,Note,Dev\n9,A,x,1.5\n 2 ,B\n"多\n行",量測值,,\n')
+		self.assertEqual(list(iter_csv_chunks(path, chunk_size=2)),
+						 [[('A', '1.5', '9'), ('B', None, ' 2 ')], [('量測值', '', '多\n行')]])
+		model = CsvModel.from_path(path)
+		self.assertEqual(model.path, path)
+		self.assertEqual([model.write_value(i) for i in range(len(model))], [1.5, 2.0, '多\n行'])
+		self.assertEqual(model.raw_values(2), ('', '多\n行'))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+空格遮罩測試
+bytearray 的結果與逐格 is_cell_empty 掃描相同；安裝NumPy時陣列運算的結果與 bytearray 相同
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import backend_available
+from empty_mask import LOOP_ROWS, NUMPY_MIN_CELLS, EmptyMask
+from engine import MAX_HORIZONTAL_SCAN_RANGE, MAX_VERTICAL_SCAN_RANGE, is_cell_empty
+
+
+def naive_vertical(data, field_row, field_col, span=MAX_HORIZONTAL_SCAN_RANGE):
+	"""逐格轉換文字的垂直掃描（與空格遮罩之前的做法相同）"""
+	cells = []
+	for row in range(field_row + 1, len(data)):
+		count = 0
+		has_content = False
+		for col in range(field_col, min(field_col + span, len(data[row]))):
+			if not is_cell_empty(data[row][col]):
+				has_content = True
+				break
+			cells.append((row, col))
+			count += 1
+		if has_content or count == 0:
+			break
+	return cells
+
+
+def naive_horizontal(data, field_row, field_col, span=MAX_VERTICAL_SCAN_RANGE):
+	row = field_row + 1
+	if row >= len(data):
+		return []
+	return [(row, col) for col in range(field_col + 1, min(field_col + span, len(data[row])))
+			if is_cell_empty(data[row][col])]
+
+
+def bytearray_mask(data):
+	"""不使用NumPy的遮罩"""
+	mask = EmptyMask(data)
+	mask.array = None
+	return mask
+
+
+def make_sheet(rng, rows, cols, block_rows):
+	"""第1行為目標欄位，下方 block_rows 行為空格區塊，之後隨機放入終止區塊的內容或較短的行"""
+	filler = [None, '', '  ', 0, 0.0, False, '值', 3.5]
+	data = [[rng.choice(filler) for _ in range(cols)] for _ in range(rows)]
+	data[1] = ['量測值'] * cols
+	for row in range(2, min(2 + block_rows, rows)):
+		for col in range(cols):
+			data[row][col] = rng.choice([None, '', ' \t'])
+	stop = 2 + block_rows
+	if stop < rows:
+		kind = rng.randrange(4)
+		if kind == 0:
+			data[stop] = data[stop][:rng.randrange(cols)]
+		elif kind == 1:
+			data[stop][rng.randrange(cols)] = '內容'
+		elif kind == 2:
+			data[stop] = []
+	return data
+
+
+class EmptyMaskTest(unittest.TestCase):
+
+	def test_flags(self):
+		data = [[None, '', '  ', 0, 'a'], [0.0, False], []]
+		mask = bytearray_mask(data)
+		self.assertEqual([mask.is_empty(0, c) for c in range(6)], [True, True, True, False, False, False])
+		self.assertEqual([mask.is_empty(1, c) for c in range(3)], [False, False, False])
+		self.assertFalse(mask.is_empty(2, 0))
+		self.assertFalse(mask.is_empty(5, 0))
+
+	def test_bytearray_same_as_per_cell(self):
+		rng = random.Random(1)
+		for _ in range(200):
+			rows = rng.randint(2, 40)
+			cols = rng.randint(1, 8)
+			data = make_sheet(rng, rows, cols, rng.randint(0, rows))
+			mask = bytearray_mask(data)
+			for field_col in range(cols):
+				self.assertEqual(mask.vertical_block(1, field_col), naive_vertical(data, 1, field_col))
+				self.assertEqual(mask.horizontal_cells(1, field_col), naive_horizontal(data, 1, field_col))
+
+	def test_long_block_without_numpy(self):
+		data = make_sheet(random.Random(2), LOOP_ROWS * 5, 6, LOOP_ROWS * 3)
+		self.assertEqual(bytearray_mask(data).vertical_block(1, 1), naive_vertical(data, 1, 1))
+
+	@unittest.skipUnless(backend_available('numpy'), "未安裝NumPy")
+	def test_numpy_same_as_bytearray(self):
+		rng = random.Random(3)
+		cols = 10
+		rows = NUMPY_MIN_CELLS // cols + LOOP_ROWS * 4
+		for block_rows in [0, 5, LOOP_ROWS - 2, LOOP_ROWS, LOOP_ROWS + 1, LOOP_ROWS * 3 + 7, rows]:
+			for _ in range(3):
+				data = make_sheet(rng, rows, cols, block_rows)
+				mask = EmptyMask(data)
+				self.assertIsNotNone(mask.array)
+				plain = bytearray_mask(data)
+				self.assertEqual(bytes(mask.flags), bytes(plain.flags))
+				for field_col in range(cols):
+					expected = plain.vertical_block(1, field_col)
+					self.assertEqual(mask.vertical_block(1, field_col), expected, (block_rows, field_col))
+					self.assertEqual(expected, naive_vertical(data, 1, field_col))
+
+
+if __name__ == "__main__":
+	unittest.main()
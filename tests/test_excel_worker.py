@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excel工作執行緒測試
+錯誤回報到界面執行緒（error_handler），COM初始化失敗時工作立即失敗而不是一直等待
+"""
+
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import excel_worker
+from excel_worker import ExcelWorker, JobCancelled
+
+
+TIMEOUT = 5
+
+
+class ExcelWorkerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.errors = []
+		self.workers = []
+
+	def tearDown(self):
+		for worker in self.workers:
+			worker.shutdown()
+			worker.thread.join(TIMEOUT)
+
+	def start(self, com=False):
+		# 不排程pump，由測試直接呼叫（模擬界面執行緒）
+		worker = ExcelWorker(lambda ms, func: None, com=com,
+							 error_handler=lambda name, error: self.errors.append((name, error)))
+		self.workers.append(worker)
+		return worker.start()
+
+	def test_result_and_error_callbacks(self):
+		worker = self.start()
+		results = []
+		ok = worker.submit(lambda job: 42, on_done=results.append)
+		failed = worker.submit(lambda job: 1 / 0, on_error=results.append)
+		self.assertEqual(ok.future.result(TIMEOUT), 42)
+		self.assertIsInstance(failed.future.exception(TIMEOUT), ZeroDivisionError)
+
+		worker.pump()
+		self.assertEqual(results[0], 42)
+		self.assertIsInstance(results[1], ZeroDivisionError)
+		self.assertEqual(self.errors, [])
+
+	def test_unhandled_error_goes_to_handler(self):
+		worker = self.start()
+		job = worker.submit(lambda job: 1 / 0, name='檢查Excel')
+		job.future.exception(TIMEOUT)
+		worker.pump()
+		self.assertEqual(len(self.errors), 1)
+		self.assertEqual(self.errors[0][0], '檢查Excel')
+		self.assertIsInstance(self.errors[0][1], ZeroDivisionError)
+
+	def test_cancelled_job_is_not_reported(self):
+		worker = self.start()
+		started = threading.Event()
+		release = threading.Event()
+
+		def blocking(job):
+			started.set()
+			release.wait(TIMEOUT)
+
+		worker.submit(blocking)
+		started.wait(TIMEOUT)
+		job = worker.submit(lambda job: None, name='取消')
+		self.assertTrue(job.cancel())
+		release.set()
+		done = worker.submit(lambda job: None)
+		done.future.result(TIMEOUT)
+		worker.pump()
+		self.assertEqual(self.errors, [])
+
+	def test_callback_error_goes_to_handler(self):
+		worker = self.start()
+
+		def broken(result):
+			raise ValueError("回呼錯誤")
+
+		worker.submit(lambda job: None, on_done=broken).future.result(TIMEOUT)
+		worker.pump()
+		self.assertEqual(len(self.errors), 1)
+		self.assertIsInstance(self.errors[0][1], ValueError)
+
+	def test_com_init_failure_fails_jobs(self):
+		error = OSError("CoInitialize失敗")
+		with mock.patch.object(excel_worker, 'load_backend', side_effect=error):
+			worker = self.start(com=True)
+			results = []
+			first = worker.submit(lambda job: 1, on_error=results.append)
+			second = worker.submit(lambda job: 2, name='載入Excel數據')
+			self.assertIs(first.future.exception(TIMEOUT), error)
+			self.assertIs(second.future.exception(TIMEOUT), error)
+
+		worker.pump()
+		self.assertEqual(results, [error])
+		self.assertEqual(self.errors, [('載入Excel數據', error)])
+
+	def test_cancel_before_start_reports_cancelled(self):
+		worker = self.start()
+		started = threading.Event()
+		release = threading.Event()
+		worker.submit(lambda job: (started.set(), release.wait(TIMEOUT)))
+		started.wait(TIMEOUT)
+		results = []
+		job = worker.submit(lambda job: None, on_error=results.append)
+		job.cancel()
+		release.set()
+		worker.submit(lambda job: None).future.result(TIMEOUT)
+		worker.pump()
+		self.assertEqual(len(results), 1)
+		self.assertIsInstance(results[0], JobCancelled)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+關鍵字索引測試
+KeywordIndex 的查詢結果應與逐格比對 `if cell and kw in str(cell)` 完全相同
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_index import KeywordIndex
+
+
+def naive_first(data, keyword):
+	for row_idx, row in enumerate(data):
+		for col_idx, cell in enumerate(row):
+			if cell and keyword in str(cell):
+				return row_idx, col_idx
+	return None
+
+
+def naive_in_column(data, col_idx, after_row, keyword):
+	for row_idx in range(after_row + 1, len(data)):
+		row = data[row_idx]
+		if col_idx < len(row) and row[col_idx] and keyword in str(row[col_idx]):
+			return row_idx
+	return None
+
+
+SHEET = [
+	['檢查項目', None, '', 0, 12.5],
+	['量測值', '量測值A', 1250, 0.0, '測值'],
+	[None],
+	['x', '檢查項目2', '量', 'abc', 125],
+	['量測值', None, 'ab', '', 'Abc'],
+]
+
+KEYWORDS = ['檢查項目', '量測值', '量', '測值', '', 'a', 'ab', 'abc', 'bc', 'Abc', '12', '125', '0', '0.0',
+			'12.5', '2.5', '不存在', 'x']
+
+
+class KeywordIndexTest(unittest.TestCase):
+
+	def assert_equivalent(self, data, keywords):
+		index = KeywordIndex(data)
+		width = max((len(row) for row in data), default=0)
+		for keyword in keywords:
+			self.assertEqual(index.find_first(keyword), naive_first(data, keyword), keyword)
+			for col_idx in range(width + 1):
+				for after_row in range(-1, len(data)):
+					self.assertEqual(index.find_in_column(col_idx, after_row, keyword),
+									 naive_in_column(data, col_idx, after_row, keyword),
+									 (keyword, col_idx, after_row))
+
+	def test_fixed_sheet(self):
+		self.assert_equivalent(SHEET, KEYWORDS)
+
+	def test_short_keywords(self):
+		index = KeywordIndex(SHEET)
+		self.assertEqual(index.find_first('量'), (1, 0))
+		self.assertEqual(index.find_in_column(2, 1, '量'), 3)
+
+	def test_empty_and_zero_cells_never_match(self):
+		index = KeywordIndex(SHEET)
+		# 0、0.0 與空字串不是有內容的儲存格
+		self.assertIsNone(index.find_first('0.0'))
+		self.assertEqual(index.find_first('0'), (1, 2))
+		# 空關鍵字符合第一個有內容的儲存格
+		self.assertEqual(index.find_first(''), (0, 0))
+		self.assertEqual(index.find_in_column(2, 0, ''), 1)
+
+	def test_repeated_query_uses_cache(self):
+		index = KeywordIndex(SHEET)
+		first = index.matching_texts('量測值')
+		self.assertIs(index.matching_texts('量測值'), first)
+
+	def test_random_sheets(self):
+		rng = random.Random(4)
+		alphabet = ['量', '測', '值', 'a', 'b', '1', '2', '.']
+		for _ in range(20):
+			data = []
+			for _ in range(rng.randint(0, 12)):
+				row = []
+				for _ in range(rng.randint(0, 6)):
+					kind = rng.random()
+					if kind < 0.2:
+						row.append(None)
+					elif kind < 0.4:
+						row.append(rng.choice([0, 1, 12, 2.5, 0.0, 125]))
+					else:
+						row.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 5))))
+				data.append(row)
+			keywords = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))) for _ in range(15)]
+			self.assert_equivalent(data, keywords)
+
+
+if __name__ == "__main__":
+	unittest.main()
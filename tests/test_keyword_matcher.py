@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多關鍵字比對測試
+Aho-Corasick 自動機的結果應與逐一 `keyword in text` 比對相同（重疊、互為前綴/後綴、中日韓文字）
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_index import KeywordIndex
+from keyword_matcher import KeywordMatcher, matcher_for_configs
+
+from tests.test_keyword_index import naive_first, naive_in_column
+
+
+def naive_match(keywords, text):
+	return {keyword for keyword in keywords if keyword in text}
+
+
+def matched(matcher, text):
+	return {matcher.keywords[k] for k in matcher.match(text)}
+
+
+class KeywordMatcherTest(unittest.TestCase):
+
+	def test_overlapping_keywords(self):
+		keywords = ['abab', 'bab', 'ba', 'aba']
+		matcher = KeywordMatcher(keywords)
+		for text in ['ababab', 'xbabx', 'aab', 'abba', '']:
+			self.assertEqual(matched(matcher, text), naive_match(keywords, text), text)
+
+	def test_prefix_and_suffix_keywords(self):
+		keywords = ['量測', '量測值', '值', '測值上限']
+		matcher = KeywordMatcher(keywords)
+		self.assertEqual(matched(matcher, '量測值上限'), {'量測', '量測值', '值', '測值上限'})
+		self.assertEqual(matched(matcher, '量測值下限'), {'量測', '量測值', '值'})
+		self.assertEqual(matched(matcher, '量測'), {'量測'})
+		self.assertEqual(matched(matcher, '測值上限'), {'值', '測值上限'})
+
+	def test_cjk_text(self):
+		keywords = ['檢查項目', '項目', '寸法', 'ゲージ', '측정값']
+		matcher = KeywordMatcher(keywords)
+		for text in ['檢查項目A', '外觀檢查項', '寸法 ゲージ', '측정값 12.5', '項目目項']:
+			self.assertEqual(matched(matcher, text), naive_match(keywords, text), text)
+
+	def test_duplicate_and_empty_keywords(self):
+		matcher = KeywordMatcher(['a', '', 'a', 'b'])
+		self.assertEqual(matcher.keywords, ('a', 'b'))
+
+	def test_random_texts(self):
+		rng = random.Random(7)
+		alphabet = 'ab量測值'
+		for _ in range(50):
+			keywords = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(8)]
+			matcher = KeywordMatcher(keywords)
+			for _ in range(20):
+				text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+				self.assertEqual(matched(matcher, text), naive_match(keywords, text), (keywords, text))
+
+	def test_scan_same_as_index(self):
+		rng = random.Random(11)
+		alphabet = ['量', '測', '值', 'a', '1']
+		data = [[rng.choice([None, 0, 1.5, 12]) if rng.random() < 0.3
+				 else ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+				 for _ in range(rng.randint(0, 6))] for _ in range(30)]
+		keywords = ['量', '量測', '測值', '值', 'a1', '1', '不存在']
+		hits = KeywordMatcher(keywords).scan(data)
+		index = KeywordIndex(data)
+		for keyword in keywords:
+			self.assertEqual(hits.find_first(keyword), naive_first(data, keyword), keyword)
+			self.assertEqual(hits.find_first(keyword), index.find_first(keyword), keyword)
+			for col_idx in range(7):
+				for after_row in range(-1, len(data)):
+					self.assertEqual(hits.find_in_column(col_idx, after_row, keyword),
+									 naive_in_column(data, col_idx, after_row, keyword))
+
+	def test_unknown_keyword(self):
+		hits = KeywordMatcher(['a']).scan([['a']])
+		with self.assertRaises(KeyError):
+			hits.find_first('b')
+
+	def test_matcher_reused_for_same_keywords(self):
+		configs_a = [('A', {'first_keyword': '定位', 'field_name': '量測值'})]
+		configs_b = [('B', {'first_keyword': ' 量測值 ', 'field_name': '定位'})]
+		self.assertIs(matcher_for_configs(configs_a), matcher_for_configs(configs_b))
+		self.assertIsNot(matcher_for_configs(configs_a),
+						 matcher_for_configs([('C', {'field_name': '量測值'})]))
+
+
+if __name__ == "__main__":
+	unittest.main()
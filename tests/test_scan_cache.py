@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+掃描結果快取測試
+LRU淘汰、依工作表清除、鍵的組成（內容標記、關鍵字、掃描範圍）
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scan_cache
+from scan_cache import ScanCache
+
+
+SHEET_A = ('book.xlsx', 'Sheet1')
+SHEET_B = ('book.xlsx', 'Sheet2')
+CELLS = [{'row': 2, 'col': 1, 'position': 'B3'}]
+
+
+class ScanCacheTest(unittest.TestCase):
+
+	def test_hit_returns_copy(self):
+		cache = ScanCache()
+		cache.put((SHEET_A, 1), '定位', '目標', CELLS)
+		cells = cache.get((SHEET_A, 1), '定位', '目標')
+		self.assertEqual(cells, CELLS)
+		cells[0]['row'] = 99
+		self.assertEqual(cache.get((SHEET_A, 1), '定位', '目標'), CELLS)
+		self.assertEqual(cache.stats, {'hits': 2, 'misses': 0, 'entries': 1, 'invalidations': 0})
+
+	def test_key_composition(self):
+		cache = ScanCache()
+		cache.put((SHEET_A, 1), '定位', '目標', CELLS)
+		# 內容標記、工作表、任一關鍵字不同都不能命中
+		self.assertIsNone(cache.get((SHEET_A, 2), '定位', '目標'))
+		self.assertIsNone(cache.get((SHEET_B, 1), '定位', '目標'))
+		self.assertIsNone(cache.get((SHEET_A, 1), '', '目標'))
+		self.assertIsNone(cache.get((SHEET_A, 1), '定位', '其他'))
+		self.assertEqual(cache.misses, 4)
+
+	def test_scan_range_in_key(self):
+		cache = ScanCache()
+		cache.put((SHEET_A, 1), None, '目標', CELLS)
+		with mock.patch.object(scan_cache, 'MAX_VERTICAL_SCAN_RANGE', scan_cache.MAX_VERTICAL_SCAN_RANGE + 1):
+			self.assertIsNone(cache.get((SHEET_A, 1), None, '目標'))
+		self.assertEqual(cache.get((SHEET_A, 1), None, '目標'), CELLS)
+
+	def test_unknown_fingerprint_is_not_cached(self):
+		cache = ScanCache()
+		cache.put(None, '定位', '目標', CELLS)
+		self.assertEqual(len(cache), 0)
+		self.assertIsNone(cache.get(None, '定位', '目標'))
+		self.assertEqual(cache.misses, 1)
+
+	def test_lru_eviction(self):
+		cache = ScanCache(max_entries=2)
+		cache.put((SHEET_A, 1), None, 'a', CELLS)
+		cache.put((SHEET_A, 1), None, 'b', CELLS)
+		# 使用過的 a 移到最後，新增 c 時淘汰最久未使用的 b
+		cache.get((SHEET_A, 1), None, 'a')
+		cache.put((SHEET_A, 1), None, 'c', CELLS)
+		self.assertEqual(len(cache), 2)
+		self.assertIsNone(cache.get((SHEET_A, 1), None, 'b'))
+		self.assertEqual(cache.get((SHEET_A, 1), None, 'a'), CELLS)
+		self.assertEqual(cache.get((SHEET_A, 1), None, 'c'), CELLS)
+
+	def test_invalidate_sheet(self):
+		cache = ScanCache()
+		cache.put((SHEET_A, 1), None, 'a', CELLS)
+		cache.put((SHEET_A, 2), None, 'b', CELLS)
+		cache.put((SHEET_B, 1), None, 'a', CELLS)
+
+		self.assertEqual(cache.invalidate(SHEET_A), 2)
+		self.assertIsNone(cache.get((SHEET_A, 1), None, 'a'))
+		self.assertEqual(cache.get((SHEET_B, 1), None, 'a'), CELLS)
+
+		self.assertEqual(cache.invalidate(), 1)
+		self.assertEqual(len(cache), 0)
+		self.assertEqual(cache.invalidations, 3)
+
+
+if __name__ == "__main__":
+	unittest.main()
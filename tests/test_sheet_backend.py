@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+檔案後端測試
+含公式（有快取值）的工作簿：讀取應得到計算結果，寫入後公式仍保留；未安裝openpyxl時略過openpyxl的部分
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import backend_available
+from benchmarks.synthetic import CONTENT_TYPES, ROOT_RELS, WORKBOOK, WORKBOOK_RELS, shared_strings_xml
+from sheet_backend import ComSheetBackend, OpenpyxlSheetBackend, XlsxSheetBackend
+
+from tests.fake_com import FakeWorkbook, FakeWorksheet
+
+
+SHEET = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+	'<dimension ref="A1:B3"/><sheetData>'
+	'<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>'
+	'<row r="2"><c r="A2"><v>2</v></c><c r="B2"><f>A2*3</f><v>6</v></c></row>'
+	'<row r="3"><c r="A3"><v>4</v></c></row>'
+	'</sheetData></worksheet>')
+
+
+def build_xlsx(path):
+	with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+		archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+		archive.writestr('_rels/.rels', ROOT_RELS)
+		archive.writestr('xl/workbook.xml', WORKBOOK.format(name='Sheet1'))
+		archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+		archive.writestr('xl/worksheets/sheet1.xml', SHEET)
+		archive.writestr('xl/sharedStrings.xml', shared_strings_xml(['定位', '量測值']))
+
+
+class FileBackendTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'book.xlsx')
+		build_xlsx(self.path)
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors=True)
+
+	def test_identity(self):
+		self.assertEqual(XlsxSheetBackend(self.path).identity(), XlsxSheetBackend(self.path).identity())
+		self.assertNotEqual(XlsxSheetBackend(self.path).identity(), XlsxSheetBackend(self.path, 'Sheet2').identity())
+
+		workbook = FakeWorkbook()
+		sheet1 = FakeWorksheet([['a']], workbook=workbook)
+		sheet2 = FakeWorksheet([['a']], name='Sheet2', workbook=workbook)
+		other = FakeWorksheet([['a']], workbook=FakeWorkbook('Book2.xlsx'))
+		identity = ComSheetBackend(workbook, sheet1).identity()
+		self.assertEqual(identity, ('C:\\Book1.xlsx', 'Sheet1'))
+		self.assertNotEqual(ComSheetBackend(workbook, sheet2).identity(), identity)
+		self.assertNotEqual(ComSheetBackend(other.Parent, other).identity(), identity)
+
+	def test_xlsx_reads_cached_values(self):
+		backend = XlsxSheetBackend(self.path)
+		self.assertEqual(backend.read_region(0, 0, 2, 1), [['定位', '量測值'], [2, 6], [4, None]])
+
+	@unittest.skipUnless(backend_available('openpyxl'), "未安裝openpyxl")
+	def test_openpyxl_reads_cached_values(self):
+		with OpenpyxlSheetBackend(self.path) as backend:
+			self.assertEqual(backend.read_region(0, 0, 2, 1), [['定位', '量測值'], [2, 6], [4, None]])
+			self.assertEqual(backend.read_all().data[1][1], 6)
+			# 只讀取時不載入保留公式的工作簿
+			self.assertIsNone(backend.writer)
+
+	@unittest.skipUnless(backend_available('openpyxl'), "未安裝openpyxl")
+	def test_openpyxl_write_keeps_formulas(self):
+		from openpyxl import load_workbook
+
+		with OpenpyxlSheetBackend(self.path) as backend:
+			self.assertEqual(backend.write_cells([(2, 1, 9), (2, 0, None)]), 2)
+			self.assertEqual(backend.save(), 'openpyxl')
+
+		workbook = load_workbook(self.path)
+		sheet = workbook.active
+		self.assertEqual(sheet['B2'].value, '=A2*3')
+		self.assertEqual(sheet['B3'].value, 9)
+		self.assertIsNone(sheet['A3'].value)
+		workbook.close()
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作表快照測試
+以模擬的COM工作表與直接呼叫的事件處理驗證部分重讀，以及重新計算後的公式儲存格不會沿用舊值
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sheet_snapshot import ChangeTracker, ComSheetSource, ExcelAppEvents, SheetSnapshot
+
+from tests.fake_com import FakeWorkbook, FakeWorksheet
+
+
+class ComSnapshotTest(unittest.TestCase):
+
+	def setUp(self):
+		# 不經由COM掛上事件，直接呼叫事件處理
+		self.tracker = ChangeTracker()
+		self.events = self.tracker.app_events = ExcelAppEvents()
+		self.events.tracker = self.tracker
+
+		workbook = FakeWorkbook()
+		# C3 模擬公式 =A1*2
+		self.worksheet = FakeWorksheet([[1, None, None], ['x', 'y', None], [None, None, 2]], workbook=workbook)
+		self.source = ComSheetSource(workbook, self.worksheet, self.tracker)
+		self.snapshot = SheetSnapshot()
+		self.snapshot.refresh(self.source)
+
+	def edit(self, row, col, value):
+		"""使用者在Excel中修改儲存格（觸發SheetChange）"""
+		self.worksheet.set(row, col, value)
+		self.events.OnSheetChange(self.worksheet, self.worksheet.Cells(row + 1, col + 1))
+
+	def test_unchanged_sheet_is_not_read(self):
+		token = self.source.change_token()
+		self.snapshot.refresh(self.source)
+		self.assertEqual(self.snapshot.hits, 1)
+		self.assertEqual(self.source.change_token(), token)
+
+	def test_changed_rows_are_reread(self):
+		self.edit(1, 2, 'z')
+		model = self.snapshot.refresh(self.source)
+		self.assertEqual(model.data[1], ['x', 'y', 'z'])
+		self.assertEqual((self.snapshot.full_reloads, self.snapshot.partial_reloads), (1, 1))
+
+	def test_recalculated_formula_is_reread(self):
+		# 修改A1後C3（公式）在另一行重新計算，只有SheetCalculate通知
+		self.edit(0, 0, 5)
+		self.worksheet.set(2, 2, 10)
+		self.events.OnSheetCalculate(self.worksheet)
+
+		model = self.snapshot.refresh(self.source)
+		self.assertEqual(model.data[0][0], 5)
+		self.assertEqual(model.data[2][2], 10)
+		self.assertEqual((self.snapshot.full_reloads, self.snapshot.partial_reloads), (2, 0))
+
+	def test_calculate_changes_token(self):
+		token = self.source.change_token()
+		self.worksheet.set(2, 2, '')
+		self.events.OnSheetCalculate(self.worksheet)
+		self.assertNotEqual(self.source.change_token(), token)
+		self.assertEqual(self.snapshot.refresh(self.source).data[2][2], '')
+
+	def test_other_sheet_events_are_ignored(self):
+		other = FakeWorksheet([[1]], name='Sheet2', workbook=self.worksheet.Parent)
+		self.events.OnSheetCalculate(other)
+		self.snapshot.refresh(self.source)
+		self.assertEqual(self.snapshot.hits, 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
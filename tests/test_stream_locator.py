@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+檔案模式欄位定位測試
+StreamingFieldLocator 提早停止、只保留目標欄位下方的行，結果（含錯誤訊息）應與 FieldLocator 對完整工作表的結果相同
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import FIRST_KEYWORD, SHAPE_HORIZONTAL, SHAPE_VERTICAL, TARGET_KEYWORD, \
+	make_checklist, write_xlsx
+from engine import MAX_HORIZONTAL_SCAN_RANGE, FieldLocator, MappingError, SheetModel
+from stream_locator import StreamingFieldLocator, locate_in_file
+from xlsx_reader import XlsxSheetReader
+
+
+def full_result(data, first_keyword, second_keyword):
+	"""完整工作表的結果：空格列表或錯誤訊息"""
+	try:
+		return FieldLocator(SheetModel(data)).locate(first_keyword, second_keyword)
+	except MappingError as e:
+		return str(e)
+
+
+def streaming_result(data, first_keyword, second_keyword):
+	locator = StreamingFieldLocator(iter(data))
+	try:
+		return locator.locate(first_keyword, second_keyword), locator.rows_read
+	except MappingError as e:
+		return str(e), locator.rows_read
+
+
+def block_sheet(stop, width=MAX_HORIZONTAL_SCAN_RANGE + 3, field_col=1, block_rows=3):
+	"""目標欄位在第1行，下方 block_rows 行為空格，之後以 stop 指定的方式結束（None 為工作表結尾）"""
+	data = [['標題'] * width, ['x'] * width]
+	data[1][field_col] = '量測值'
+	for _ in range(block_rows):
+		row = ['x'] * width
+		row[field_col:field_col + MAX_HORIZONTAL_SCAN_RANGE] = [None] * MAX_HORIZONTAL_SCAN_RANGE
+		data.append(row[:width])
+	if stop is not None:
+		data.append(stop(list(data[-1]), field_col))
+		data.append(['之後'] * width)
+	return data
+
+
+class StreamingFieldLocatorTest(unittest.TestCase):
+
+	def assert_same(self, data, first_keyword, second_keyword):
+		expected = full_result(data, first_keyword, second_keyword)
+		result, rows_read = streaming_result(data, first_keyword, second_keyword)
+		self.assertEqual(result, expected, (first_keyword, second_keyword))
+		self.assertLessEqual(rows_read, len(data))
+		return rows_read
+
+	def test_block_stops_at_content(self):
+		def content_in_range(row, field_col):
+			row[field_col + MAX_HORIZONTAL_SCAN_RANGE - 1] = '內容'
+			return row
+
+		data = block_sheet(content_in_range)
+		rows_read = self.assert_same(data, '', '量測值')
+		# 讀到結束區塊的行即停止，該行內容左側的空格仍屬於區塊
+		self.assertEqual(rows_read, len(data) - 1)
+		self.assertEqual(len(full_result(data, '', '量測值')), 4 * MAX_HORIZONTAL_SCAN_RANGE - 1)
+
+	def test_content_outside_scan_range(self):
+		# 掃描範圍右側的內容不會結束區塊：下一行仍屬於區塊
+		def content_after_range(row, field_col):
+			row[field_col + MAX_HORIZONTAL_SCAN_RANGE] = '內容'
+			return row
+
+		data = block_sheet(content_after_range)
+		self.assert_same(data, '', '量測值')
+		self.assertEqual(len(full_result(data, '', '量測值')), 4 * MAX_HORIZONTAL_SCAN_RANGE)
+
+	def test_block_stops_at_short_row(self):
+		for length in range(0, 4):
+			data = block_sheet(lambda row, field_col: row[:field_col + length])
+			self.assert_same(data, '', '量測值')
+
+	def test_block_reaches_last_row(self):
+		for block_rows in (0, 1, 5):
+			self.assert_same(block_sheet(None, block_rows=block_rows), '', '量測值')
+
+	def test_block_crosses_right_edge(self):
+		# 目標欄在最右側附近，每行的掃描範圍被工作表寬度截斷
+		for field_col in range(MAX_HORIZONTAL_SCAN_RANGE + 3):
+			data = block_sheet(None, field_col=field_col)
+			self.assert_same(data, '', '量測值')
+
+	def test_horizontal_fallback(self):
+		data = [['定位', None, None], ['量測值', None, None, '-', None], ['內容', None, None, 'x', None]]
+		self.assert_same(data, '', '量測值')
+		self.assert_same(data, '定位', '量測值')
+		self.assert_same([['量測值', None]], '', '量測值')
+
+	def test_errors(self):
+		data = [['定位', '量測值'], [None, None], ['量測值', None]]
+		for first_keyword, second_keyword in [('', '不存在'), ('不存在', '量測值'), ('定位', '不存在'),
+											  ('量測值', '定位')]:
+			self.assert_same(data, first_keyword, second_keyword)
+
+	def test_first_keyword_column(self):
+		# 目標欄位在定位列的同一欄往下找（同一行或其他欄的目標欄位不算）
+		data = [['量測值', '定位'], [None, None], ['量測值', 'x'], [None, '量測值'], [None, None], [None, None]]
+		self.assert_same(data, '定位', '量測值')
+		self.assertEqual(streaming_result(data, '定位', '量測值')[0][0]['position'], 'B5')
+
+	def test_random_sheets(self):
+		rng = random.Random(9)
+		filler = [None, None, '', ' ', 0, '量', '測值', '量測值', '定位', 12, 'x']
+		for _ in range(300):
+			data = [[rng.choice(filler) for _ in range(rng.randint(0, 8))] for _ in range(rng.randint(0, 15))]
+			for first_keyword, second_keyword in [('', '量測值'), ('定位', '量測值'), ('量', '測值'), ('', '12')]:
+				self.assert_same(data, first_keyword, second_keyword)
+
+
+class LocateInFileTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'book.xlsx')
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors=True)
+
+	def assert_same_as_full(self, data):
+		write_xlsx(self.path, data)
+		with XlsxSheetReader(self.path) as reader:
+			full_model = reader.read_all()
+		for first_keyword in (FIRST_KEYWORD, ''):
+			expected = FieldLocator(full_model).locate(first_keyword, TARGET_KEYWORD)
+			empty_cells, rows_read = locate_in_file(self.path, first_keyword, TARGET_KEYWORD)
+			self.assertEqual(empty_cells, expected)
+			self.assertLessEqual(rows_read, len(full_model))
+		return rows_read
+
+	def test_vertical_block(self):
+		for position in (0, 0.5, 1):
+			data, (field_row, _) = make_checklist(60, 8, position=position, block_size=10, seed=4)
+			rows_read = self.assert_same_as_full(data)
+			# 目標欄位、10行空格及結束區塊的一行
+			self.assertEqual(rows_read, min(field_row + 12, len(data)))
+
+	def test_horizontal_block(self):
+		data, (field_row, _) = make_checklist(60, 12, shape=SHAPE_HORIZONTAL, block_size=6, seed=5)
+		self.assertEqual(self.assert_same_as_full(data), field_row + 2)
+
+	def test_block_at_end_of_sheet(self):
+		# 空格區塊延伸到工作表最後一行（結尾的空行不會寫入檔案）
+		data, _ = make_checklist(30, 8, position=1, shape=SHAPE_VERTICAL, block_size=10, seed=6)
+		self.assert_same_as_full(data[:-1])
+
+	def test_missing_sheet(self):
+		write_xlsx(self.path, [['量測值']])
+		with self.assertRaises(MappingError):
+			locate_in_file(self.path, '', TARGET_KEYWORD, sheet_name='不存在')
+
+
+if __name__ == "__main__":
+	unittest.main()
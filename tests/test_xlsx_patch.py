@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+xlsx就地修補測試
+以zipfile建立的小型工作簿驗證儲存格替換/插入、<dimension>、calcChain移除與未修改成員的原樣複製
+"""
+
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import ROOT_RELS, WORKBOOK
+from xlsx_patch import CALC_CHAIN_PART, PatchError, SheetXmlPatcher, group_targets, patch_xlsx
+
+
+SHEET_PART = 'xl/worksheets/sheet1.xml'
+
+CONTENT_TYPES = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+	'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+	'<Default Extension="xml" ContentType="application/xml"/>'
+	'<Override PartName="/xl/workbook.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+	'<Override PartName="/xl/worksheets/sheet1.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+	'<Override PartName="/xl/calcChain.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/>'
+	'</Types>')
+WORKBOOK_RELS = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+	'<Relationship Id="rId1" '
+	'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+	'Target="worksheets/sheet1.xml"/>'
+	'<Relationship Id="rId2" '
+	'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/calcChain" '
+	'Target="calcChain.xml"/></Relationships>')
+CALC_CHAIN = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<calcChain xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><c r="C2" i="1"/></calcChain>')
+
+SHEET = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+	'<dimension ref="A1:C3"/><sheetData>'
+	'<row r="1" spans="1:3"><c r="A1" t="inlineStr"><is><t>項目</t></is></c><c r="B1" s="3"><v>1</v></c></row>'
+	'<row r="2"/>'
+	'<row r="3"><c r="A3"><v>2</v></c><c r="C3"><f>A3*2</f><v>4</v></c></row>'
+	'</sheetData><pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" header="0.3" footer="0.3"/>'
+	'</worksheet>')
+
+
+def build_xlsx(path, sheet=SHEET):
+	with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+		archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+		archive.writestr('_rels/.rels', ROOT_RELS)
+		archive.writestr('xl/workbook.xml', WORKBOOK.format(name='Sheet1'))
+		archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+		archive.writestr(SHEET_PART, sheet)
+		archive.writestr(CALC_CHAIN_PART, CALC_CHAIN)
+		# 非壓縮成員也應原樣複製
+		archive.writestr('docProps/custom.bin', bytes(range(256)) * 4, zipfile.ZIP_STORED)
+
+
+def patch_text(sheet, plan, chunk_size):
+	patcher = SheetXmlPatcher(group_targets(plan), chunk_size)
+	data = b''.join(patcher.iter_patch(io.BytesIO(sheet.encode('utf-8'))))
+	return data.decode('utf-8'), patcher
+
+
+def row_xml(sheet, row_number):
+	match = re.search(r'<row r="%d"[^>]*?(?:/>|>.*?</row>)' % row_number, sheet)
+	return match.group(0) if match else None
+
+
+class SheetXmlPatcherTest(unittest.TestCase):
+	"""以很小的區段大小執行，確保標籤被切在區段邊界時結果相同"""
+
+	CHUNK_SIZES = (1, 7, 64, 1 << 20)
+
+	def patch(self, plan, sheet=SHEET):
+		results = set()
+		for chunk_size in self.CHUNK_SIZES:
+			text, patcher = patch_text(sheet, plan, chunk_size)
+			results.add(text)
+		self.assertEqual(len(results), 1)
+		return text, patcher
+
+	def test_untouched_sheet_is_identical(self):
+		text, _ = self.patch([(0, 0, '項目')])
+		self.assertEqual(text.replace(row_xml(text, 1), ''), SHEET.replace(row_xml(SHEET, 1), ''))
+
+	def test_replace_keeps_style(self):
+		text, patcher = self.patch([(0, 1, 5)])
+		self.assertIn('<c r="B1" s="3"><v>5</v></c>', text)
+		self.assertEqual(patcher.cells_replaced, 1)
+		self.assertFalse(patcher.formula_removed)
+		# 沒有新增儲存格時保留 spans
+		self.assertIn('<row r="1" spans="1:3">', text)
+
+	def test_replace_formula(self):
+		text, patcher = self.patch([(2, 2, 7)])
+		self.assertEqual(row_xml(text, 3), '<row r="3"><c r="A3"><v>2</v></c><c r="C3"><v>7</v></c></row>')
+		self.assertTrue(patcher.formula_removed)
+
+	def test_shared_formula_master_refused(self):
+		sheet = SHEET.replace('<f>A3*2</f>', '<f t="shared" ref="C3:C5" si="0">A3*2</f>')
+		with self.assertRaises(PatchError):
+			patch_text(sheet, [(2, 2, 7)], 1 << 20)
+
+	def test_insert_into_self_closing_row(self):
+		text, patcher = self.patch([(1, 1, 'x')])
+		self.assertEqual(row_xml(text, 2),
+						 '<row r="2"><c r="B2" t="inlineStr"><is><t xml:space="preserve">x</t></is></c></row>')
+		self.assertEqual(patcher.cells_inserted, 1)
+
+	def test_insert_cells_in_column_order(self):
+		text, _ = self.patch([(0, 2, 1), (0, 0, None)])
+		row = row_xml(text, 1)
+		self.assertEqual(re.findall(r'<c r="(\w+)"', row), ['A1', 'B1', 'C1'])
+		self.assertNotIn('spans', row)
+
+	def test_new_rows_before_between_and_after(self):
+		sheet = ('<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+				 '<row r="2"><c r="A2"><v>1</v></c></row><row r="4"/></sheetData></worksheet>')
+		text, _ = self.patch([(0, 0, 1), (2, 0, 2), (9, 3, 3)], sheet)
+		self.assertEqual(re.findall(r'<row r="(\d+)"', text), ['1', '2', '3', '4', '10'])
+
+	def test_new_row_after_last_row(self):
+		text, patcher = self.patch([(5, 0, 1.5)])
+		self.assertTrue(text.endswith('<row r="6"><c r="A6"><v>1.5</v></c></row></sheetData>'
+									  '<pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" '
+									  'header="0.3" footer="0.3"/></worksheet>'))
+		self.assertEqual(patcher.cells_inserted, 1)
+
+	def test_escaping(self):
+		text, _ = self.patch([(1, 0, 'a<b & c>d\x01')])
+		self.assertIn('<t xml:space="preserve">a&lt;b &amp; c&gt;d</t>', text)
+
+	def test_dimension_grows(self):
+		text, _ = self.patch([(9, 4, 1)])
+		self.assertIn('<dimension ref="A1:E10"/>', text)
+		text, _ = self.patch([(0, 0, 1)])
+		self.assertIn('<dimension ref="A1:C3"/>', text)
+
+	def test_empty_sheet_data(self):
+		sheet = SHEET[:SHEET.index('<sheetData>')] + '<sheetData/></worksheet>'
+		text, patcher = self.patch([(1, 0, True)], sheet)
+		self.assertIn('<sheetData><row r="2"><c r="A2" t="b"><v>1</v></c></row></sheetData>', text)
+		self.assertEqual(patcher.cells_inserted, 1)
+
+	def test_prefixed_namespace(self):
+		sheet = ('<x:worksheet xmlns:x="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+				 '<x:sheetData><x:row r="1"><x:c r="A1"><x:v>1</x:v></x:c></x:row></x:sheetData></x:worksheet>')
+		text, _ = self.patch([(0, 0, 2), (1, 0, 3)], sheet)
+		self.assertIn('<x:row r="1"><x:c r="A1"><x:v>2</x:v></x:c></x:row>'
+					  '<x:row r="2"><x:c r="A2"><x:v>3</x:v></x:c></x:row></x:sheetData>', text)
+
+	def test_truncated_xml(self):
+		with self.assertRaises(PatchError):
+			patch_text(SHEET[:SHEET.index('<row r="3">') + 5], [(0, 0, 1)], 16)
+
+
+class PatchXlsxTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'book.xlsx')
+		build_xlsx(self.path)
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors=True)
+
+	def raw_members(self, path):
+		"""成員名稱 -> (壓縮方式, CRC, 壓縮後的原始位元組)"""
+		members = {}
+		with open(path, 'rb') as f, zipfile.ZipFile(path) as archive:
+			for info in archive.infolist():
+				f.seek(info.header_offset + 26)
+				name_length = int.from_bytes(f.read(2), 'little')
+				extra_length = int.from_bytes(f.read(2), 'little')
+				f.seek(name_length + extra_length, os.SEEK_CUR)
+				members[info.filename] = (info.compress_type, info.CRC, f.read(info.compress_size))
+		return members
+
+	def test_untouched_members_are_byte_identical(self):
+		before = self.raw_members(self.path)
+		stats = patch_xlsx(self.path, [(1, 1, 'x')])
+
+		with zipfile.ZipFile(self.path) as archive:
+			self.assertIsNone(archive.testzip())
+			self.assertEqual(archive.namelist(), list(before))
+		after = self.raw_members(self.path)
+		rewritten = {SHEET_PART, 'xl/workbook.xml'}
+		for name in before:
+			if name not in rewritten:
+				self.assertEqual(after[name], before[name], name)
+		self.assertEqual(stats['members_copied'], len(before) - len(rewritten))
+		self.assertEqual(stats['members_rewritten'], len(rewritten))
+		self.assertFalse(stats['calc_chain_removed'])
+
+	def test_full_calc_on_load(self):
+		stats = patch_xlsx(self.path, [(0, 1, 2)])
+		with zipfile.ZipFile(self.path) as archive:
+			self.assertIn('fullCalcOnLoad="1"', archive.read('xl/workbook.xml').decode('utf-8'))
+		self.assertTrue(stats['full_calc_on_load'])
+
+	def test_formula_overwrite_removes_calc_chain(self):
+		stats = patch_xlsx(self.path, [(2, 2, 7)])
+		self.assertTrue(stats['calc_chain_removed'])
+		with zipfile.ZipFile(self.path) as archive:
+			self.assertIsNone(archive.testzip())
+			self.assertNotIn(CALC_CHAIN_PART, archive.namelist())
+			self.assertNotIn('calcChain', archive.read('[Content_Types].xml').decode('utf-8'))
+			self.assertNotIn('calcChain', archive.read('xl/_rels/workbook.xml.rels').decode('utf-8'))
+			self.assertIn('<c r="C3"><v>7</v></c>', archive.read(SHEET_PART).decode('utf-8'))
+
+	def test_output_path_leaves_source(self):
+		with open(self.path, 'rb') as f:
+			original = f.read()
+		output_path = os.path.join(self.directory, 'out.xlsx')
+		patch_xlsx(self.path, [(0, 0, 1)], output_path=output_path)
+		with open(self.path, 'rb') as f:
+			self.assertEqual(f.read(), original)
+		with zipfile.ZipFile(output_path) as archive:
+			self.assertIn('<c r="A1"><v>1</v></c>', archive.read(SHEET_PART).decode('utf-8'))
+
+	def test_failure_leaves_file_unchanged(self):
+		build_xlsx(self.path, SHEET.replace('<f>A3*2</f>', '<f t="array" ref="C3:C4">A3*2</f>'))
+		with open(self.path, 'rb') as f:
+			original = f.read()
+		with self.assertRaises(PatchError):
+			patch_xlsx(self.path, [(2, 2, 7)])
+		with open(self.path, 'rb') as f:
+			self.assertEqual(f.read(), original)
+		self.assertEqual(os.listdir(self.directory), ['book.xlsx'])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+xlsx讀取測試
+以合成的xlsx驗證共用字串、inline字串、日期、稀疏的儲存格與公式；安裝openpyxl時與 data_only=True 的結果比對
+"""
+
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import backend_available
+from benchmarks.synthetic import ROOT_RELS, WORKBOOK_RELS, make_checklist, shared_strings_xml, write_xlsx
+from xlsx_reader import XlsxSheetReader, active_sheet_name
+
+
+CONTENT_TYPES = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+	'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+	'<Default Extension="xml" ContentType="application/xml"/>'
+	'<Override PartName="/xl/workbook.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+	'<Override PartName="/xl/worksheets/sheet1.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+	'<Override PartName="/xl/worksheets/sheet2.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+	'<Override PartName="/xl/sharedStrings.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+	'<Override PartName="/xl/styles.xml" '
+	'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+	'</Types>')
+WORKBOOK = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+	'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+	'{properties}<bookViews><workbookView activeTab="1"/></bookViews>'
+	'<sheets><sheet name="封面" sheetId="1" r:id="rId3"/><sheet name="檢查表" sheetId="2" r:id="rId1"/></sheets>'
+	'</workbook>')
+WORKBOOK_RELS_2 = WORKBOOK_RELS.replace(
+	'</Relationships>',
+	'<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+	'Target="worksheets/sheet2.xml"/>'
+	'<Relationship Id="rId4" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+	'Target="styles.xml"/></Relationships>')
+# 樣式 1: 內建日期格式 14，2: 自訂日期時間，3: 時間長度 [h]:mm，4: 一般數字（含引號中的 d）
+STYLES = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+	'<numFmts count="3"><numFmt numFmtId="164" formatCode="yyyy/mm/dd hh:mm"/>'
+	'<numFmt numFmtId="165" formatCode="[h]:mm"/><numFmt numFmtId="166" formatCode="0.00&quot;d&quot;"/></numFmts>'
+	'<cellXfs count="5"><xf numFmtId="0"/><xf numFmtId="14"/><xf numFmtId="164"/><xf numFmtId="165"/>'
+	'<xf numFmtId="166"/></cellXfs></styleSheet>')
+SHARED = ['定位', '量測值', '含 & 的文字']
+SHEET = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+	'<dimension ref="A1:E6"/><sheetData>'
+	'<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="inlineStr"><is><t>inline</t></is></c>'
+	'<c r="E1" t="inlineStr"><is><r><t>分</t></r><r><t>段</t></r></is></c></row>'
+	'<row r="2"><c r="B2" t="s"><v>1</v></c><c r="D2" t="s"><v>2</v></c></row>'
+	'<row r="4"><c r="A4" s="1"><v>45292</v></c><c r="B4" s="2"><v>45292.5</v></c>'
+	'<c r="C4" s="3"><v>1.25</v></c><c r="D4" s="4"><v>3</v></c><c r="E4" s="1"><v>0.5</v></c></row>'
+	'<row r="5"><c r="A5"><f>1+1</f><v>2</v></c><c r="B5" t="str"><f>A1&amp;"x"</f><v>定位x</v></c>'
+	'<c r="C5" t="b"><v>1</v></c><c r="D5" t="e"><v>#DIV/0!</v></c><c r="E5"><v>1.5E3</v></c></row>'
+	'<row><c><v>7</v></c><c><v>8</v></c><c r="E6"/></row>'
+	'</sheetData></worksheet>')
+COVER = (
+	'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+	'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+	'<sheetData><row r="1"><c r="A1" t="inlineStr"><is><t>封面</t></is></c></row></sheetData></worksheet>')
+
+EXPECTED = [
+	['定位', None, 'inline', None, '分段'],
+	[None, '量測值', None, '含 & 的文字', None],
+	[None] * 5,
+	[datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 1, 12), datetime.timedelta(days=1.25), 3,
+	 datetime.time(12)],
+	[2, '定位x', True, '#DIV/0!', 1500.0],
+	[7, 8, None, None, None],
+]
+
+
+def build_xlsx(path, date1904=False):
+	properties = '<workbookPr date1904="1"/>' if date1904 else ''
+	with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+		archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+		archive.writestr('_rels/.rels', ROOT_RELS)
+		archive.writestr('xl/workbook.xml', WORKBOOK.format(properties=properties))
+		archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS_2)
+		archive.writestr('xl/worksheets/sheet1.xml', SHEET)
+		archive.writestr('xl/worksheets/sheet2.xml', COVER)
+		archive.writestr('xl/sharedStrings.xml', shared_strings_xml(SHARED))
+		archive.writestr('xl/styles.xml', STYLES)
+
+
+class XlsxSheetReaderTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'book.xlsx')
+		build_xlsx(self.path)
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors=True)
+
+	def test_values(self):
+		with XlsxSheetReader(self.path) as reader:
+			self.assertEqual(reader.sheet_name, '檢查表')
+			self.assertEqual(list(reader.iter_rows()), EXPECTED)
+			self.assertEqual(reader.max_column, 5)
+
+	def test_formulas(self):
+		with XlsxSheetReader(self.path) as reader:
+			model = reader.read_all()
+		self.assertEqual(model.formulas, {(4, 0): '=1+1', (4, 1): '=A1&"x"'})
+		self.assertEqual(model.data[4][0], 2)
+
+	def test_select_sheet(self):
+		self.assertEqual(active_sheet_name(self.path), '檢查表')
+		with XlsxSheetReader(self.path, '封面') as reader:
+			self.assertEqual(list(reader.iter_rows()), [['封面']])
+		with self.assertRaises(KeyError):
+			XlsxSheetReader(self.path, '不存在')
+
+	def test_1904_dates(self):
+		build_xlsx(self.path, date1904=True)
+		with XlsxSheetReader(self.path) as reader:
+			rows = list(reader.iter_rows())
+		self.assertEqual(rows[3][0], datetime.datetime(1904, 1, 1) + datetime.timedelta(days=45292))
+
+	def test_synthetic_checklist(self):
+		data, _ = make_checklist(40, 12, seed=3)
+		write_xlsx(self.path, data)
+		with XlsxSheetReader(self.path) as reader:
+			rows = list(reader.iter_rows())
+		self.assertEqual(rows, data)
+
+	@unittest.skipUnless(backend_available('openpyxl'), "未安裝openpyxl")
+	def test_same_as_openpyxl(self):
+		from openpyxl import load_workbook
+
+		for date1904 in (False, True):
+			build_xlsx(self.path, date1904)
+			workbook = load_workbook(self.path, data_only=True)
+			expected = [list(row) for row in workbook['檢查表'].iter_rows(values_only=True)]
+			workbook.close()
+			with XlsxSheetReader(self.path) as reader:
+				self.assertEqual(list(reader.iter_rows()), expected)
+
+
+if __name__ == "__main__":
+	unittest.main()
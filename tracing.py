@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+階段計時追蹤
+以環境變數 SHT_TRACE 開啟：
+	SHT_TRACE=jsonl   每個階段一行JSON，寫入 trace.jsonl（超過大小時輪替）
+	SHT_TRACE=chrome  Chrome追蹤格式（chrome://tracing 或 Perfetto 可直接開啟）
+	SHT_TRACE_PATH    輸出檔路徑（預設在配置資料夾的 traces 中）
+未開啟時 span() 回傳共用的空物件，幾乎沒有額外成本
+"""
+
+import json
+import os
+import threading
+import time
+
+from engine import FIELD_MAPPING_DIR
+
+
+TRACE_DIR = os.path.join(FIELD_MAPPING_DIR, "traces")
+
+# JSONL輪替：單檔上限與保留的舊檔數量
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+MODE_JSONL = 'jsonl'
+MODE_CHROME = 'chrome'
+
+
+class NullSpan:
+	"""追蹤關閉時使用的空物件"""
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		return False
+
+	def set(self, **fields):
+		pass
+
+	def finish(self, error=None, **fields):
+		pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class JsonlSink:
+	"""每筆記錄一行JSON，檔案超過上限時輪替（trace.jsonl -> trace.jsonl.1 ...）"""
+
+	def __init__(self, path, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+		self.path = path
+		self.max_bytes = max_bytes
+		self.backup_count = backup_count
+
+	def rotate(self):
+		for i in range(self.backup_count - 1, 0, -1):
+			source = f"{self.path}.{i}"
+			if os.path.exists(source):
+				os.replace(source, f"{self.path}.{i + 1}")
+		os.replace(self.path, f"{self.path}.1")
+
+	def write(self, span):
+		record = {
+			'name': span.name,
+			'ts': span.wall_start,
+			'dur_ms': round(span.duration * 1000, 3),
+			'pid': os.getpid(),
+			'thread': span.thread,
+			'parent': span.parent,
+		}
+		record.update(span.fields)
+		if span.error:
+			record['error'] = span.error
+		line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+		if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+			self.rotate()
+		with open(self.path, 'a', encoding='utf-8') as f:
+			f.write(line)
+
+
+class ChromeTraceSink:
+	"""Chrome追蹤格式的JSON陣列（結尾的 ] 可省略，程式中斷時檔案仍可開啟）"""
+
+	def __init__(self, path):
+		self.path = path
+		# 多個程序（批次模式）可共用同一個檔案，只有新檔案才寫入開頭
+		if not os.path.exists(path) or os.path.getsize(path) == 0:
+			with open(path, 'w', encoding='utf-8') as f:
+				f.write('[\n')
+
+	def write(self, span):
+		args = dict(span.fields)
+		if span.error:
+			args['error'] = span.error
+		event = {
+			'name': span.name,
+			'cat': 'sht',
+			'ph': 'X',
+			'ts': round(span.wall_start * 1e6),
+			'dur': round(span.duration * 1e6),
+			'pid': os.getpid(),
+			'tid': span.thread_id,
+			'args': args,
+		}
+		with open(self.path, 'a', encoding='utf-8') as f:
+			f.write(json.dumps(event, ensure_ascii=False, default=str) + ',\n')
+
+
+class Span:
+	"""一個階段的計時：可作為 with 區塊，或以 finish() 手動結束（例如跨多次事件的CSV載入）"""
+
+	def __init__(self, tracer, name, fields):
+		self.tracer = tracer
+		self.name = name
+		self.fields = fields
+		self.error = None
+		self.duration = 0.0
+		self.thread = threading.current_thread().name
+		self.thread_id = threading.get_ident()
+		self.parent = tracer.current()
+		self.wall_start = time.time()
+		self.start = time.perf_counter()
+		self.finished = False
+
+	def __enter__(self):
+		self.tracer.push(self)
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		self.tracer.pop(self)
+		self.finish(error=f"{exc_type.__name__}: {exc}" if exc_type else None)
+		return False
+
+	def set(self, **fields):
+		"""加上記錄欄位（儲存格數量、使用的後端等）"""
+		self.fields.update(fields)
+
+	def finish(self, error=None, **fields):
+		if self.finished:
+			return
+		self.finished = True
+		self.duration = time.perf_counter() - self.start
+		self.fields.update(fields)
+		self.error = error
+		self.tracer.emit(self)
+
+
+class Tracer:
+	"""將結束的階段交給輸出端"""
+
+	def __init__(self, sink=None):
+		self.sink = sink
+		self.local = threading.local()
+		self.lock = threading.Lock()
+
+	@property
+	def enabled(self):
+		return self.sink is not None
+
+	def stack(self):
+		stack = getattr(self.local, 'stack', None)
+		if stack is None:
+			stack = self.local.stack = []
+		return stack
+
+	def current(self):
+		stack = self.stack()
+		return stack[-1].name if stack else None
+
+	def push(self, span):
+		self.stack().append(span)
+
+	def pop(self, span):
+		stack = self.stack()
+		if stack and stack[-1] is span:
+			stack.pop()
+
+	def emit(self, span):
+		try:
+			with self.lock:
+				self.sink.write(span)
+		except OSError as e:
+			# 追蹤失敗不影響主要流程
+			print(f"寫入追蹤記錄失敗: {e}")
+
+
+def default_path(mode):
+	return os.path.join(TRACE_DIR, 'trace.jsonl' if mode == MODE_JSONL else f"trace-{os.getpid()}.json")
+
+
+def make_sink(mode, path=None):
+	"""依模式建立輸出端，模式無效時回傳None"""
+	if mode not in (MODE_JSONL, MODE_CHROME):
+		return None
+	path = path or default_path(mode)
+	os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+	return JsonlSink(path) if mode == MODE_JSONL else ChromeTraceSink(path)
+
+
+_tracer = Tracer()
+
+
+def configure(mode=None, path=None):
+	"""設定追蹤模式（預設讀取環境變數），回傳是否開啟"""
+	if mode is None:
+		mode = os.environ.get('SHT_TRACE', '').strip().lower()
+		path = path or os.environ.get('SHT_TRACE_PATH') or None
+	try:
+		_tracer.sink = make_sink(mode, path)
+	except OSError as e:
+		print(f"無法開啟追蹤記錄: {e}")
+		_tracer.sink = None
+	return _tracer.enabled
+
+
+def enabled():
+	return _tracer.enabled
+
+
+def span(name, **fields):
+	"""開始一個階段，追蹤關閉時回傳空物件"""
+	if _tracer.sink is None:
+		return NULL_SPAN
+	return Span(_tracer, name, fields)
+
+
+def traced_locate(locator, first_keyword, second_keyword, **fields):
+	"""與 locator.locate 相同，分別記錄關鍵字定位與空格掃描（locator 需有 locate_field / scan_empty_cells）"""
+	with span('locate_field', **fields):
+		field_row, field_col = locator.locate_field(first_keyword, second_keyword)
+	with span('scan_empty_cells', **fields) as scan_span:
+		empty_cells = locator.scan_empty_cells(field_row, field_col)
+		scan_span.set(cells=len(empty_cells))
+	return empty_cells
+
+
+configure()
@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+xlsx就地修補
+只改寫目標工作表的XML中被寫入的 <c> 元素，其他zip成員不解壓直接複製，
+圖表、圖片、資料驗證等openpyxl無法保留的內容都不會遺失
+"""
+
+import codecs
+import math
+import os
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+
+from backends import load_backend
+from engine import OpenpyxlSheetWriter, get_excel_column_name
+from xlsx_reader import parse_cell_ref, resolve_sheet_part
+
+
+CALC_CHAIN_PART = 'xl/calcChain.xml'
+WORKBOOK_PART = 'xl/workbook.xml'
+
+# CT_Workbook 中排在 <calcPr> 之後的元素（缺少 <calcPr> 時插入在其中第一個之前）
+WORKBOOK_ELEMENTS_AFTER_CALC = ('oleSize', 'customWorkbookViews', 'pivotCaches', 'smartTagPr',
+								'smartTagTypes', 'webPublishing', 'fileRecoveryPr',
+								'webPublishObjects', 'extLst')
+
+# zip結構
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_OF_CENTRAL_DIR = struct.Struct('<IHHHHIIH')
+LOCAL_HEADER_SIGNATURE = 0x04034b50
+CENTRAL_HEADER_SIGNATURE = 0x02014b50
+END_OF_CENTRAL_DIR_SIGNATURE = 0x06054b50
+FLAG_ENCRYPTED = 0x01
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+ZIP32_LIMIT = 0xFFFFFFFF
+
+# 串流讀寫的區段大小
+STREAM_CHUNK_SIZE = 1 << 20
+
+# 區段結尾保留的字元數（涵蓋被截斷的 </x:sheetData> 等標籤）
+TAG_LOOKBEHIND = 64
+
+SHEET_DATA_PATTERN = re.compile(r'<(\w+:)?sheetData\b[^>]*?(/?)>')
+
+# XML 1.0 不允許的控制字元
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class PatchError(Exception):
+	"""無法就地修補（呼叫端應改用openpyxl儲存）"""
+
+
+def cell_position(ref):
+	"""'B4' -> (3, 1)（0-based）"""
+	position = parse_cell_ref(ref)
+	if position is None:
+		raise PatchError(f"無法解析儲存格位址: {ref}")
+	return position
+
+
+def escape_text(text):
+	text = INVALID_XML_CHARS.sub('', text)
+	return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def get_attr(tag, name):
+	"""從開始標籤中取得屬性值"""
+	match = re.search(r'\s%s="([^"]*)"' % name, tag)
+	return match.group(1) if match else None
+
+
+def remove_attr(tag, name):
+	return re.sub(r'\s%s="[^"]*"' % name, '', tag)
+
+
+# ---- 工作表XML改寫 ----
+
+class XmlChunkReader:
+	"""逐段解碼UTF-8串流，buffer 為已讀取、尚未處理的文字"""
+
+	def __init__(self, stream, chunk_size=STREAM_CHUNK_SIZE):
+		self.stream = stream
+		self.chunk_size = chunk_size
+		self.decoder = codecs.getincrementaldecoder('utf-8')()
+		self.buffer = ''
+		self.eof = False
+
+	def read_more(self):
+		"""再讀取一段，已到結尾時拋出PatchError（XML不完整）"""
+		if self.eof:
+			raise PatchError("工作表XML不完整")
+		data = self.stream.read(self.chunk_size)
+		self.eof = not data
+		self.buffer += self.decoder.decode(data, final=self.eof)
+
+	def search(self, pattern):
+		"""在buffer中搜尋，找不到時繼續讀取，到結尾仍找不到回傳None"""
+		while True:
+			match = pattern.search(self.buffer)
+			if match or self.eof:
+				return match
+			self.read_more()
+
+	def consume(self, end):
+		"""丟棄已處理的前 end 個字元"""
+		self.buffer = self.buffer[end:]
+
+	def remaining(self):
+		"""逐段回傳尚未讀取的文字"""
+		while not self.eof:
+			self.buffer = ''
+			self.read_more()
+			if self.buffer:
+				yield self.buffer
+
+
+class SheetXmlPatcher:
+	"""逐段改寫工作表XML中的 <sheetData>：未寫入的行原樣輸出，只重新產生被寫入的行
+
+	記憶體中只保留一個讀取區段與目前的行，不需載入整個工作表
+	"""
+
+	def __init__(self, targets, chunk_size=STREAM_CHUNK_SIZE):
+		"""targets: {row: {col: value}}（0-based）"""
+		self.targets = targets
+		self.chunk_size = chunk_size
+		self.prefix = ''
+		self.formula_removed = False
+		self.cells_replaced = 0
+		self.cells_inserted = 0
+
+	def iter_patch(self, stream):
+		"""讀取工作表XML（二進位串流），依序產生改寫後的UTF-8位元組"""
+		reader = XmlChunkReader(stream, self.chunk_size)
+		output = []
+		output_size = 0
+
+		# sheetData 之前的部分（含 <dimension>）通常很小，讀到 sheetData 開始標籤為止
+		match = reader.search(SHEET_DATA_PATTERN)
+		if match is None:
+			raise PatchError("工作表XML中沒有 sheetData")
+		p = self.prefix = match.group(1) or ''
+		self.cell_pattern = re.compile(r'<%sc\b[^>]*?(?:/>|>.*?</%sc>)' % (re.escape(p), re.escape(p)), re.S)
+		head = self.update_dimension(reader.buffer[:match.start()])
+
+		if match.group(2):
+			# <sheetData/>：工作表沒有任何儲存格
+			reader.consume(match.end())
+			output.append(head + f'<{p}sheetData>'
+						  + ''.join(self.new_row(row) for row in sorted(self.targets))
+						  + f'</{p}sheetData>')
+		else:
+			output.append(head + match.group(0))
+			reader.consume(match.end())
+			for part in self.patch_rows(reader):
+				output.append(part)
+				output_size += len(part)
+				if output_size >= self.chunk_size:
+					yield ''.join(output).encode('utf-8')
+					output = []
+					output_size = 0
+
+		# sheetData 之後原樣輸出
+		output.append(reader.buffer)
+		yield ''.join(output).encode('utf-8')
+		for text in reader.remaining():
+			yield text.encode('utf-8')
+
+	def patch_rows(self, reader):
+		"""依序產生 <sheetData> 的內容（到結束標籤為止，不含），讀取器停在結束標籤"""
+		p = self.prefix
+		row_start = re.compile(r'<%srow\b|</%ssheetData>' % (re.escape(p), re.escape(p)))
+		row_end = f'</{p}row>'
+		pending = sorted(self.targets)
+		row_number = 0
+		position = 0
+		while True:
+			buffer = reader.buffer
+			match = row_start.search(buffer, position)
+			if match is None:
+				# 行與行之間只有空白；保留結尾可能被截斷的標籤
+				keep = max(position, len(buffer) - TAG_LOOKBEHIND)
+				yield buffer[position:keep]
+				reader.consume(keep)
+				position = 0
+				reader.read_more()
+				continue
+
+			if match.group(0)[1] == '/':
+				# </sheetData>：插入剩下的新行
+				yield buffer[position:match.start()]
+				for row in pending:
+					yield self.new_row(row)
+				reader.consume(match.start())
+				return
+
+			tag_end = buffer.find('>', match.end())
+			element_end = -1
+			if tag_end != -1:
+				if buffer[tag_end - 1] == '/':
+					element_end = tag_end + 1
+				else:
+					close = buffer.find(row_end, tag_end)
+					if close != -1:
+						element_end = close + len(row_end)
+			if element_end == -1:
+				# 這一行還沒讀完
+				yield buffer[position:match.start()]
+				reader.consume(match.start())
+				position = 0
+				reader.read_more()
+				continue
+
+			yield buffer[position:match.start()]
+			row_xml = buffer[match.start():element_end]
+			r = get_attr(buffer[match.start():tag_end + 1], 'r')
+			row_number = int(r) if r else row_number + 1
+			row = row_number - 1
+
+			# 在這一行之前插入新的行
+			while pending and pending[0] < row:
+				yield self.new_row(pending.pop(0))
+
+			if pending and pending[0] == row:
+				pending.pop(0)
+				yield self.patch_row(row_xml, row)
+			else:
+				yield row_xml
+			position = element_end
+
+	def cell_xml(self, row, col, value, style=None):
+		"""產生一個 <c> 元素（字串以inlineStr寫入，不需修改共用字串表）"""
+		p = self.prefix
+		ref = f"{get_excel_column_name(col)}{row + 1}"
+		style_attr = f' s="{style}"' if style is not None else ''
+		if value is None:
+			return f'<{p}c r="{ref}"{style_attr}/>'
+		if isinstance(value, bool):
+			return f'<{p}c r="{ref}"{style_attr} t="b"><{p}v>{int(value)}</{p}v></{p}c>'
+		if isinstance(value, (int, float)) and math.isfinite(value):
+			return f'<{p}c r="{ref}"{style_attr}><{p}v>{repr(value)}</{p}v></{p}c>'
+		return (f'<{p}c r="{ref}"{style_attr} t="inlineStr"><{p}is>'
+				f'<{p}t xml:space="preserve">{escape_text(str(value))}</{p}t></{p}is></{p}c>')
+
+	def new_row(self, row):
+		p = self.prefix
+		cells = self.targets[row]
+		self.cells_inserted += len(cells)
+		return (f'<{p}row r="{row + 1}">'
+				+ ''.join(self.cell_xml(row, col, cells[col]) for col in sorted(cells))
+				+ f'</{p}row>')
+
+	def patch_row(self, row_xml, row):
+		"""替換或插入此行中被寫入的儲存格（保留原本的樣式）"""
+		p = self.prefix
+		cells = dict(self.targets[row])
+		tag_end = row_xml.index('>') + 1
+		start_tag = row_xml[:tag_end]
+		if start_tag.endswith('/>'):
+			start_tag = start_tag[:-2].rstrip() + '>'
+			body = ''
+		else:
+			body = row_xml[tag_end:row_xml.rindex(f'</{p}row>')]
+
+		parts = []
+		position = 0
+		inserted = False
+		for match in self.cell_pattern.finditer(body):
+			cell_xml = match.group(0)
+			cell_tag = cell_xml[:cell_xml.index('>') + 1]
+			ref = get_attr(cell_tag, 'r')
+			if ref is None:
+				raise PatchError("儲存格沒有位址（r 屬性）")
+			col = cell_position(ref)[1]
+
+			# 插入位於此儲存格之前的新儲存格
+			for new_col in sorted(c for c in cells if c < col):
+				parts.append(body[position:match.start()])
+				position = match.start()
+				parts.append(self.cell_xml(row, new_col, cells.pop(new_col)))
+				self.cells_inserted += 1
+				inserted = True
+
+			if col in cells:
+				self.check_formula(cell_xml)
+				parts.append(body[position:match.start()])
+				parts.append(self.cell_xml(row, col, cells.pop(col), get_attr(cell_tag, 's')))
+				position = match.end()
+				self.cells_replaced += 1
+
+		parts.append(body[position:])
+		for new_col in sorted(cells):
+			parts.append(self.cell_xml(row, new_col, cells[new_col]))
+			self.cells_inserted += 1
+			inserted = True
+
+		if inserted:
+			# spans 只是提示，新增儲存格後可能不正確，直接移除
+			start_tag = remove_attr(start_tag, 'spans')
+		return start_tag + ''.join(parts) + f'</{p}row>'
+
+	def check_formula(self, cell_xml):
+		"""覆寫含公式的儲存格：共用/陣列公式的主儲存格無法單獨修改"""
+		match = re.search(r'<%sf\b([^>]*)' % re.escape(self.prefix), cell_xml)
+		if not match:
+			return
+		attrs = match.group(1)
+		if 'ref="' in attrs and ('t="shared"' in attrs or 't="array"' in attrs):
+			raise PatchError("目標儲存格是共用或陣列公式的主儲存格")
+		self.formula_removed = True
+
+	def update_dimension(self, head):
+		"""擴大 <dimension ref> 以涵蓋新寫入的儲存格"""
+		p = re.escape(self.prefix)
+		match = re.search(r'<%sdimension\b[^>]*\bref="([^"]*)"' % p, head)
+		if not match:
+			return head
+
+		rows = list(self.targets)
+		cols = [col for cells in self.targets.values() for col in cells]
+		top, left, bottom, right = min(rows), min(cols), max(rows), max(cols)
+		try:
+			corners = [cell_position(ref) for ref in match.group(1).split(':')]
+		except PatchError:
+			return head
+		if len(corners) == 1:
+			corners.append(corners[0])
+		(old_top, old_left), (old_bottom, old_right) = corners
+		top, left = min(top, old_top), min(left, old_left)
+		bottom, right = max(bottom, old_bottom), max(right, old_right)
+
+		ref = f"{get_excel_column_name(left)}{top + 1}:{get_excel_column_name(right)}{bottom + 1}"
+		return head[:match.start(1)] + ref + head[match.end(1):]
+
+
+def remove_calc_chain(content_types, workbook_rels):
+	"""移除calcChain的宣告與關聯（Excel開啟時會重新建立）"""
+	content_types = re.sub(r'<Override\b[^>]*PartName="/xl/calcChain\.xml"[^>]*/>', '', content_types)
+	workbook_rels = re.sub(r'<Relationship\b[^>]*Target="[^"]*calcChain\.xml"[^>]*/>', '', workbook_rels)
+	return content_types, workbook_rels
+
+
+def set_full_calc_on_load(workbook_xml):
+	"""在 <calcPr> 設定 fullCalcOnLoad="1"（沒有時插入），
+	依賴寫入儲存格的公式仍保留舊的快取值，開啟時需要全部重新計算"""
+	match = re.search(r'<(\w+:)?workbook\b', workbook_xml)
+	if not match:
+		raise PatchError("workbook.xml 中沒有 workbook")
+	prefix = match.group(1) or ''
+	p = re.escape(prefix)
+
+	calc = re.search(r'<%scalcPr\b[^>]*?(/?)>' % p, workbook_xml)
+	if calc:
+		tag = calc.group(0)
+		closing = '/>' if calc.group(1) else '>'
+		new_tag = remove_attr(tag[:-len(closing)], 'fullCalcOnLoad').rstrip() + ' fullCalcOnLoad="1"' + closing
+		return workbook_xml[:calc.start()] + new_tag + workbook_xml[calc.end():]
+
+	new_tag = f'<{prefix}calcPr fullCalcOnLoad="1"/>'
+	after = re.search(r'<%s(?:%s)\b' % (p, '|'.join(WORKBOOK_ELEMENTS_AFTER_CALC)), workbook_xml)
+	if after:
+		position = after.start()
+	else:
+		position = workbook_xml.rindex(f'</{prefix}workbook>')
+	return workbook_xml[:position] + new_tag + workbook_xml[position:]
+
+
+# ---- zip複製 ----
+
+def dos_datetime(date_time):
+	year, month, day, hour, minute, second = date_time
+	return ((hour << 11) | (minute << 5) | (second // 2),
+			((max(year, 1980) - 1980) << 9) | (month << 5) | day)
+
+
+def copy_raw_member(src, info, dst):
+	"""複製成員壓縮後的原始位元組（不解壓，分段複製）"""
+	src.seek(info.header_offset)
+	header = LOCAL_HEADER.unpack(src.read(LOCAL_HEADER.size))
+	if header[0] != LOCAL_HEADER_SIGNATURE:
+		raise PatchError(f"zip成員標頭錯誤: {info.filename}")
+	name_length, extra_length = header[9], header[10]
+	src.seek(name_length + extra_length, os.SEEK_CUR)
+	copy_bytes(src, dst, info.compress_size)
+
+
+def copy_bytes(src, dst, size):
+	while size > 0:
+		data = src.read(min(size, STREAM_CHUNK_SIZE))
+		if not data:
+			raise PatchError("zip成員資料不完整")
+		dst.write(data)
+		size -= len(data)
+
+
+class DeflatedMember:
+	"""串流壓縮（raw deflate）到暫存檔的成員內容，寫入zip時直接複製"""
+
+	def __init__(self, chunks):
+		self.file = tempfile.TemporaryFile()
+		try:
+			compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+			self.crc = 0
+			self.file_size = 0
+			for data in chunks:
+				self.crc = zlib.crc32(data, self.crc)
+				self.file_size += len(data)
+				self.file.write(compressor.compress(data))
+			self.file.write(compressor.flush())
+			self.compress_size = self.file.tell()
+		except BaseException:
+			self.file.close()
+			raise
+
+	def close(self):
+		self.file.close()
+
+
+class ZipCopyWriter:
+	"""逐一寫入zip成員：未修改的成員直接寫入原始壓縮資料"""
+
+	def __init__(self, f):
+		self.f = f
+		self.entries = []
+
+	def add_raw(self, info, src):
+		"""從原始zip檔 src 複製未修改的成員"""
+		self._begin(info, info.compress_type, info.CRC, info.compress_size, info.file_size)
+		copy_raw_member(src, info, self.f)
+
+	def add_data(self, info, data):
+		compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+		raw = compressor.compress(data) + compressor.flush()
+		self._begin(info, zipfile.ZIP_DEFLATED, zlib.crc32(data), len(raw), len(data))
+		self.f.write(raw)
+
+	def add_deflated(self, info, member):
+		"""寫入 DeflatedMember"""
+		self._begin(info, zipfile.ZIP_DEFLATED, member.crc, member.compress_size, member.file_size)
+		member.file.seek(0)
+		copy_bytes(member.file, self.f, member.compress_size)
+
+	def _begin(self, info, method, crc, compress_size, file_size):
+		"""寫入本地標頭，之後由呼叫端寫入 compress_size 位元組的內容"""
+		flags = info.flag_bits & ~FLAG_DATA_DESCRIPTOR
+		name = info.filename.encode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+		offset = self.f.tell()
+		if offset > ZIP32_LIMIT or compress_size > ZIP32_LIMIT or file_size > ZIP32_LIMIT:
+			raise PatchError("檔案過大（需要Zip64）")
+		dos_time, dos_date = dos_datetime(info.date_time)
+		version = max(info.extract_version, 20)
+		self.f.write(LOCAL_HEADER.pack(LOCAL_HEADER_SIGNATURE, version, flags, method,
+									   dos_time, dos_date, crc, compress_size, file_size, len(name), 0))
+		self.f.write(name)
+		self.entries.append((info, version, flags, method, dos_time, dos_date, crc, compress_size,
+							 file_size, name, offset))
+
+	def close(self):
+		start = self.f.tell()
+		for (info, version, flags, method, dos_time, dos_date, crc, compress_size,
+			 file_size, name, offset) in self.entries:
+			self.f.write(CENTRAL_HEADER.pack(
+				CENTRAL_HEADER_SIGNATURE, (info.create_system << 8) | info.create_version, version,
+				flags, method, dos_time, dos_date, crc, compress_size, file_size, len(name), 0, 0,
+				0, info.internal_attr, info.external_attr, offset))
+			self.f.write(name)
+		size = self.f.tell() - start
+		if len(self.entries) > 0xFFFF or start > ZIP32_LIMIT:
+			raise PatchError("檔案過大（需要Zip64）")
+		self.f.write(END_OF_CENTRAL_DIR.pack(END_OF_CENTRAL_DIR_SIGNATURE, 0, 0, len(self.entries),
+											 len(self.entries), size, start, 0))
+
+
+# ---- 對外接口 ----
+
+def group_targets(plan):
+	"""[(row, col, value)] -> {row: {col: value}}（後面的值覆蓋前面的）"""
+	targets = {}
+	for row, col, value in plan:
+		targets.setdefault(row, {})[col] = value
+	return targets
+
+
+def patch_xlsx(path, plan, sheet_name=None, output_path=None):
+	"""將 [(row, col, value)]（0-based）寫入xlsx的工作表，回傳統計
+
+	只重新壓縮目標工作表與 workbook.xml（設定開啟時重新計算；覆寫公式時另外修改
+	[Content_Types].xml 與 workbook.xml.rels），其他成員原樣複製。無法安全修補時拋出PatchError，檔案不會被修改。
+	"""
+	output_path = output_path or path
+	targets = group_targets(plan)
+	stats = {'cells_replaced': 0, 'cells_inserted': 0, 'members_copied': 0,
+			 'members_rewritten': 0, 'calc_chain_removed': False, 'full_calc_on_load': False}
+
+	replaced = {}  # 成員名稱 -> 新內容（bytes / DeflatedMember），None 表示移除
+	try:
+		with zipfile.ZipFile(path) as archive:
+			infos = archive.infolist()
+			for info in infos:
+				if info.flag_bits & FLAG_ENCRYPTED:
+					raise PatchError("不支援加密的檔案")
+			try:
+				sheet_part, _ = resolve_sheet_part(archive, sheet_name)
+			except KeyError:
+				raise PatchError(f"找不到工作表: {sheet_name}")
+
+			if targets:
+				# 工作表逐段讀取、改寫並壓縮到暫存檔，不會整個載入記憶體
+				patcher = SheetXmlPatcher(targets)
+				with archive.open(sheet_part) as stream:
+					replaced[sheet_part] = DeflatedMember(patcher.iter_patch(stream))
+				stats['cells_replaced'] = patcher.cells_replaced
+				stats['cells_inserted'] = patcher.cells_inserted
+
+				# 公式的快取值不會隨寫入更新，開啟時由Excel重新計算
+				replaced[WORKBOOK_PART] = set_full_calc_on_load(
+					archive.read(WORKBOOK_PART).decode('utf-8')).encode('utf-8')
+				stats['full_calc_on_load'] = True
+
+				names = set(archive.namelist())
+				if patcher.formula_removed and CALC_CHAIN_PART in names:
+					content_types, workbook_rels = remove_calc_chain(
+						archive.read('[Content_Types].xml').decode('utf-8'),
+						archive.read('xl/_rels/workbook.xml.rels').decode('utf-8'))
+					replaced['[Content_Types].xml'] = content_types.encode('utf-8')
+					replaced['xl/_rels/workbook.xml.rels'] = workbook_rels.encode('utf-8')
+					replaced[CALC_CHAIN_PART] = None
+					stats['calc_chain_removed'] = True
+
+		write_patched_zip(path, output_path, infos, replaced, stats)
+	finally:
+		for data in replaced.values():
+			if isinstance(data, DeflatedMember):
+				data.close()
+	return stats
+
+
+def write_patched_zip(path, output_path, infos, replaced, stats):
+	"""依原本的成員順序寫出新的zip：先寫入暫存檔，完成後再取代，失敗時原檔案不受影響"""
+	directory = os.path.dirname(os.path.abspath(output_path))
+	fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=directory)
+	try:
+		with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+			writer = ZipCopyWriter(dst)
+			for info in infos:
+				if info.filename not in replaced:
+					writer.add_raw(info, src)
+					stats['members_copied'] += 1
+					continue
+				data = replaced[info.filename]
+				if data is None:
+					continue
+				if isinstance(data, DeflatedMember):
+					writer.add_deflated(info, data)
+				else:
+					writer.add_data(info, data)
+				stats['members_rewritten'] += 1
+			writer.close()
+		# mkstemp 建立的檔案權限為0600，沿用原檔案的權限
+		if os.path.exists(output_path):
+			shutil.copymode(output_path, temp_path)
+		os.replace(temp_path, output_path)
+	except BaseException:
+		if os.path.exists(temp_path):
+			os.remove(temp_path)
+		raise
+
+
+class XlsxPatchWriter:
+	"""以就地修補寫入xlsx檔案（與 OpenpyxlSheetWriter 相同的接口）"""
+
+	def __init__(self, path, sheet_name=None):
+		self.path = path
+		self.sheet_name = sheet_name
+		self.plan = []
+		self.stats = {}
+
+	def write_cells(self, plan):
+		"""記錄 [(row, col, value)]，儲存時一次寫入，回傳填入數量"""
+		self.plan.extend(plan)
+		return len(plan)
+
+	def save(self, path=None):
+		"""修補工作表並儲存（預設覆寫原檔案）"""
+		self.stats = patch_xlsx(self.path, self.plan, self.sheet_name, path or self.path)
+		self.plan = []
+
+	def save_with_fallback(self, path=None):
+		"""優先就地修補，無法修補時改用openpyxl重新儲存整個工作簿，回傳使用的方式"""
+		try:
+			self.save(path)
+			return 'patch'
+		except PatchError:
+			pass
+
+		# 不使用data_only，保留公式（openpyxl只在需要時匯入）
+		workbook = load_backend('openpyxl').load_workbook(self.path)
+		sheet = workbook[self.sheet_name] if self.sheet_name else workbook.active
+		writer = OpenpyxlSheetWriter(sheet, workbook, path or self.path)
+		writer.write_cells(self.plan)
+		writer.save()
+		self.plan = []
+		return 'openpyxl'
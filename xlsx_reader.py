@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+xlsx工作表讀取
+直接解析工作表XML一次，同時取得快取值（用於關鍵字定位）與公式（儲存時保留），
+不需要分別以 data_only=True / False 載入兩次
+"""
+
+import datetime
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+from engine import SheetModel
+
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+TAG_ROW = f'{{{NS_MAIN}}}row'
+TAG_CELL = f'{{{NS_MAIN}}}c'
+TAG_VALUE = f'{{{NS_MAIN}}}v'
+TAG_FORMULA = f'{{{NS_MAIN}}}f'
+TAG_INLINE = f'{{{NS_MAIN}}}is'
+TAG_TEXT = f'{{{NS_MAIN}}}t'
+TAG_DIMENSION = f'{{{NS_MAIN}}}dimension'
+
+CELL_REF = re.compile(r'^([A-Z]+)(\d+)$')
+
+# 日期格式判斷（與openpyxl相同的規則）
+BUILTIN_DATE_FORMATS = {
+	14: 'mm-dd-yy', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy', 18: 'h:mm AM/PM',
+	19: 'h:mm:ss AM/PM', 20: 'h:mm', 21: 'h:mm:ss', 22: 'm/d/yy h:mm',
+	45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mmss.0',
+}
+FORMAT_STRIP = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+TIMEDELTA_FORMAT = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+MAC_EPOCH = datetime.datetime(1904, 1, 1)
+
+
+def column_index(letters):
+	"""Excel列名轉為 0-based 索引"""
+	index = 0
+	for char in letters:
+		index = index * 26 + (ord(char) - 64)
+	return index - 1
+
+
+def parse_cell_ref(ref):
+	"""'B4' -> (3, 1)（0-based），無法解析時回傳None"""
+	match = CELL_REF.match(ref)
+	if not match:
+		return None
+	return int(match.group(2)) - 1, column_index(match.group(1))
+
+
+def is_date_format(fmt):
+	fmt = FORMAT_STRIP.sub('', fmt.split(';')[0])
+	return re.search(r'(?<![_\\])[dmhysDMHYS]', fmt) is not None
+
+
+def from_excel(value, epoch, timedelta=False):
+	"""Excel序號轉為日期時間"""
+	if timedelta:
+		return datetime.timedelta(days=value)
+	day, fraction = divmod(value, 1)
+	diff = datetime.timedelta(milliseconds=round(fraction * 86400 * 1000))
+	if 0 <= value < 1 and diff.days == 0:
+		return (datetime.datetime.min + diff).time()
+	if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+		day += 1
+	return epoch + datetime.timedelta(days=day) + diff
+
+
+def cast_number(text):
+	"""與openpyxl相同：有小數點或指數時為float，否則為int"""
+	if '.' in text or 'E' in text or 'e' in text:
+		return float(text)
+	return int(text)
+
+
+def resolve_sheet_part(archive, sheet_name=None):
+	"""找出工作表對應的zip成員名稱（未指定時為活動的工作表），回傳 (成員名稱, 工作表名稱)"""
+	workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+	sheets = workbook.findall(f'{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet')
+	if not sheets:
+		raise ValueError("工作簿中沒有工作表")
+
+	if sheet_name:
+		matches = [sheet for sheet in sheets if sheet.get('name') == sheet_name]
+		if not matches:
+			raise KeyError(sheet_name)
+		sheet = matches[0]
+	else:
+		view = workbook.find(f'{{{NS_MAIN}}}bookViews/{{{NS_MAIN}}}workbookView')
+		active = int(view.get('activeTab', 0)) if view is not None else 0
+		sheet = sheets[active] if active < len(sheets) else sheets[0]
+
+	rel_id = sheet.get(f'{{{NS_REL}}}id')
+	rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+	for rel in rels.findall(f'{{{NS_PKG_REL}}}Relationship'):
+		if rel.get('Id') == rel_id:
+			target = rel.get('Target')
+			part = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+			return os.path.normpath(part).replace(os.sep, '/'), sheet.get('name')
+	raise ValueError(f"找不到工作表的XML: {sheet.get('name')}")
+
+
+def active_sheet_name(path):
+	"""活動工作表的名稱（只讀取workbook.xml）"""
+	with zipfile.ZipFile(path) as archive:
+		return resolve_sheet_part(archive)[1]
+
+
+def sheet_names(archive):
+	"""工作簿中所有工作表的名稱（依順序）"""
+	workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+	return [sheet.get('name') for sheet in workbook.findall(f'{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet')]
+
+
+def read_shared_strings(archive):
+	"""讀取共用字串表"""
+	if 'xl/sharedStrings.xml' not in archive.namelist():
+		return []
+	strings = []
+	with archive.open('xl/sharedStrings.xml') as f:
+		for _, element in ET.iterparse(f):
+			if element.tag == f'{{{NS_MAIN}}}si':
+				strings.append(''.join(t.text or '' for t in element.iter(TAG_TEXT)))
+				element.clear()
+	return strings
+
+
+def read_date_styles(archive):
+	"""回傳 {樣式編號: 是否為時間長度格式}，只包含日期/時間格式的樣式"""
+	if 'xl/styles.xml' not in archive.namelist():
+		return {}
+	styles = ET.fromstring(archive.read('xl/styles.xml'))
+	formats = dict(BUILTIN_DATE_FORMATS)
+	for num_fmt in styles.iter(f'{{{NS_MAIN}}}numFmt'):
+		formats[int(num_fmt.get('numFmtId'))] = num_fmt.get('formatCode', '')
+
+	date_styles = {}
+	cell_xfs = styles.find(f'{{{NS_MAIN}}}cellXfs')
+	if cell_xfs is None:
+		return date_styles
+	for index, xf in enumerate(cell_xfs.findall(f'{{{NS_MAIN}}}xf')):
+		fmt = formats.get(int(xf.get('numFmtId', 0)))
+		if fmt and is_date_format(fmt):
+			date_styles[index] = TIMEDELTA_FORMAT.search(fmt.split(';')[0]) is not None
+	return date_styles
+
+
+def uses_1904_dates(archive):
+	workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+	properties = workbook.find(f'{{{NS_MAIN}}}workbookPr')
+	return properties is not None and properties.get('date1904') in ('1', 'true')
+
+
+class XlsxSheetReader:
+	"""逐行讀取xlsx工作表：快取值與公式來自同一次解析"""
+
+	def __init__(self, path, sheet_name=None):
+		self.path = path
+		self.archive = zipfile.ZipFile(path)
+		try:
+			self.part, self.sheet_name = resolve_sheet_part(self.archive, sheet_name)
+		except KeyError:
+			self.archive.close()
+			raise
+		self.shared_strings = read_shared_strings(self.archive)
+		self.date_styles = read_date_styles(self.archive)
+		self.epoch = MAC_EPOCH if uses_1904_dates(self.archive) else WINDOWS_EPOCH
+		self.formulas = {}  # (row, col) -> 公式文字（含 '='，共用公式的從屬儲存格為None）
+		self.max_column = None
+
+	def close(self):
+		self.archive.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def cell_value(self, cell):
+		"""儲存格的快取值（與 openpyxl data_only=True 相同的型別）"""
+		cell_type = cell.get('t', 'n')
+		if cell_type == 'inlineStr':
+			inline = cell.find(TAG_INLINE)
+			return None if inline is None else ''.join(t.text or '' for t in inline.iter(TAG_TEXT))
+
+		value = cell.findtext(TAG_VALUE) or None
+		if value is None:
+			return None
+		if cell_type == 's':
+			return self.shared_strings[int(value)]
+		if cell_type == 'b':
+			return value == '1'
+		if cell_type in ('str', 'e'):
+			return value
+		if cell_type == 'd':
+			return datetime.datetime.fromisoformat(value)
+
+		number = cast_number(value)
+		style = cell.get('s')
+		if style is not None:
+			timedelta = self.date_styles.get(int(style))
+			if timedelta is not None:
+				try:
+					return from_excel(number, self.epoch, timedelta)
+				except (OverflowError, ValueError):
+					# 超出日期範圍，與openpyxl相同視為錯誤
+					return '#VALUE!'
+		return number
+
+	def iter_rows(self):
+		"""逐行回傳快取值列表（0-based 絕對位置，缺少的行補空行，寬度補齊到dimension）"""
+		width = 0
+		next_row = 0
+		with self.archive.open(self.part) as f:
+			for event, element in ET.iterparse(f, events=('start', 'end')):
+				if event == 'start':
+					if element.tag == TAG_DIMENSION:
+						corners = [parse_cell_ref(ref) for ref in element.get('ref', '').split(':')]
+						if corners and corners[-1]:
+							width = corners[-1][1] + 1
+							self.max_column = width
+					continue
+				if element.tag != TAG_ROW:
+					continue
+
+				r = element.get('r')
+				row_idx = int(r) - 1 if r else next_row
+				while next_row < row_idx:
+					yield [None] * width
+					next_row += 1
+
+				values = [None] * width
+				col_idx = -1
+				for cell in element.iter(TAG_CELL):
+					ref = cell.get('r')
+					position = parse_cell_ref(ref) if ref else None
+					col_idx = position[1] if position else col_idx + 1
+					if col_idx >= len(values):
+						values.extend([None] * (col_idx + 1 - len(values)))
+					values[col_idx] = self.cell_value(cell)
+
+					formula = cell.find(TAG_FORMULA)
+					if formula is not None:
+						self.formulas[(row_idx, col_idx)] = f"={formula.text}" if formula.text else None
+
+				element.clear()
+				next_row = row_idx + 1
+				yield values
+
+	def read_all(self):
+		"""讀取整個工作表為 SheetModel（公式放在 formulas 屬性）"""
+		model = SheetModel(list(self.iter_rows()), self.sheet_name)
+		model.formulas = self.formulas
+		return model